@@ -0,0 +1,241 @@
+import datetime
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import FileField as ModelFileField, ManyToManyField
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.pagination import CursorPagination
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField, RelatedField
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from api.pagination import paginated_response
+from api.sparse_fields import requested_fields
+
+# Champs dont la représentation DRF est la valeur lue en base, telle quelle
+IDENTITY_FIELDS = (
+    serializers.BooleanField, serializers.CharField, serializers.ChoiceField,
+    serializers.FloatField, serializers.IntegerField,
+)
+
+# Champs dont la valeur ne se lit pas dans une colonne
+UNSUPPORTED_FIELDS = (serializers.BaseSerializer, serializers.SerializerMethodField, serializers.ModelField)
+
+
+class NotCompilable(Exception):
+    pass
+
+
+class CompiledSerializer:
+    """
+    Lecture seule d'un ModelSerializer à partir de lignes `values()` : les
+    colonnes et la conversion de chaque champ (`to_representation` du champ
+    DRF, ou rien quand la valeur est déjà celle du JSON) sont calculées une
+    fois ; une ligne n'est plus qu'une boucle sur ces accesseurs. Le JSON
+    produit est celui du sérialiseur d'origine.
+
+    Les champs lus par une méthode du modèle déclarent leur équivalent SQL
+    dans `Meta.compiled_expressions` ; les autres champs calculés
+    (SerializerMethodField, sérialiseurs imbriqués, `to_representation`
+    redéfini) rendent le sérialiseur non compilable.
+    """
+
+    def __init__(self, serializer):
+        meta = type(serializer).Meta
+        self.model = meta.model
+        expressions = getattr(meta, 'compiled_expressions', {})
+        if type(serializer).to_representation is not serializers.ModelSerializer.to_representation:
+            raise NotCompilable(f"{type(serializer).__name__}.to_representation est redéfini")
+
+        self.columns = ['pk']
+        self.annotations = {}
+        self.many = {}
+        self.files = {}
+        self.datetimes = {}
+        self.accessors = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if name in expressions:
+                key = f"_compiled_{name}"
+                self.annotations[key] = expressions[name]()
+                self.accessors.append((name, key, self.converter(field)))
+                continue
+            if isinstance(field, ManyRelatedField):
+                model_field = self.model._meta.get_field(field.source)
+                if not isinstance(field.child_relation, PrimaryKeyRelatedField) or not isinstance(model_field, ManyToManyField):
+                    raise NotCompilable(f"{name} : relation multiple non prise en charge")
+                self.many[name] = model_field
+                self.accessors.append((name, 'pk', None))
+                continue
+            if field.source == '*' or '.' in field.source or isinstance(field, UNSUPPORTED_FIELDS):
+                raise NotCompilable(f"{name} : champ calculé ({type(field).__name__})")
+            try:
+                model_field = self.model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                self.add_missing(name, field)
+                continue
+            if model_field.many_to_many or not model_field.concrete:
+                raise NotCompilable(f"{name} : relation non prise en charge")
+            if isinstance(field, RelatedField):
+                if not isinstance(field, PrimaryKeyRelatedField):
+                    raise NotCompilable(f"{name} : {type(field).__name__} non pris en charge")
+                if field.pk_field is not None:
+                    raise NotCompilable(f"{name} : pk_field non pris en charge")
+                self.add_column(name, model_field.attname, None)
+            elif isinstance(model_field, ModelFileField):
+                self.files[name] = (field, model_field)
+                self.add_column(name, model_field.attname, None)
+            elif isinstance(field, serializers.DateTimeField) and iso_format(field, api_settings.DATETIME_FORMAT):
+                self.datetimes[name] = field
+                self.add_column(name, model_field.attname, field.to_representation)
+            else:
+                self.add_column(name, model_field.attname, self.converter(field))
+
+    def add_column(self, name, column, convert):
+        if column not in self.columns:
+            self.columns.append(column)
+        self.accessors.append((name, column, convert))
+
+    def add_missing(self, name, field):
+        """ Source absente du modèle : même comportement que Field.get_attribute """
+        if callable(getattr(self.model, field.source, None)) or isinstance(getattr(self.model, field.source, None), property):
+            raise NotCompilable(f"{name} : lu par {self.model.__name__}.{field.source}, sans compiled_expressions")
+        if field.default is not empty:
+            default = field.get_default()
+            self.accessors.append((name, 'pk', lambda pk: default))
+        elif field.allow_null:
+            self.accessors.append((name, 'pk', lambda pk: None))
+        elif field.required:
+            raise NotCompilable(f"{name} : attribut {field.source} introuvable")
+        # Sinon DRF omet le champ (SkipField)
+
+    @staticmethod
+    def converter(field):
+        if isinstance(field, IDENTITY_FIELDS) and not isinstance(field, serializers.MultipleChoiceField):
+            return None
+        if isinstance(field, serializers.DateField) and iso_format(field, api_settings.DATE_FORMAT):
+            return datetime.date.isoformat
+        return field.to_representation
+
+    def values(self, queryset, *extra):
+        """ Queryset des lignes nécessaires à la sérialisation """
+        columns = self.columns + [column for column in extra if column not in self.columns]
+        # Les relations multiples sont lues par related_ids, pas par prefetch_related
+        queryset = queryset.prefetch_related(None)
+        if self.annotations:
+            queryset = queryset.annotate(**self.annotations)
+        return queryset.values(*columns, *self.annotations)
+
+    def serialize(self, rows, request=None):
+        rows = list(rows)
+        accessors = list(self.accessors)
+        if self.many or self.files or self.datetimes:
+            accessors = [self.bound(name, key, convert, rows, request) for name, key, convert in accessors]
+        data = []
+        for row in rows:
+            item = {}
+            for name, key, convert in accessors:
+                value = row[key]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    def bound(self, name, key, convert, rows, request):
+        """ Accesseurs dépendant de la page : relations multiples, URL des fichiers et fuseau horaire """
+        if name in self.many:
+            related = related_ids(self.many[name], [row['pk'] for row in rows])
+            return name, key, lambda pk: related.get(pk) or []
+        if name in self.files:
+            field, model_field = self.files[name]
+            return name, key, lambda file_name: file_url(field, model_field, file_name, request)
+        if name in self.datetimes:
+            return name, key, iso_datetime(self.datetimes[name])
+        return name, key, convert
+
+
+def related_ids(field, pks):
+    """ Identifiants liés par une relation multiple, pour une page d'objets (une requête) """
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    ordering = field.related_model._meta.ordering
+    rows = through.objects.filter(**{f"{source}__in": pks})
+    rows = rows.order_by(*(f"{'-' if order.startswith('-') else ''}{target}__{order.lstrip('-')}" for order in ordering)) if ordering else rows.order_by('pk')
+    related = {}
+    for source_id, target_id in rows.values_list(f"{source}_id", f"{target}_id"):
+        related.setdefault(source_id, []).append(target_id)
+    return related
+
+
+def iso_format(field, default):
+    return (getattr(field, 'format', default) or '').lower() == ISO_8601
+
+
+def iso_datetime(field):
+    """
+    DateTimeField.to_representation au format ISO 8601, avec le fuseau du
+    champ résolu une fois pour la page au lieu d'une fois par valeur.
+    """
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if field_timezone is None:
+        return field.to_representation
+
+    def convert(value):
+        if isinstance(value, str) or value.tzinfo is None:
+            return field.to_representation(value)
+        value = value.astimezone(field_timezone).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def file_url(field, model_field, name, request):
+    if not name:
+        return None
+    if not field.use_url:
+        return name
+    url = model_field.storage.url(name)
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+@lru_cache(maxsize=256)
+def _compile(serializer_class, fields, omit):
+    try:
+        return CompiledSerializer(serializer_class(context={'sparse_fields': (fields, omit)}))
+    except NotCompilable:
+        return None
+
+
+def compiled_serializer(serializer_class, request=None):
+    """ Sérialiseur compilé pour les champs demandés (`?fields=` / `?omit=`), ou None """
+    fields, omit = requested_fields(request)
+    return _compile(serializer_class, fields, omit)
+
+
+def compiled_list_response(view, queryset, serializer_class=None):
+    """
+    Réponse paginée comme `paginated_response`, construite par le sérialiseur
+    compilé quand il existe : lignes `values()` au lieu d'instances du modèle.
+    """
+    compiled = compiled_serializer(serializer_class or view.get_serializer_class(), view.request)
+    if compiled is None:
+        return paginated_response(view, queryset, serializer_class)
+
+    # La pagination par curseur lit la position dans la ligne
+    extra = ()
+    if isinstance(view.paginator, CursorPagination):
+        extra = tuple(order.lstrip('-') for order in view.paginator.get_ordering(view.request, queryset, view))
+    rows = compiled.values(queryset, *extra)
+    page = view.paginate_queryset(rows)
+    data = compiled.serialize(rows if page is None else page, view.request)
+    if page is None:
+        return Response(data)
+    return view.get_paginated_response(data)
+
+
+class CompiledListMixin:
+    """ `list` des ViewSets en lecture seule rapide (CompiledSerializer) """
+
+    def list(self, request, *args, **kwargs):
+        return compiled_list_response(self, self.filter_queryset(self.get_queryset()))
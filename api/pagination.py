@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination, LimitOffsetPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.response import Response
+
+MAX_PAGE_SIZE = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+
+
+class BoundedLimitOffsetPagination(LimitOffsetPagination):
+    max_limit = MAX_PAGE_SIZE
+
+
+class StandardPagination(PageNumberPagination):
+    """
+    Pagination par défaut de l'API : par numéro de page (`?page=2&page_size=50`)
+    ou, si `limit` / `offset` est présent, par décalage (`?limit=50&offset=100`).
+    La taille d'une page est toujours bornée par `API_MAX_PAGE_SIZE`.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def __init__(self):
+        self.limit_offset = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Sans ordre explicite, les pages ne sont pas stables d'une requête à l'autre
+        if isinstance(queryset, QuerySet) and not queryset.ordered:
+            queryset = queryset.order_by('pk')
+
+        if {'limit', 'offset'} & request.query_params.keys():
+            self.limit_offset = BoundedLimitOffsetPagination()
+            return self.limit_offset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.limit_offset is not None:
+            return self.limit_offset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Pagination par curseur sur le couple (champ d'ordre, pk), pour les tables
+    alimentées en continu (messages, factures, fils d'actualité) : la page N
+    est lue par l'index composite comme la première, sans OFFSET. Le champ
+    d'ordre est celui de la vue (`ordering`) ou, à défaut, du modèle.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'ordering', None) or queryset.query.order_by or queryset.model._meta.ordering
+        field = ordering[0] if isinstance(ordering, (list, tuple)) else ordering
+        # Le pk départage les égalités : la position d'une ligne est unique
+        return (field, '-pk' if field.startswith('-') else 'pk')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor is not None else None
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.following(queryset.model, ordering, position))
+
+        # Une ligne de plus indique s'il existe une page suivante
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        self.has_next = bool(self.page) and (position is not None if reverse else has_more)
+        self.has_previous = bool(self.page) and (has_more if reverse else position is not None)
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def following(self, model, ordering, position):
+        """ Lignes situées après `position` dans l'ordre (champ, pk) donné """
+        field = ordering[0].lstrip('-')
+        # Le curseur vient du client : chaque partie est convertie par le champ du modèle
+        try:
+            pk, value = position.split(':', 1)
+            pk = model._meta.pk.to_python(pk)
+            value = model._meta.get_field(field).to_python(value)
+        except (ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        lookup = 'lt' if ordering[0].startswith('-') else 'gt'
+        # Borne inclusive sur le champ seul : l'index composite est parcouru par intervalle
+        return Q(**{f"{field}__{lookup}e": value}) & (Q(**{f"{field}__{lookup}": value}) | Q(**{f"pk__{lookup}": pk}))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self._get_position_from_instance(self.page[-1], self.ordering)))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self._get_position_from_instance(self.page[0], self.ordering)))
+
+    def _get_position_from_instance(self, instance, ordering):
+        field = ordering[0].lstrip('-')
+        if isinstance(instance, dict):
+            return f"{instance['pk' if 'pk' in instance else 'id']}:{instance[field]}"
+        return f"{instance.pk}:{getattr(instance, field)}"
+
+
+def paginated_response(view, queryset, serializer_class=None):
+    """
+    Réponse paginée pour les actions personnalisées des ViewSets génériques,
+    avec le sérialiseur de la vue ou `serializer_class`.
+    """
+    page = view.paginate_queryset(queryset)
+    items = queryset if page is None else page
+    if serializer_class is None:
+        serializer = view.get_serializer(items, many=True)
+    else:
+        serializer = serializer_class(items, many=True, context=view.get_serializer_context())
+    if page is None:
+        return Response(serializer.data)
+    return view.get_paginated_response(serializer.data)
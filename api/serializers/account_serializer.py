@@ -1,7 +1,10 @@
 from django.forms import ValidationError
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from django.contrib.auth.forms import PasswordResetForm
 from django.contrib.auth.tokens import default_token_generator
+from api.sparse_fields import SparseFieldsetMixin
 from backend.models.account import User, UserRole
 from django.contrib.auth import get_user_model
 
@@ -13,7 +16,15 @@ class UserRoleSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserSerializer(serializers.ModelSerializer):
+# Champs masqués selon le rôle (code), le premier rôle de la liste porté par l'utilisateur l'emporte
+HIDDEN_FIELDS_BY_ROLE = (
+    ('teacher', ('hire_date', 'phone_work', 'profession')),
+    ('parent', ('nickname', 'is_principal', 'is_assistant')),
+    ('pupil', ('is_principal', 'is_assistant', 'hire_date', 'phone_work', 'profession')),
+)
+
+
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     role_name = serializers.SerializerMethodField()
     
     class Meta:
@@ -26,10 +37,18 @@ class UserSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at',
         ]
         extra_kwargs = {'password': {'write_only': True}}  # Empêcher l'affichage du mot de passe
+        sparse_sources = {'role_name': ['roles']}  # Colonnes lues par les champs calculés (?fields=)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._visible_fields = {}
+        # Le rôle n'est lu que si un champ qu'il masque est demandé
+        self._role_dependent = any(name in self.fields for _, fields in HIDDEN_FIELDS_BY_ROLE for name in fields)
 
     def get_role_name(self, obj):
-        """ Retourne le nom du rôle de l'utilisateur """
-        return obj.role.name if obj.role else None
+        """ Retourne le nom du rôle principal de l'utilisateur (sans requête si `roles` est préchargé) """
+        roles = sorted(obj.roles.all(), key=lambda role: role.pk)
+        return roles[0].name if roles else None
 
     def validate(self, data):
         """ Vérifie que l'utilisateur a bien un rôle valide """
@@ -70,34 +89,76 @@ class UserSerializer(serializers.ModelSerializer):
         return instance
 
 
-    def to_representation(self, instance):
-        """ Afficher les champs dynamiquement selon le rôle """
-        data = super().to_representation(instance)
-
-        # Masquer les champs selon le rôle
-        if instance.role.name.lower() == "teacher":
-            # Cacher les champs inutiles pour un enseignant
-            del data['hire_date']
-            del data['phone_work']
-            del data['profession']
-
-        elif instance.role.name.lower() == "parent":
-            # Cacher les champs spécifiques aux enseignants et élèves
-            del data['nickname']
-            del data['is_principal']
-            del data['is_assistant']
-        
-        elif instance.role.name.lower() == "pupil":
-            # Cacher les champs inutiles pour un élève
-            del data['is_principal']
-            del data['is_assistant']
-            del data['hire_date']
-            del data['phone_work']
-            del data['profession']
+    def visible_fields(self, instance):
+        """
+        Champs affichés pour le rôle de l'utilisateur, calculés une fois par
+        sérialiseur et par jeu de champs masqués (au plus un par rôle).
+        """
+        hidden = ()
+        if self._role_dependent:
+            role_codes = instance.role_codes
+            hidden = next((fields for code, fields in HIDDEN_FIELDS_BY_ROLE if code in role_codes), ())
+        if hidden not in self._visible_fields:
+            self._visible_fields[hidden] = [field for field in self._readable_fields if field.field_name not in hidden]
+        return self._visible_fields[hidden]
 
+    def to_representation(self, instance):
+        """ Afficher les champs dynamiquement selon le rôle : les champs masqués ne sont pas sérialisés """
+        data = {}
+        for field in self.visible_fields(instance):
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            data[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
         return data
 
 
+class SchoolMemberSerializer(UserSerializer):
+    """
+    Membre d'une école (élève, parent, enseignant) : sérialise une inscription
+    sous la forme de son utilisateur, complété de la classe et de l'année.
+    """
+    registration = serializers.IntegerField(source='registration.pk', read_only=True)
+    classroom = serializers.IntegerField(source='registration.classroom_id', read_only=True, allow_null=True)
+    classroom_name = serializers.CharField(source='registration.classroom.name', read_only=True, allow_null=True)
+    school_year = serializers.IntegerField(source='registration.school_year_id', read_only=True, allow_null=True)
+    school_year_name = serializers.CharField(source='registration.school_year.year', read_only=True, allow_null=True)
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ['registration', 'classroom', 'classroom_name', 'school_year', 'school_year_name']
+        # Colonnes de l'inscription (et non de l'utilisateur) lues par les champs du membre
+        registration_sources = {
+            'registration': [],
+            'classroom': ['classroom'],
+            'classroom_name': ['classroom__name'],
+            'school_year': ['school_year'],
+            'school_year_name': ['school_year__year'],
+        }
+        sparse_sources = {**UserSerializer.Meta.sparse_sources, **dict.fromkeys(registration_sources, [])}
+
+    @classmethod
+    def sparse_columns(cls, request):
+        """
+        Colonnes de l'inscription pour `.only()` : celles de l'utilisateur
+        sous `user__`, suivies de celles de la classe et de l'année demandées.
+        """
+        columns = super().sparse_columns(request)
+        if columns is None:
+            return None
+        sources = cls.Meta.registration_sources
+        fields = cls(context={'request': request}).fields
+        return (
+            {'user'} | {f"user__{column}" for column in columns}
+            | {column for name in fields if name in sources for column in sources[name]}
+        )
+
+    def to_representation(self, registration):
+        user = registration.user
+        user.registration = registration
+        return super().to_representation(user)
+
 
 class PasswordResetSerializer(serializers.Serializer):
     email = serializers.EmailField()
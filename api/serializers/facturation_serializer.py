@@ -1,4 +1,4 @@
-from backend.models.facturation import ExpenseCategory, Payment, PaymentTracking, SchoolExpense, SchoolInvoice
+from backend.models.facturation import ExpenseCategory, Payment, PaymentTracking, SchoolExpense, SchoolInvoice, payment_status_expression
 from rest_framework import serializers
 
 class SchoolInvoiceSerializer(serializers.ModelSerializer):
@@ -15,6 +15,8 @@ class SchoolInvoiceSerializer(serializers.ModelSerializer):
             'recurrence_period', 'is_active', 'late_fee', 'created_at', 'updated_at',
             'total_paid', 'remaining_amount', 'payment_status', 'late_fees'
         ]
+        # Lecture en masse (api.compiled_serializer) : get_payment_status calculé en SQL
+        compiled_expressions = {'payment_status': payment_status_expression}
 
 
 
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from api.sparse_fields import SparseFieldsetMixin
 from backend.models.account import User
 from backend.models.school_manager import School, SchoolGeneralConfig, UserRegistration, SchoolAbsence, SchoolYear, Classroom, StudentEvaluation
 
@@ -18,7 +19,7 @@ class ClassroomSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class InscriptionSerializer(serializers.ModelSerializer):
+class InscriptionSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     #student = PupilSerializer(read_only=True)
     class Meta:
         model = UserRegistration
@@ -60,7 +61,7 @@ class StudentEvaluationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("L'inscription doit être active pour enregistrer une évaluation.")
 
         # Vérifie que l'élève de l'inscription correspond à l'élève de l'évaluation
-        if inscription.student != student:
+        if inscription.user_id != student.pk:
             raise serializers.ValidationError("L'élève de l'évaluation doit correspondre à l'élève de l'inscription.")
 
         # Vérifie que l'année scolaire de l'inscription correspond à l'année scolaire de l'évaluation
@@ -76,7 +77,7 @@ class SchoolAbsenceSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())
     school = serializers.PrimaryKeyRelatedField(queryset=School.objects.all())
     school_year = serializers.PrimaryKeyRelatedField(queryset=SchoolYear.objects.all())
@@ -0,0 +1,80 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_fields(request):
+    """
+    Champs demandés par `?fields=` (ou None : tous) et champs retirés par
+    `?omit=`, en lecture uniquement : une écriture garde tous ses champs.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, frozenset()
+    params = getattr(request, 'query_params', request.GET)
+    fields = params.get('fields')
+    omit = params.get('omit')
+    return (
+        frozenset(name.strip() for name in fields.split(',') if name.strip()) if fields else None,
+        frozenset(name.strip() for name in omit.split(',') if name.strip()) if omit else frozenset(),
+    )
+
+
+class SparseFieldsetMixin:
+    """
+    Sérialiseur à champs choisis par le client : `?fields=id,lastname` ne
+    garde que ces champs, `?omit=photo,skype` les retire. Les champs des
+    méthodes (`SerializerMethodField`) ou propriétés qui lisent d'autres
+    colonnes déclarent ces colonnes dans `Meta.sparse_sources`. Le contexte
+    peut aussi fournir le couple (fields, omit) sous la clé `sparse_fields`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, omit = self.context.get('sparse_fields') or requested_fields(self.context.get('request'))
+        if fields is None and not omit:
+            return
+        for name in list(self.fields):
+            if (fields is not None and name not in fields) or name in omit:
+                self.fields.pop(name)
+
+    @classmethod
+    def sparse_columns(cls, request):
+        """
+        Colonnes du modèle lues par les champs demandés, pour `.only()` ; None
+        si aucun champ n'est choisi ou si une source n'est pas une colonne connue.
+        """
+        fields, omit = requested_fields(request)
+        if fields is None and not omit:
+            return None
+        model = cls.Meta.model
+        sources = getattr(cls.Meta, 'sparse_sources', {})
+        columns = {model._meta.pk.name}
+        for name, field in cls(context={'request': request}).fields.items():
+            if field.write_only:
+                continue
+            for source in sources.get(name, [field.source]):
+                try:
+                    model_field = model._meta.get_field(source.split('.')[0])
+                except FieldDoesNotExist:
+                    return None
+                if model_field.concrete and not model_field.many_to_many:
+                    columns.add(model_field.name)
+        return columns
+
+
+class SparseFieldsetViewMixin:
+    """
+    Applique les champs demandés à la requête SQL : le queryset de la vue ne
+    lit que les colonnes des champs sérialisés (`.only()`).
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'sparse_columns'):
+            return queryset
+        columns = serializer_class.sparse_columns(self.request)
+        if columns is None or queryset.query.select_related is True:
+            return queryset
+        # Les relations jointes (select_related) restent lisibles
+        columns |= set(queryset.query.select_related or ())
+        return queryset.only(*columns)
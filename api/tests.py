@@ -1,3 +1,343 @@
-from django.test import TestCase
+from base64 import b64encode
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from api.compiled_serializer import compiled_serializer
+from api.pagination import MAX_PAGE_SIZE, KeysetPagination, StandardPagination
+from api.serializers.facturation_serializer import SchoolInvoiceSerializer
+from api.serializers.school_manager_serializer import StudentEvaluationSerializer
+from api.views.account_view import UserViewSet
+from api.views.facturation_view import SchoolInvoiceViewSet
+from api.views.school_manager_view import InscriptionViewSet, SchoolYearViewSet, StudentEvaluationViewSet
+from backend.authentication.hashing import hash_pool
+from backend.authentication.tokens import tokens_for_user
+from backend.management.commands._benchmark import seed_school
+from backend.models import (
+    Classroom, Message, Payment, School, SchoolCycle, SchoolInvoice, SchoolLevel, SchoolYear, StudentEvaluation, Subject, SubjectGroup,
+    User, UserRegistration, UserRole,
+)
+from backend.monitoring.query_inspector import QueryBudgetExceeded
+from backend.tenant import set_request_school
+
+
+def create_school(name="École test"):
+    return School.objects.create(name=name, address="Centre-ville", city="Brazzaville")
+
+
+class ApiTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+        cls.user = User.objects.create_user(username="directeur", password="secret")
+
+    def setUp(self):
+        cache.clear()
+        access_token = tokens_for_user(self.user, self.school)['access_token']
+        self.headers = {'HTTP_AUTHORIZATION': f"Bearer {access_token}"}
+
+    def get(self, url, **params):
+        return self.client.get(url, params, **self.headers)
+
+
+@override_settings(QUERY_INSPECTOR_MODE='raise')
+class QueryBudgetTests(ApiTestCase):
+    url = '/api/admin&manager/account/view/academic-year-of-school/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for year in range(2020, 2026):
+            SchoolYear.objects.create(
+                school=cls.school, year=f"{year}-{year + 1}", start_date=f"{year}-09-01", end_date=f"{year + 1}-06-30",
+            )
+
+    def test_list_within_default_budget(self):
+        self.assertEqual(SchoolYearViewSet.query_budget, {'list': 5, 'retrieve': 5})
+        self.assertEqual(self.get(self.url).status_code, 200)
+
+    def test_exceeded_budget_raises(self):
+        with mock.patch.object(SchoolYearViewSet, 'query_budget', {'list': 1}), \
+                self.assertRaisesMessage(QueryBudgetExceeded, "SchoolYearViewSet (GET"):
+            self.get(self.url)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sender = User.objects.create_user(username="enseignant", password="secret")
+        cls.recipient = User.objects.create_user(username="parent", password="secret")
+        now = timezone.now()
+        # Groupes de messages de même date : le pk départage les égalités
+        for offset in (0, 0, 0, 1, 1, 1, 2):
+            message = Message.objects.create(content="Bonjour", sender=cls.sender, recipient=cls.recipient)
+            Message.objects.filter(pk=message.pk).update(date_created=now - timedelta(minutes=offset))
+        cls.expected = list(Message.objects.order_by('-date_created', '-pk').values_list('pk', flat=True))
+
+    def paginate(self, url):
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(Message.objects.filter(recipient=self.recipient), Request(RequestFactory().get(url)))
+        return [message.pk for message in page], paginator.get_next_link(), paginator.get_previous_link()
+
+    def test_next_and_previous_links_walk_tied_values(self):
+        pages, url = [], '/messages/?page_size=2'
+        while url:
+            page, url, previous = self.paginate(url)
+            pages.append((page, previous))
+        self.assertEqual([pk for page, _ in pages for pk in page], self.expected)
+        self.assertEqual(len(pages), 4)
+
+        # Retour en arrière depuis la dernière page : mêmes pages, en ordre inverse
+        page, previous = pages[-1]
+        walked_back = [page]
+        while previous:
+            page, _, previous = self.paginate(previous)
+            walked_back.append(page)
+        self.assertEqual(walked_back, [page for page, _ in reversed(pages)])
+
+    def test_invalid_cursor_is_not_found(self):
+        for position in ('abc:foo', '1:foo', 'abc', 'abc:2026-10-18 10:00:00+00:00'):
+            cursor = b64encode(urlencode({'p': position}).encode()).decode()
+            with self.subTest(position=position), self.assertRaises(NotFound):
+                self.paginate(f'/messages/?{urlencode({"cursor": cursor})}')
+
+
+class StandardPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        sender = User.objects.create_user(username="enseignant", password="secret")
+        recipient = User.objects.create_user(username="parent", password="secret")
+        Message.objects.bulk_create([Message(content=f"Message {i}", sender=sender, recipient=recipient) for i in range(MAX_PAGE_SIZE + 5)])
+        cls.expected = list(Message.objects.order_by('pk').values_list('pk', flat=True))
+
+    def paginate(self, **params):
+        paginator = StandardPagination()
+        request = Request(RequestFactory().get('/messages/', params))
+        page = paginator.paginate_queryset(Message.objects.order_by('pk'), request)
+        return [message.pk for message in page], paginator.get_paginated_response([]).data
+
+    def test_page_number_by_default(self):
+        page, data = self.paginate(page=2, page_size=10)
+        self.assertEqual(page, self.expected[10:20])
+        self.assertEqual(data['count'], len(self.expected))
+        self.assertIn('page=3', data['next'])
+
+    def test_limit_offset_when_requested(self):
+        page, data = self.paginate(limit=10, offset=195)
+        self.assertEqual(page, self.expected[195:205])
+        self.assertIsNone(data['next'])
+        self.assertIn('offset=185', data['previous'])
+
+    def test_page_size_is_capped(self):
+        self.assertEqual(MAX_PAGE_SIZE, 200)
+        self.assertEqual(len(self.paginate(page_size=1000)[0]), MAX_PAGE_SIZE)
+        self.assertEqual(len(self.paginate(limit=1000)[0]), MAX_PAGE_SIZE)
+        self.assertEqual(len(self.paginate()[0]), 50)
+
+
+class SparseFieldsetTests(ApiTestCase):
+    url = '/api/admin&manager/account/view/students-of-school/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.school_year = SchoolYear.objects.create(
+            school=cls.school, year="2026-2027", is_current_year=True, start_date="2026-09-01", end_date="2027-06-30",
+        )
+        cls.pupil = User.objects.create(username="eleve", lastname="Mabiala", skype="mabiala.skype", school=cls.school)
+        cls.pupil.roles.add(UserRole.objects.create(name="Élève"))
+        level = SchoolLevel.objects.create(name="CP1", cycle=SchoolCycle.objects.create(name="Primaire"))
+        classroom = Classroom.objects.create(school=cls.school, name="CP1 A", school_level=level)
+        cls.registration = UserRegistration.objects.create(
+            user=cls.pupil, school=cls.school, school_year=cls.school_year, classroom=classroom,
+        )
+
+    def test_school_members_read_requested_user_columns_only(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(self.url, fields='id,lastname,classroom_name')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'], [{'id': self.pupil.pk, 'lastname': "Mabiala", 'classroom_name': "CP1 A"}])
+        page_sql = next(query['sql'] for query in queries if query['sql'].startswith('SELECT "backend_userregistration"."id"'))
+        self.assertIn('"lastname"', page_sql)
+        self.assertNotIn('"skype"', page_sql)
+        self.assertNotIn('"frequency_of_attendance"', page_sql)
+
+    def test_school_member_retrieve_keeps_registration_fields(self):
+        response = self.get(f"{self.url}{self.pupil.pk}/", fields='registration,school_year')
+        self.assertEqual(response.json(), {'registration': self.registration.pk, 'school_year': self.school_year.pk})
+
+    def user_view(self, school, **params):
+        request = Request(RequestFactory().get('/', params))
+        set_request_school(request, school)
+        return UserViewSet(request=request, format_kwarg=None)
+
+    def test_user_list_reads_requested_columns_only(self):
+        view = self.user_view(self.school, fields='id,lastname,role_name')
+        users = view.filter_queryset(view.get_queryset())
+        self.assertEqual(users.query.deferred_loading, ({'id', 'lastname'}, False))
+        self.assertEqual(view.get_serializer(users.get(pk=self.pupil.pk)).data, {'id': self.pupil.pk, 'lastname': "Mabiala", 'role_name': "Élève"})
+
+    def test_user_list_is_scoped_to_the_school(self):
+        other = User.objects.create(username="autre", school=create_school("Autre école"))
+        self.assertEqual(list(self.user_view(self.school).get_queryset()), [self.pupil])
+        self.assertEqual(list(self.user_view(other.school).get_queryset()), [other])
+
+
+class CompiledListTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        school_year = SchoolYear.objects.create(
+            school=cls.school, year="2026-2027", is_current_year=True, start_date="2026-09-01", end_date="2027-06-30",
+        )
+        level = SchoolLevel.objects.create(name="CP1", cycle=SchoolCycle.objects.create(name="Primaire"))
+        cls.classroom = Classroom.objects.create(school=cls.school, name="CP1 A", school_level=level)
+        cls.pupil = User.objects.create(username="eleve", lastname="Mabiala")
+        cls.registration = UserRegistration.objects.create(
+            user=cls.pupil, school=cls.school, school_year=school_year, classroom=cls.classroom,
+        )
+        cls.registration.children.add(cls.pupil)
+        # Factures non payée, partiellement payée et entièrement payée
+        for paid in (None, '20000.00', '50000.00'):
+            invoice = SchoolInvoice.objects.create(
+                student=cls.pupil, school=cls.school, classroom=cls.classroom, date="2026-10-01", due_date="2026-10-31",
+                amount='50000.00', schooling_of=SchoolInvoice._meta.get_field('schooling_of').choices[0][0],
+                invoice_status='Non payé', late_fee='1500.50',
+            )
+            if paid:
+                Payment.objects.create(invoice=invoice, amount=paid, payment_method="Espèces", is_paid=True)
+        cls.unpaid_invoice = SchoolInvoice.objects.order_by('pk').first()
+        subject = Subject.objects.create(school=cls.school, name="Mathématiques", group=SubjectGroup.objects.create(name="Sciences"))
+        # Évaluation notée avec remarque, puis évaluation sans note
+        for day, score, remarks in ((15, 12.5, "Bon travail"), (16, None, None)):
+            cls.evaluation = StudentEvaluation.objects.create(
+                student=cls.pupil, inscription=cls.registration, school_year=school_year, subject=subject,
+                evaluation_date=f"2026-10-{day}", score=score, remarks=remarks,
+            )
+
+    def test_compiled_invoices_render_the_serializer_json(self):
+        invoices = SchoolInvoice.objects.for_school(self.school).order_by('pk')
+        compiled = compiled_serializer(SchoolInvoiceSerializer)
+        self.assertIsNotNone(compiled)
+        expected = SchoolInvoiceSerializer(invoices, many=True).data
+        self.assertEqual(
+            [status['payment_status'] for status in expected], ['Non payé', 'Partiellement payé', 'Entièrement payé'],
+        )
+        self.assertEqual(JSONRenderer().render(compiled.serialize(compiled.values(invoices))), JSONRenderer().render(expected))
+
+    def test_compiled_evaluations_render_the_serializer_json(self):
+        evaluations = StudentEvaluation.objects.for_school(self.school).order_by('pk')
+        compiled = compiled_serializer(StudentEvaluationSerializer)
+        self.assertIsNotNone(compiled)
+        expected = JSONRenderer().render(StudentEvaluationSerializer(evaluations, many=True).data)
+        self.assertEqual(JSONRenderer().render(compiled.serialize(compiled.values(evaluations))), expected)
+
+    @override_settings(QUERY_INSPECTOR_MODE='raise')
+    def test_list_and_retrieve_within_query_budget(self):
+        for viewset, url, pk in (
+            (SchoolInvoiceViewSet, '/api/admin&manager/account/view/school-invoices/', self.unpaid_invoice.pk),
+            (InscriptionViewSet, '/api/admin&manager/account/view/inscription-of-students/', self.registration.pk),
+            (StudentEvaluationViewSet, '/api/admin&manager/account/view/students-evaluation/', self.evaluation.pk),
+        ):
+            for path in (url, f"{url}{pk}/"):
+                with self.subTest(viewset=viewset.__name__, path=path):
+                    # Cache vide : l'utilisateur et l'école sont relus, comme à la première requête
+                    cache.clear()
+                    self.assertEqual(self.get(path).status_code, 200)
+
+
+class MetricsViewTests(TestCase):
+    def get(self, **headers):
+        return self.client.get('/metrics', REMOTE_ADDR='127.0.0.1', **headers)
+
+    @override_settings(METRICS_TOKEN='secret', DEBUG=False)
+    def test_token_is_required(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(HTTP_AUTHORIZATION="Bearer secret").status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=False)
+    def test_local_access_without_token_is_refused_outside_debug(self):
+        self.assertEqual(self.get().status_code, 403)
+
+    @override_settings(METRICS_TOKEN=None, DEBUG=True, TRUSTED_PROXY_COUNT=1)
+    def test_local_access_checks_the_client_behind_the_proxy(self):
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.get(HTTP_X_FORWARDED_FOR='41.202.1.7').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_writer_totals_are_exported_as_counters(self):
+        body = self.get(HTTP_AUTHORIZATION="Bearer secret").content.decode()
+        self.assertIn("# TYPE elimu_access_log_flushed_total counter", body)
+        self.assertIn("# TYPE elimu_login_hash_rejected_total counter", body)
+        self.assertIn("# TYPE elimu_access_log_queue_depth gauge", body)
+        self.assertNotIn("# TYPE elimu_access_log_flushed gauge", body)
+
+
+class SchoolStatisticsTests(ApiTestCase):
+    url = '/api/admin&manager/account/view/school-statistics/statistics/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeded = seed_school("stats", pupils=6, classrooms=2, subjects=1, evaluations_per_pupil=0)
+        cls.school = cls.seeded.school
+        cls.user = cls.seeded.teachers[0]
+        # Élève inscrit sans classe et inscription d'une autre école : hors des totaux
+        UserRegistration.objects.filter(user=cls.seeded.pupils[0]).update(classroom=None)
+        seed_school("autre", pupils=2, classrooms=1, subjects=1, evaluations_per_pupil=0)
+
+    def test_counts_members_by_role_code(self):
+        response = self.get(self.url)
+        self.assertEqual(response.json(), {
+            'total_teachers': len(self.seeded.teachers), 'total_pupils': 5, 'total_parents': len(self.seeded.parents),
+        })
+
+    def test_explain_endpoints_covers_the_statistics_queries(self):
+        out = StringIO()
+        call_command('explain_endpoints', school=self.school.pk, user=self.user.pk, verbose_plan=True, stdout=out)
+        for name in ("active-students-of-school", "school-statistics (enseignants)", "school-statistics (élèves)"):
+            self.assertIn(name, out.getvalue())
+
+
+class AsyncLoginTests(TestCase):
+    url = '/api/auth/login/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+        cls.user = User.objects.create(username="directeur", school=cls.school)
+        cls.user.set_password("secret")
+        cls.user.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, password="secret"):
+        return self.client.post(
+            self.url, {'username': "directeur", 'password': password, 'school_code': self.school.code}, content_type='application/json',
+        )
+
+    def test_login_returns_tokens(self):
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access_token', response.json())
+        self.assertEqual(self.login("mauvais").status_code, 400)
+
+    def test_saturated_hash_pool_answers_503(self):
+        rejected = hash_pool.snapshot()['rejected']
+        with mock.patch.object(hash_pool, 'max_pending', 0), self.assertLogs('backend.authentication.hashing', 'WARNING'):
+            response = self.login()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(hash_pool.snapshot()['rejected'], rejected + 1)
+        self.assertEqual(hash_pool.snapshot()['queue_depth'], 0)
@@ -2,6 +2,7 @@ from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 from api.views.account_view import CurrentUserViewSet, ParentsViewSet, PasswordResetConfirmView, PasswordResetView, PupilsViewSet, TeachersViewSet, UserViewSet
 from api.views.auth.authentication_api import LoginViewSet, LogoutAPIView
+from api.views.auth.async_login_api import LoginHashMetricsAPIView, async_login
 from rest_framework.routers import DefaultRouter
 from api.views.communication_view import AnnouncementViewSet, EventViewSet, InformationViewSet, MessageViewSet, TagViewSet
 from api.views.facturation_view import ExpenseCategoryViewSet, SchoolExpenseViewSet, SchoolInvoiceViewSet, SchoolPaymentTrackingViewSet
@@ -54,6 +55,8 @@ router.register(r'auth', LoginViewSet, basename='auth')
 
 urlpatterns = [
     path('admin&manager/account/view/', include(router.urls)),
+    path('auth/login/', async_login, name='auth_async_login'),
+    path('auth/login/metrics/', LoginHashMetricsAPIView.as_view(), name='auth_login_metrics'),
     path('auth/logout/', LogoutAPIView.as_view(), name='auth_logout'),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
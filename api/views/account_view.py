@@ -2,14 +2,19 @@ from rest_framework import viewsets, permissions
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from api.pagination import paginated_response
+from api.sparse_fields import SparseFieldsetViewMixin
 from api.serializers.school_manager_serializer import UserRegistrationSerializer
 from backend.constant import get_user_school
-from backend.models.account import User
-from api.serializers.account_serializer import PasswordResetConfirmSerializer, PasswordResetSerializer,  UserRoleSerializer, UserSerializer
+from backend.models.account import User, role_exists
+from api.serializers.account_serializer import PasswordResetConfirmSerializer, PasswordResetSerializer, SchoolMemberSerializer, UserRoleSerializer, UserSerializer
 from rest_framework import status, views
 
-from backend.models.school_manager import Classroom, SchoolYear, UserRegistration
+from backend.models.school_manager import Classroom, UserRegistration
+from backend.tenant import get_current_school_year
+from backend.monitoring.query_inspector import QueryBudgetMixin
 from backend.permissions.permission_app import IsManager, IsDirector
 
 User = get_user_model()
@@ -18,10 +23,18 @@ class UserRoleViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = UserRoleSerializer
     permission_classes = [permissions.IsAuthenticated] 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated, IsManager,IsDirector]
 
+    def get_queryset(self):
+        # Utilisateurs de l'école de l'utilisateur connecté uniquement
+        return User.objects.filter(school=get_user_school(self.request)).prefetch_related('roles')
+
+    def perform_create(self, serializer):
+        # Rattacher le nouvel utilisateur à l'école de l'utilisateur connecté
+        serializer.save(school=get_user_school(self.request))
+
 
 
 class CurrentUserViewSet(viewsets.ViewSet):
@@ -31,8 +44,9 @@ class CurrentUserViewSet(viewsets.ViewSet):
         """
         Retourne les informations de l'utilisateur connecté.
         """
-        user = request.user
-        serializer = UserSerializer(user)
+        # L'utilisateur authentifié (cache du JWT) ne porte que quelques champs : lecture complète, rôles compris
+        user = User.objects.prefetch_related('roles').get(pk=request.user.pk)
+        serializer = UserSerializer(user, context={'request': request})
         return Response(serializer.data)
 
 
@@ -60,97 +74,57 @@ class PasswordResetConfirmView(views.APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class PupilsViewSet(viewsets.ViewSet):
+class SchoolMembersViewSet(QueryBudgetMixin, SparseFieldsetViewMixin, viewsets.GenericViewSet):
     """
-    ViewSet pour gérer la liste et les détails des élèves d'une école.
+    Membres de l'école de l'utilisateur connecté ayant le rôle `role_code` :
+    une entrée par inscription, paginée, en un nombre constant de requêtes.
     """
     permission_classes = [permissions.IsAuthenticated]
-    serializer_class = UserSerializer
+    serializer_class = SchoolMemberSerializer
+    role_code = None
+    # Page de la liste : une requête de plus pour précharger les rôles des membres
+    query_budget = {**QueryBudgetMixin.query_budget, 'list': 6}
+
+    def get_queryset(self):
+        return (
+            UserRegistration.objects.for_school(get_user_school(self.request))
+            .filter(role_exists(self.role_code, 'user_id'))
+            .select_related('user', 'classroom', 'school_year')
+            .prefetch_related('user__roles')
+            .order_by('pk')
+        )
 
     def list(self, request):
-        """
-        Récupérer la liste des élèves de l'école de l'utilisateur connecté.
-        """
-        school = request.session.get('school')  # Récupérer l'école en session
-        pupils = UserRegistration.objects.filter(
-            school=school,
-            user__roles__name__iexact="Élève"
-        )
-        serializer = UserSerializer(pupils, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, self.filter_queryset(self.get_queryset()))
 
     def retrieve(self, request, pk=None):
-        """
-        Récupérer les détails d'un élève spécifique.
-        """
-        school = request.session.get('school')
-        pupil = get_object_or_404(
-            UserRegistration, school=school, user__id=pk, user__roles__name__iexact="Élève"
-        )
-        serializer = UserSerializer(pupil)
+        """ Dernière inscription du membre dans l'école """
+        registration = self.filter_queryset(self.get_queryset()).filter(user_id=pk).order_by('-pk').first()
+        if registration is None:
+            raise Http404
+        serializer = self.get_serializer(registration)
         return Response(serializer.data)
 
 
+class PupilsViewSet(SchoolMembersViewSet):
+    """
+    ViewSet pour gérer la liste et les détails des élèves d'une école.
+    """
+    role_code = 'pupil'
+
 
-class ParentsViewSet(viewsets.ViewSet):
+class ParentsViewSet(SchoolMembersViewSet):
     """
     ViewSet pour gérer la liste et les détails des parents d'une école.
     """
-    permission_classes = [permissions.IsAuthenticated]
-    serializer_class = UserSerializer
-    
-    def list(self, request):
-        """
-        Récupérer la liste des parents de l'école de l'utilisateur connecté.
-        """
-        school = request.session.get('school')  # Récupérer l'école en session
-        parents = UserRegistration.objects.filter(
-            school=school,
-            user__roles__name__iexact="Parent"
-        )
-        serializer = UserSerializer(parents, many=True)
-        return Response(serializer.data)
-    
-    def retrieve(self, request, pk=None):
-        """
-        Récupérer les détails d'un parent spécifique.
-        """
-        school = request.session.get('school')
-        parent = get_object_or_404(
-            UserRegistration, school=school, user__id=pk, user__roles__name__iexact="Parent"
-        )
-        serializer = UserSerializer(parent)
-        return Response(serializer.data)
+    role_code = 'parent'
 
 
-class TeachersViewSet(viewsets.ViewSet):
+class TeachersViewSet(SchoolMembersViewSet):
     """
     ViewSet pour gérer la liste et les détails des enseignants d'une école.
     """
-    permission_classes = [permissions.IsAuthenticated]
-    
-    def list(self, request):
-        """
-        Récupérer la liste des enseignants de l'école de l'utilisateur connecté.
-        """
-        school = request.session.get('school')  # Récupérer l'école en session
-        teachers = UserRegistration.objects.filter(
-            school=school,
-            user__roles__name__iexact="Enseignant"
-        )
-        serializer = UserSerializer(teachers, many=True)
-        return Response(serializer.data)
-    
-    def retrieve(self, request, pk=None):
-        """
-        Récupérer les détails d'un enseignant spécifique.
-        """
-        school = request.session.get('school')
-        teacher = get_object_or_404(
-            UserRegistration, school=school, user__id=pk, user__roles__name__iexact="Enseignant"
-        )
-        serializer = UserSerializer(teacher)
-        return Response(serializer.data)
+    role_code = 'teacher'
 
 
 class RegistrationPupilByMatricule(views.APIView):
@@ -163,10 +137,7 @@ class RegistrationPupilByMatricule(views.APIView):
         """
         Créer un élève à partir de son matricule et l'affecter à une classe.
         """
-        school = request.session.get('school')
-        
-        if not school:
-            return Response({"detail": "Aucune école associée à la session."}, status=status.HTTP_400_BAD_REQUEST)
+        school = get_user_school(request)
 
         # Récupération de l'utilisateur ou renvoi d'une erreur 404
         user = get_object_or_404(User, matricule=matricule)
@@ -179,7 +150,7 @@ class RegistrationPupilByMatricule(views.APIView):
         classroom = get_object_or_404(Classroom, id=classroom_id)
 
         # Récupération de l'année scolaire actuelle
-        academic_year = SchoolYear.objects.filter(school=school, is_current_year=True).first()
+        academic_year = get_current_school_year(school)
         if not academic_year:
             return Response({"detail": "Aucune année scolaire active trouvée."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -206,10 +177,7 @@ class RegistrationParentByMatricul(views.APIView):
         """
         Créer un parent à partir de son matricule et l'affecter à une classe.
         """
-        school = request.session.get('school')
-        
-        if not school:
-            return Response({"detail": "Aucune école associée à la session."}, status=status.HTTP_400_BAD_REQUEST)
+        school = get_user_school(request)
 
         # Récupération de l'utilisateur ou renvoi d'une erreur 404
         user = get_object_or_404(User, matricule=matricule)
@@ -219,7 +187,7 @@ class RegistrationParentByMatricul(views.APIView):
             return Response({"detail": "L'utilisateur n'est pas un parent."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Récupération de l'année scolaire actuelle
-        academic_year = SchoolYear.objects.filter(school=school, is_current_year=True).first()
+        academic_year = get_current_school_year(school)
         if not academic_year:
             return Response({"detail": "Aucune année scolaire active trouvée."}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -246,10 +214,7 @@ class RegistrationTeacherByMatricul(views.APIView):
         """
         Créer un enseigant à partir de son matricule et l'affecter à une classe.
         """
-        school = request.session.get('school')
-        
-        if not school:
-            return Response({"detail": "Aucune école associée à la session."}, status=status.HTTP_400_BAD_REQUEST)
+        school = get_user_school(request)
 
         # Récupération de l'utilisateur ou renvoi d'une erreur 404
         user = get_object_or_404(User, matricule=matricule)
@@ -0,0 +1,82 @@
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework import generics, status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from api.views.auth.authentication_api import get_tokens_for_user
+from backend.authentication.hashing import HashPoolSaturated, hash_pool
+from backend.authentication.login import LoginFailed, accept_login, reject_login, resolve_login_user
+
+
+def _rehash_password(user, password):
+    user.set_password(password)
+    user.save(update_fields=['password'])
+
+
+def _read_credentials(request):
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            data = {}
+        return data if isinstance(data, dict) else {}
+    return request.POST
+
+
+@csrf_exempt
+@require_POST
+async def async_login(request):
+    """
+    Connexion asynchrone : les accès base passent par `sync_to_async` et la
+    vérification du mot de passe par le pool de hachage borné, de sorte que
+    la boucle d'événements continue de servir les autres requêtes.
+    """
+    data = _read_credentials(request)
+    username = data.get('username')
+    password = data.get('password')
+    code = data.get('school_code')
+
+    try:
+        school, user = await sync_to_async(resolve_login_user)(username, code)
+
+        if not user.is_active:
+            await sync_to_async(reject_login)(request, user)
+        try:
+            is_correct, must_update = await hash_pool.verify(password, user.password)
+        except HashPoolSaturated:
+            response = JsonResponse(
+                {"errors": "Trop de connexions simultanées. Réessayez dans quelques instants."},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+            response['Retry-After'] = '1'
+            return response
+        if not is_correct:
+            await sync_to_async(reject_login)(request, user)
+        if must_update:
+            await sync_to_async(_rehash_password)(user, password)
+
+        await sync_to_async(accept_login)(request, user)
+    except LoginFailed as exc:
+        return JsonResponse({"errors": exc.message}, status=exc.status_code)
+
+    token = await sync_to_async(get_tokens_for_user)(user, school)
+    return JsonResponse(token, status=status.HTTP_200_OK)
+
+
+class LoginHashMetricsAPIView(generics.GenericAPIView):
+    """
+    Métriques du pool de hachage des mots de passe du processus :
+    profondeur de file, refus et temps de hachage.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get_serializer_class(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        return Response(hash_pool.snapshot())
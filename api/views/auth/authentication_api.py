@@ -2,22 +2,17 @@ import logging
 from rest_framework.response import Response
 from rest_framework import status, generics, viewsets
 from rest_framework.decorators import action
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.permissions import IsAuthenticated
-from django.contrib.auth import authenticate, login, logout
-from api.serializers.school_manager_serializer import SchoolSerializer
-from backend.models.account import User
-from backend.models.school_manager import School, SchoolYear, UserRegistration
+from django.contrib.auth import logout
+from backend.authentication.blacklist import BlacklistRefreshToken
+from backend.authentication.tokens import tokens_for_user
+from backend.authentication.login import LoginFailed, authenticate_login
 from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 logger = logging.getLogger(__name__)
 
 def get_tokens_for_user(user, school):
-    refresh = RefreshToken.for_user(user)
-    refresh['school'] = SchoolSerializer(school).data
-    return {
-        'refresh_token': str(refresh),
-        'access_token': str(refresh.access_token),
-    }
+    # Claims compacts : identifiant et version de l'école, codes des rôles
+    return tokens_for_user(user, school)
 
 
 
@@ -32,32 +27,14 @@ class LoginViewSet(viewsets.ViewSet):
         password = request.data.get('password')
         code = request.data.get('school_code')
 
-        # Vérifier l'existence de l'école
-        school = School.objects.filter(code=code).first()
-        if not school:
-            return Response({"errors": "Aucun établissement ne correspond à ce code"}, status=status.HTTP_404_NOT_FOUND)
-
-        # Vérifier l'existence de l'utilisateur lié à l'école
-        user = User.objects.filter(username=username, school=school).first()
-
-        if not user:
-            current_academic_year = SchoolYear.objects.filter(is_current_year=True, school=school).first()
-            user_request = User.objects.filter(username=username).first()
-            user = UserRegistration.objects.filter(school=school, school_year=current_academic_year, user=user_request).first()
-
-        if not user:
-            return Response({"errors": "Aucun utilisateur ne correspond à cet établissement"}, status=status.HTTP_404_NOT_FOUND)
-
-        # Authentifier l'utilisateur avec son mot de passe
-        user = authenticate(request, username=user.username, password=password)
-
-        if user is not None:
-            # Connexion et génération du token
-            login(request, user)
-            token = get_tokens_for_user(user, school)
-            return Response(token, status=status.HTTP_200_OK)
+        # École et utilisateur résolus en une requête au plus, sans session
+        try:
+            school, user = authenticate_login(request, username, password, code)
+        except LoginFailed as exc:
+            return Response({"errors": exc.message}, status=exc.status_code)
 
-        return Response({"errors": "Nom d'utilisateur ou mot de passe incorrect !"}, status=status.HTTP_400_BAD_REQUEST)
+        token = get_tokens_for_user(user, school)
+        return Response(token, status=status.HTTP_200_OK)
 
 
 
@@ -76,7 +53,7 @@ class LogoutAPIView(generics.GenericAPIView):
     def post(self, request, *args, **kwargs):
         try:
             refresh_token = request.data["refresh_token"]
-            token = RefreshToken(refresh_token)
+            token = BlacklistRefreshToken(refresh_token)
             token.blacklist()
             logout(request)
             return Response(status=status.HTTP_205_RESET_CONTENT)
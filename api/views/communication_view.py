@@ -2,6 +2,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from api.pagination import KeysetPagination, paginated_response
 from api.serializers.communication_serializer import AnnouncementSerializer, CreateMessageSerializer, EventSerializer, InformationSerializer, MessageSerializer, ReplyMessageSerializer, TagSerializer
 from backend.constant import get_user_school
 from backend.models.admin_manager import Tag
@@ -54,6 +55,7 @@ class InformationViewSet(viewsets.ModelViewSet):
             Returns a response with an error message if the user does not have permission.
     """
     serializer_class = InformationSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated,]
     search_fields = ['name']
     ordering_fields = ['name']
@@ -61,7 +63,7 @@ class InformationViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Filtrer les informations par l'école de l'utilisateur connecté
-        return Information.objects.filter(school=get_user_school(self.request))
+        return Information.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         school = get_user_school(self.request)
@@ -106,13 +108,14 @@ class EventViewSet(viewsets.ModelViewSet):
             Deletes an event if it belongs to the school of the authenticated user. Returns a 403 response if the user tries to delete an event from a different school.
     """
     serializer_class = EventSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['name']
     ordering_fields = ['name']
     
     def get_queryset(self):
         # Filtrer les événements par l'école de l'utilisateur connecté
-        return Event.objects.filter(school=get_user_school(self.request))
+        return Event.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         # Associer l'événement à l'école de l'utilisateur connecté
@@ -162,13 +165,14 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
             Returns a 403 Forbidden response if the user tries to delete an Announcement from a different school.
     """
     serializer_class = AnnouncementSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     search_fields = ['title']
     ordering_fields = ['title']
     
     def get_queryset(self):
         # Filtrer les annonces par l'école de l'utilisateur connecté
-        return Announcement.objects.filter(school=get_user_school(self.request))
+        return Announcement.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         # Associer l'annonce à l'école de l'utilisateur connecté
@@ -223,6 +227,7 @@ class MessageViewSet(viewsets.ModelViewSet):
             Deletes a message.
     """
     queryset = Message.objects.all()
+    pagination_class = KeysetPagination
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -267,8 +272,7 @@ class MessageViewSet(viewsets.ModelViewSet):
         """Récupère toutes les réponses associées à ce message."""
         message = self.get_object()
         replies = message.get_replies()
-        serializer = MessageSerializer(replies, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginated_response(self, replies, MessageSerializer)
 
     @action(detail=True, methods=['delete'])
     def delete_message(self, request, pk=None):
@@ -4,8 +4,11 @@ from rest_framework.response import Response
 from django.db.models import Sum
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from api.compiled_serializer import CompiledListMixin
+from api.pagination import KeysetPagination, paginated_response
 from api.serializers.facturation_serializer import ExpenseCategorySerializer, PaymentTrackingSerializer, SchoolExpenseSerializer, SchoolInvoiceSerializer
 from backend.constant import get_user_school
+from backend.monitoring.query_inspector import QueryBudgetMixin
 from backend.models.facturation import ExpenseCategory, PaymentTracking, SchoolExpense, SchoolInvoice
 from backend.permissions.permission_app import IsDirector, IsManager
 
@@ -25,21 +28,22 @@ class SchoolPaymentTrackingViewSet(viewsets.ReadOnlyModelViewSet):
         user = self.request.user
         if user.is_admin:
             return PaymentTracking.objects.all()  # Les administrateurs peuvent voir tous les suivis
-        elif user.role.name == 'Gestionnaire' or user.role.name == 'Directeur':
+        elif user.has_role('manager') or user.has_role('director'):
             # Pour les parents ou élèves, filtrer les paiements liés à leurs factures
-            return PaymentTracking.objects.filter(payment__invoice__school=user.school_code)
+            return PaymentTracking.objects.filter(payment__school=get_user_school(self.request))
 
 
 
 
 
-class SchoolInvoiceViewSet(viewsets.ModelViewSet):
+class SchoolInvoiceViewSet(QueryBudgetMixin, CompiledListMixin, viewsets.ModelViewSet):
     serializer_class = SchoolInvoiceSerializer
+    pagination_class = KeysetPagination
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         """Récupère toutes les factures de l'école de l'utilisateur connecté (ou un filtre personnalisé)."""
-        return SchoolInvoice.objects.filter(school=get_user_school(self.request))
+        return SchoolInvoice.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         """Créer une nouvelle facture avec les informations fournies par l'utilisateur."""
@@ -110,7 +114,7 @@ class SchoolExpenseViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Récupère les frais de scolarité de l'école de l'utilisateur connecté (ou un filtre personnalisé)."""
-        return SchoolExpense.objects.filter(school=get_user_school(self.request))
+        return SchoolExpense.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         """Ajouter l'école de l'utilisateur connecté à la frais de scolarité."""
@@ -139,7 +143,7 @@ class SchoolExpenseViewSet(viewsets.ModelViewSet):
         start_date = request.query_params.get('start_date', None)
         end_date = request.query_params.get('end_date', None)
 
-        expenses = SchoolExpense.objects.filter(school=school)
+        expenses = SchoolExpense.objects.for_school(school)
 
         # Filtrer par date si spécifié
         if start_date:
@@ -147,8 +151,7 @@ class SchoolExpenseViewSet(viewsets.ModelViewSet):
         if end_date:
             expenses = expenses.filter(date__lte=datetime.strptime(end_date, '%Y-%m-%d'))
 
-        serializer = self.get_serializer(expenses, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, expenses)
 
     # Action pour le suivi global des dépenses
     @action(detail=False, methods=['get'], url_path='total-expenses')
@@ -157,7 +160,7 @@ class SchoolExpenseViewSet(viewsets.ModelViewSet):
         start_date = request.query_params.get('start_date', None)
         end_date = request.query_params.get('end_date', None)
 
-        expenses = SchoolExpense.objects.filter(school=school)
+        expenses = SchoolExpense.objects.for_school(school)
 
         # Filtrer par date si spécifié
         if start_date:
@@ -30,7 +30,7 @@ class EbookViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Filtrer les livres par l'école de l'utilisateur connecté
-        return Ebook.objects.filter(school=get_user_school(self.request))
+        return Ebook.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         # Associer le livre à l'école de l'utilisateur connecté
@@ -83,7 +83,7 @@ class SchoolMaterialViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         # Filtrer les matériels par l'école de l'utilisateur connecté
-        return SchoolMaterial.objects.filter(school=get_user_school(self.request))
+        return SchoolMaterial.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         # Associer le matériel à l'école de l'utilisateur connecté
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from backend.authentication.rate_limit import get_client_ip
+from backend.monitoring.metrics import registry
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Export Prometheus des histogrammes par route, des jauges et des compteurs
+    internes, agrégés sur tous les workers. Accès par jeton (`METRICS_TOKEN`) ;
+    sans jeton, en DEBUG uniquement et depuis les adresses de
+    `METRICS_ALLOWED_IPS` (IP du client résolue derrière les proxys).
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        if request.META.get('HTTP_AUTHORIZATION') != f"Bearer {token}":
+            return HttpResponseForbidden()
+    elif not settings.DEBUG or get_client_ip(request) not in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1')):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,14 +1,24 @@
-from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from backend.constant import get_user_school
+from backend.tenant import get_current_school_year
+from backend.monitoring.query_inspector import QueryBudgetMixin
+from backend.models.account import User, role_exists
 from backend.models.school_manager import SchoolGeneralConfig, UserRegistration, SchoolAbsence, SchoolYear, Classroom, StudentEvaluation
 from api.serializers.school_manager_serializer import InscriptionSerializer, SchoolAbsenceSerializer, SchoolGeneralConfigSerializer, SchoolYearSerializer, ClassroomSerializer, StudentEvaluationSerializer
 from backend.permissions.permission_app import IsDirector, IsManager
 from rest_framework.decorators import action
+from api.compiled_serializer import CompiledListMixin, compiled_list_response
+from api.sparse_fields import SparseFieldsetViewMixin
 
 
 
+def children_ids():
+    """ Enfants des inscriptions (liste d'identifiants sérialisée) : une requête par page au lieu d'une par inscription """
+    return Prefetch('children', queryset=User.objects.only('pk'))
+
+
 class SchoolStatisticsViewSet(viewsets.ViewSet):
     """
     ViewSet qui renvoie les statistiques de l'école pour les enseignants, élèves inscrits et parents des élèves inscrits.
@@ -22,19 +32,19 @@ class SchoolStatisticsViewSet(viewsets.ViewSet):
         school = get_user_school(request)
         
         # Nombre total des enseignants dans l'école de l'utilisateur connecté
-        total_teachers = UserRegistration.objects.filter(school=school, user__roles__name__iexact="Enseignant").count()
+        total_teachers = UserRegistration.objects.for_school(school).filter(role_exists('teacher', 'user_id')).count()
         
         # Nombre total des élèves inscrits dans l'année scolaire active
-        total_pupils = UserRegistration.objects.filter(
-            school=school,
-            classroom__school=school,
+        current_school_year = get_current_school_year(school)
+        total_pupils = UserRegistration.objects.for_school(school).filter(
+            role_exists('pupil', 'user_id'),
+            classroom__isnull=False,
             is_active=True,
-            school_year__is_current_year=True,
-            user__roles__name__iexact="Élève"
-        ).count()
+            school_year=current_school_year,
+        ).count() if current_school_year else 0
 
         # Récupérer tous les parents des élèves inscrits
-        total_parents = UserRegistration.objects.filter(school=school, user__roles__name__iexact="Parent").count()
+        total_parents = UserRegistration.objects.for_school(school).filter(role_exists('parent', 'user_id')).count()
 
         # Retourner les données dans la réponse
         return Response({
@@ -44,13 +54,13 @@ class SchoolStatisticsViewSet(viewsets.ViewSet):
         })
 
 
-class SchoolYearViewSet(viewsets.ModelViewSet):
+class SchoolYearViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = SchoolYearSerializer
 
     def get_queryset(self):
         # Filtrer les années scolaires de l'école de l'utilisateur connecté
-        return SchoolYear.objects.filter(school=get_user_school(self.request))
+        return SchoolYear.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         # Associer l'année scolaire à l'école de l'utilisateur connecté
@@ -69,7 +79,7 @@ class SchoolYearViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class ActiveSchoolYearViewSet(viewsets.ReadOnlyModelViewSet):
+class ActiveSchoolYearViewSet(QueryBudgetMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = SchoolYearSerializer
     permission_classes = [permissions.IsAuthenticated]  # Les utilisateurs doivent être authentifiés
 
@@ -77,28 +87,27 @@ class ActiveSchoolYearViewSet(viewsets.ReadOnlyModelViewSet):
         """
         Récupérer l'année scolaire active pour l'école de l'utilisateur connecté.
         """
-        school = get_user_school(self.request)
-        return get_object_or_404(SchoolYear, is_current_year=True, school=school)
+        return SchoolYear.objects.for_school(get_user_school(self.request)).filter(is_current_year=True)
 
     def list(self, request, *args, **kwargs):
         """
         Retourner les informations de l'année scolaire active de l'école de l'utilisateur connecté.
         Si aucune n'est active, retourner une réponse vide.
         """
-        queryset = self.get_queryset()
-        if not queryset.exists():
+        current_school_year = get_current_school_year(get_user_school(request))
+        if current_school_year is None:
             return Response({"detail": "Aucune année scolaire active trouvée pour cette école."}, status=404)
-        serializer = self.get_serializer(queryset.first())
+        serializer = self.get_serializer(current_school_year)
         return Response(serializer.data)
 
 
-class ClassroomViewSet(viewsets.ModelViewSet):
+class ClassroomViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ClassroomSerializer
 
     def get_queryset(self):
         # Filtrer les salles de classe par l'école de l'utilisateur connecté
-        return Classroom.objects.filter(school=get_user_school(self.request))
+        return Classroom.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         # Associer la salle de classe à l'école de l'utilisateur connecté
@@ -117,65 +126,61 @@ class ClassroomViewSet(viewsets.ModelViewSet):
         return super().destroy(request, *args, **kwargs)
 
 
-class InscriptionViewSet(viewsets.ModelViewSet):
+class InscriptionViewSet(QueryBudgetMixin, CompiledListMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = InscriptionSerializer
 
     def get_queryset(self):
-        return UserRegistration.objects.filter(classroom__school=get_user_school(self.request))
+        return UserRegistration.objects.for_school(get_user_school(self.request)).filter(classroom__isnull=False).prefetch_related(children_ids())
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.classroom.school != get_user_school(request):
+        if instance.school_id != get_user_school(request).id:
             return Response({"detail": "Vous ne pouvez pas modifier cette inscription."}, status=status.HTTP_403_FORBIDDEN)
         return super().update(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.classroom.school != get_user_school(request):
+        if instance.school_id != get_user_school(request).id:
             return Response({"detail": "Vous ne pouvez pas supprimer cette inscription."}, status=status.HTTP_403_FORBIDDEN)
         return super().destroy(request, *args, **kwargs)
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.classroom.school != get_user_school(request):
+        if instance.school_id != get_user_school(request).id:
             return Response({"detail": "Vous ne pouvez pas afficher cette inscription."}, status=status.HTTP_403_FORBIDDEN)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
 
-class StudentEvaluationViewSet(viewsets.ModelViewSet):
+class StudentEvaluationViewSet(QueryBudgetMixin, CompiledListMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = StudentEvaluationSerializer
 
     def get_queryset(self):
-        return StudentEvaluation.objects.filter(inscription__classroom__school=get_user_school(self.request))
+        return StudentEvaluation.objects.for_school(get_user_school(self.request))
 
 
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.inscription.classroom.school != get_user_school(request):
+        if instance.school_id != get_user_school(request).id:
             return Response({"detail": "Vous ne pouvez pas modifier cette évaluation."}, status=status.HTTP_403_FORBIDDEN)
         return super().update(request, *args, **kwargs)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        if instance.inscription.classroom.school != get_user_school(request):
+        if instance.school_id != get_user_school(request).id:
             return Response({"detail": "Vous ne pouvez pas supprimer cette évaluation."}, status=status.HTTP_403_FORBIDDEN)
         return super().destroy(request, *args, **kwargs)
 
 
 
-class ActiveSchoolYearStudentsViewSet(viewsets.ViewSet):
+class ActiveSchoolYearStudentsViewSet(SparseFieldsetViewMixin, viewsets.GenericViewSet):
     """
     ViewSet pour récupérer les élèves inscrits pendant l'année scolaire active de l'école de l'utilisateur connecté.
     """
     permission_classes = [permissions.IsAuthenticated]  # Exige que l'utilisateur soit authentifié
+    serializer_class = InscriptionSerializer
 
     @action(detail=False, methods=['get'], url_path='active-school-year-students')
     def get_active_school_year_students(self, request):
@@ -183,19 +188,15 @@ class ActiveSchoolYearStudentsViewSet(viewsets.ViewSet):
         school = get_user_school(request)
 
         # Récupérer l'année scolaire active de l'école
-        try:
-            active_school_year = SchoolYear.objects.get(is_current_year=True, school=school)
-        except SchoolYear.DoesNotExist:
+        active_school_year = get_current_school_year(school)
+        if active_school_year is None:
             return Response({"detail": "Aucune année scolaire active trouvée."}, status=status.HTTP_404_NOT_FOUND)
 
         # Récupérer les inscriptions des élèves pour l'année scolaire active
-        inscriptions = UserRegistration.objects.filter(school_year=active_school_year, classroom__school=school)
-
-        # Sérialiser les données des inscriptions
-        serializer = InscriptionSerializer(inscriptions, many=True)
+        inscriptions = UserRegistration.objects.for_school(school).filter(school_year=active_school_year, classroom__isnull=False).prefetch_related(children_ids())
 
-        # Renvoyer les informations des élèves inscrits
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Renvoyer les informations des élèves inscrits, page par page
+        return compiled_list_response(self, self.filter_queryset(inscriptions))
 
 
 
@@ -204,7 +205,7 @@ class SchoolAbsenceViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsManager, IsDirector]
     
     def get_queryset(self):
-        return SchoolAbsence.objects.filter(classroom__school=get_user_school(self.request))
+        return SchoolAbsence.objects.for_school(get_user_school(self.request))
 
 
     def create(self, request, *args, **kwargs):
@@ -244,7 +245,7 @@ class SchoolGeneralConfigViewSet(viewsets.ModelViewSet):
         Filtrer les configurations par l'école de l'utilisateur connecté.
         """
         school = get_user_school(self.request)
-        return SchoolGeneralConfig.objects.filter(school=school)
+        return SchoolGeneralConfig.objects.for_school(school)
 
     def perform_create(self, serializer):
         """
@@ -4,13 +4,15 @@ from rest_framework.response import Response
 from rest_framework import status
 from api.serializers.subject_manager_serializer import SchoolCalendarSerializer, SchoolHolidaySerializer, SchoolProgramSerializer, SchoolReportCardSerializer, SchoolScheduleSerializer, SubjectAttributionSerializer, SubjectSerializer
 from backend.constant import get_user_school
+from backend.monitoring.query_inspector import QueryBudgetMixin
 from backend.models.subject_manager import SchoolCalendar, SchoolHoliday, SchoolProgram, SchoolReportCard, SchoolSchedule, Subject, SubjectAttribution
 from backend.permissions.permission_app import IsDirector, IsManager
 from rest_framework.decorators import action
+from api.pagination import paginated_response
 
 
 
-class SubjectViewSet(viewsets.ModelViewSet):
+class SubjectViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     """
     SubjectViewSet is a viewset for managing Subject objects.
     Attributes:
@@ -35,7 +37,7 @@ class SubjectViewSet(viewsets.ModelViewSet):
     serializer_class = SubjectSerializer
 
     def get_queryset(self):
-        return Subject.objects.filter(school=get_user_school(self.request))
+        return Subject.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -88,7 +90,7 @@ class SchoolScheduleViewSet(viewsets.ModelViewSet):
     serializer_class = SchoolScheduleSerializer
 
     def get_queryset(self):
-        return SchoolSchedule.objects.filter(school=get_user_school(self.request))
+        return SchoolSchedule.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -138,7 +140,7 @@ class SchoolCalendarViewSet(viewsets.ModelViewSet):
     serializer_class = SchoolCalendarSerializer
 
     def get_queryset(self):
-        return SchoolCalendar.objects.filter(school=get_user_school(self.request))
+        return SchoolCalendar.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -185,7 +187,7 @@ class SchoolHolidayViewSet(viewsets.ModelViewSet):
     serializer_class = SchoolHolidaySerializer
 
     def get_queryset(self):
-        return SchoolHoliday.objects.filter(school=get_user_school(self.request))
+        return SchoolHoliday.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -233,7 +235,7 @@ class SchoolProgramViewSet(viewsets.ModelViewSet):
     serializer_class = SchoolProgramSerializer
 
     def get_queryset(self):
-        return SchoolProgram.objects.filter(school=get_user_school(self.request))
+        return SchoolProgram.objects.for_school(get_user_school(self.request))
 
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -284,7 +286,7 @@ class SubjectAttributionViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_queryset(self):
-        return SubjectAttribution.objects.filter(subject__school=get_user_school(self.request))
+        return SubjectAttribution.objects.for_school(get_user_school(self.request))
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -355,7 +357,7 @@ class SchoolReportCardViewSet(viewsets.ModelViewSet):
     
     
     def get_queryset(self):
-        return SchoolReportCard.objects.filter(school=get_user_school(self.request))
+        return SchoolReportCard.objects.for_school(get_user_school(self.request))
     
     def perform_create(self, serializer):
         serializer.save(school=get_user_school(self.request))
@@ -370,15 +372,13 @@ class SchoolReportCardViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='by-student/(?P<student_id>[^/.]+)')
     def get_by_student(self, request, student_id=None):
         report_cards = SchoolReportCard.objects.filter(student__id=student_id, school=get_user_school(request))
-        serializer = self.get_serializer(report_cards, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, report_cards)
 
     # Endpoint pour obtenir les rapports par matière
     @action(detail=False, methods=['get'], url_path='by-subject/(?P<subject_id>[^/.]+)')
     def get_by_subject(self, request, subject_id=None):
         report_cards = SchoolReportCard.objects.filter(subject__id=subject_id, school=get_user_school(request))
-        serializer = self.get_serializer(report_cards, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, report_cards)
 
     # Endpoint pour calculer la moyenne pour un élève dans une matière
     @action(detail=False, methods=['get'], url_path='average-by-student-subject/(?P<student_id>[^/.]+)/(?P<subject_id>[^/.]+)')
@@ -425,6 +425,5 @@ class SchoolReportCardViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], url_path='by-school/(?P<school_id>[^/.]+)')
     def get_by_school(self, request, school_id=None):
         report_cards = SchoolReportCard.objects.filter(school__id=school_id)
-        serializer = self.get_serializer(report_cards, many=True)
-        return Response(serializer.data)
+        return paginated_response(self, report_cards)
 
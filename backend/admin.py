@@ -179,3 +179,20 @@ class UserRegistrationAdmin(admin.ModelAdmin):
 
     status.short_description = "Statut"
 
+
+
+@admin.register(AccessLogRollup)
+class AccessLogRollupAdmin(admin.ModelAdmin):
+    list_display = ('minute', 'method', 'route', 'request_count', 'error_count', 'p50_response_time', 'p95_response_time', 'p99_response_time')
+    search_fields = ('route',)
+    list_filter = ('method',)
+    date_hierarchy = 'minute'
+    ordering = ('-minute',)
+    list_per_page = per_page
+
+
+@admin.register(AccessLogArchive)
+class AccessLogArchiveAdmin(admin.ModelAdmin):
+    list_display = ('cutoff', 'archived_count', 'last_id', 'created_at')
+    ordering = ('-cutoff',)
+    list_per_page = per_page
@@ -4,3 +4,15 @@ from django.apps import AppConfig
 class BackendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend'
+
+    def ready(self):
+        # Enregistrement des signaux d'invalidation des caches
+        import backend.tenant  # noqa: F401
+        import backend.authentication.jwt  # noqa: F401
+        # Report de l'école sur les lignes dénormalisées quand leur parent change d'école
+        import backend.school_sync  # noqa: F401
+
+        # Wrapper SQL des connexions et temps de sérialisation DRF (PerformanceMiddleware)
+        import backend.monitoring.sql  # noqa: F401
+        from backend.monitoring.metrics import install_serializer_timing
+        install_serializer_timing()
@@ -0,0 +1,203 @@
+import hashlib
+import math
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken, UntypedToken
+
+# Incrémenté à chaque ajout : les autres processus complètent leur filtre
+GENERATION_KEY = 'token-blacklist:generation'
+# Incrémenté après une purge : les autres processus reconstruisent leur filtre
+REBUILD_KEY = 'token-blacklist:rebuild'
+
+
+class JtiBloomFilter:
+    """
+    Filtre de Bloom des JTI en liste noire. Un JTI absent du filtre n'est
+    certainement pas en liste noire ; un JTI présent doit être confirmé en base.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, jti):
+        digest = hashlib.sha256(jti.encode()).digest()
+        # Double hachage (Kirsch-Mitzenmacher) à partir de deux moitiés de l'empreinte
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, jti):
+        for position in self._positions(jti):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, jti):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(jti))
+
+
+class BlacklistMembership:
+    """
+    Appartenance à la liste noire des refresh tokens sans sonder la table
+    dans le cas courant (token valide).
+
+    Le filtre du processus est chargé une fois, puis complété de façon
+    incrémentale lorsque le compteur de génération partagé change, ou au plus
+    tard après `sync_interval` secondes si le cache n'est pas partagé entre
+    processus. Les transactions pouvant être validées dans le désordre des
+    identifiants, chaque rechargement relit les lignes postérieures au
+    dernier identifiant lu il y a plus de `overlap` secondes : une entrée
+    validée jusqu'à `overlap` secondes après l'attribution de son identifiant
+    est prise en compte. Le filtre est reconstruit entièrement après une
+    purge (REBUILD_KEY) ou quand il dépasse sa capacité.
+    """
+
+    def __init__(self, capacity=200_000, error_rate=0.001, sync_interval=5, overlap=60):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.overlap = overlap
+        self._lock = threading.Lock()
+        self._bloom = None
+        # [(instant de lecture, dernier identifiant lu)], du plus ancien au plus récent
+        self._reads = deque()
+        self._generation = None
+        self._rebuild = None
+        self._synced_at = 0.0
+
+    def _floor(self, now):
+        """ Dernier identifiant lu il y a plus de `overlap` secondes : les lignes suivantes sont relues """
+        while len(self._reads) > 1 and self._reads[1][0] <= now - self.overlap:
+            self._reads.popleft()
+        return self._reads[0][1] if self._reads and self._reads[0][0] <= now - self.overlap else 0
+
+    def _load(self, rebuild):
+        now = time.monotonic()
+        bloom = self._bloom
+        if rebuild or bloom is None or bloom.count > self.capacity:
+            # Nouveau filtre rempli à part : les lectures concurrentes gardent l'ancien jusqu'au bout
+            bloom = JtiBloomFilter(self.capacity, self.error_rate)
+            reads = deque()
+            # Lignes encore non validées au chargement complet : relues depuis la dernière antérieure à `overlap`
+            floor = (
+                BlacklistedToken.objects.filter(blacklisted_at__lt=timezone.now() - timedelta(seconds=self.overlap))
+                .order_by('-id').values_list('id', flat=True).first()
+            ) or 0
+            rows = BlacklistedToken.objects.all()
+        else:
+            reads = self._reads
+            floor = self._floor(now)
+            rows = BlacklistedToken.objects.filter(id__gt=floor)
+        last_id = floor
+        for row_id, jti in rows.order_by('id').values_list('id', 'token__jti').iterator(chunk_size=5000):
+            # Les lignes relues sont déjà dans le filtre : `count` ne compte que les nouvelles
+            if jti not in bloom:
+                bloom.add(jti)
+            last_id = max(last_id, row_id)
+        if not reads:
+            reads.append((now - self.overlap, floor))
+        if last_id != reads[-1][1]:
+            reads.append((now, last_id))
+        self._bloom, self._reads = bloom, reads
+
+    def sync(self):
+        shared = cache.get_many([GENERATION_KEY, REBUILD_KEY])
+        generation, rebuild = shared.get(GENERATION_KEY, 0), shared.get(REBUILD_KEY, 0)
+        now = time.monotonic()
+        if (
+            self._bloom is not None and generation == self._generation and rebuild == self._rebuild
+            and now - self._synced_at < self.sync_interval
+        ):
+            return
+        with self._lock:
+            self._load(rebuild=self._rebuild is not None and rebuild != self._rebuild)
+            self._generation = generation
+            self._rebuild = rebuild
+            self._synced_at = now
+
+    def add(self, jti):
+        """ Enregistre un JTI mis en liste noire par ce processus et prévient les autres une fois la ligne validée """
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        transaction.on_commit(bump_generation)
+
+    def contains(self, jti):
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        # Possible faux positif du filtre : confirmation en base
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+
+    def reset(self):
+        with self._lock:
+            self._bloom = None
+            self._reads = deque()
+            self._generation = None
+            self._rebuild = None
+
+
+def increment(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Clé évincée entre add() et incr()
+        cache.set(key, 1, timeout=None)
+
+
+def bump_generation():
+    increment(GENERATION_KEY)
+
+
+def request_rebuild():
+    """ Après une purge : chaque processus reconstruit son filtre sans les JTI supprimés """
+    increment(REBUILD_KEY)
+
+
+token_blacklist = BlacklistMembership(
+    capacity=getattr(settings, 'TOKEN_BLACKLIST_BLOOM_CAPACITY', 200_000),
+    error_rate=getattr(settings, 'TOKEN_BLACKLIST_BLOOM_ERROR_RATE', 0.001),
+    sync_interval=getattr(settings, 'TOKEN_BLACKLIST_SYNC_INTERVAL', 5),
+    overlap=getattr(settings, 'TOKEN_BLACKLIST_SYNC_OVERLAP', 60),
+)
+
+
+class BlacklistRefreshToken(RefreshToken):
+    """ Refresh token dont la vérification de liste noire passe par le filtre de Bloom """
+
+    def check_blacklist(self):
+        if token_blacklist.contains(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        result = super().blacklist()
+        token_blacklist.add(self.payload[api_settings.JTI_CLAIM])
+        return result
+
+
+class BlacklistTokenVerifySerializer(TokenVerifySerializer):
+    """ Vérification de token avec contrôle de liste noire par le filtre de Bloom """
+
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        jti = token.get(api_settings.JTI_CLAIM)
+        if api_settings.BLACKLIST_AFTER_ROTATION and jti and token_blacklist.contains(jti):
+            raise serializers.ValidationError("Token is blacklisted")
+        return {}
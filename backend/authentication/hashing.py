@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher
+
+logger = logging.getLogger(__name__)
+
+
+class HashPoolSaturated(Exception):
+    """ File d'attente des vérifications de mot de passe pleine : le client doit réessayer """
+
+
+class PasswordHashPool:
+    """
+    Pool de threads borné dédié à la vérification des mots de passe.
+
+    Le calcul PBKDF2 bloquerait la boucle d'événements ASGI : il est exécuté
+    dans `workers` threads, au plus `max_pending` vérifications pouvant être
+    en cours ou en attente. Au-delà, la demande est refusée immédiatement
+    plutôt que de retarder toutes les autres requêtes du worker.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._hash_seconds_total = 0.0
+        self._hash_seconds_max = 0.0
+
+    async def verify(self, password, encoded):
+        """ Vérifie le mot de passe dans le pool ; retourne (correct, à re-hacher) """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                logger.warning("Vérification de mot de passe refusée : %s en attente", self._pending)
+                raise HashPoolSaturated
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._verify, password, encoded)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def _verify(self, password, encoded):
+        with self._lock:
+            self._running += 1
+        start = time.perf_counter()
+        try:
+            # Sans `setter` : aucune écriture en base depuis les threads du pool
+            is_correct = check_password(password, encoded)
+            must_update = is_correct and identify_hasher(encoded).must_update(encoded)
+            return is_correct, must_update
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._hash_seconds_total += elapsed
+                self._hash_seconds_max = max(self._hash_seconds_max, elapsed)
+
+    def snapshot(self):
+        """ Métriques du pool : profondeur de file, vérifications et temps de hachage """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'in_flight': self._running,
+                'queue_depth': self._pending - self._running,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'hash_seconds_total': self._hash_seconds_total,
+                'hash_seconds_max': self._hash_seconds_max,
+                'hash_seconds_avg': self._hash_seconds_total / self._completed if self._completed else 0.0,
+            }
+
+
+hash_pool = PasswordHashPool(
+    workers=getattr(settings, 'LOGIN_HASH_WORKERS', None) or os.cpu_count() or 1,
+    max_pending=getattr(settings, 'LOGIN_HASH_MAX_PENDING', 64),
+)
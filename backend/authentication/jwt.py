@@ -0,0 +1,210 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.models.account import User, UserRole
+
+USER_CACHE_TTL = getattr(settings, 'AUTH_USER_CACHE_TTL', 60)
+
+# Le mot de passe n'est jamais mis en cache : il reste différé sur l'instance reconstruite
+CACHED_USER_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname != 'password']
+
+
+# Couple (utilisateur, token) posé sur la HttpRequest, partagé entre middlewares et DRF
+PRINCIPAL_ATTR = 'jwt_principal'
+
+
+def user_cache_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+class ValidatedTokenCache:
+    """
+    Cache LRU des tokens déjà validés (signature et expiration), indexé par
+    l'empreinte SHA-256 du token brut. Une entrée n'est jamais servie au-delà
+    de l'expiration du token.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token_hash):
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token_hash]
+                return None
+            self._entries.move_to_end(token_hash)
+            return entry[0]
+
+    def set(self, token_hash, validated_token):
+        expires_at = validated_token.get('exp', 0)
+        with self._lock:
+            self._entries[token_hash] = (validated_token, expires_at)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+validated_token_cache = ValidatedTokenCache(maxsize=getattr(settings, 'AUTH_TOKEN_CACHE_SIZE', 4096))
+
+
+def load_user_data(user_id):
+    """ Champs et codes des rôles de l'utilisateur, lus en base et mis en cache """
+    row = User.objects.filter(pk=user_id).values(*CACHED_USER_FIELDS).first()
+    if row is None:
+        return None
+    data = {
+        'fields': [row[name] for name in CACHED_USER_FIELDS],
+        'role_codes': sorted(code for code in User.roles.through.objects.filter(user_id=user_id).values_list('userrole__code', flat=True) if code),
+    }
+    cache.set(user_cache_key(user_id), data, USER_CACHE_TTL)
+    return data
+
+
+def build_cached_user(data):
+    user = User.from_db(User.objects.db, CACHED_USER_FIELDS, data['fields'])
+    # Pré-remplit User.role_codes : has_role() et les permissions ne requêtent plus
+    user.role_codes = frozenset(data['role_codes'])
+    return user
+
+
+def load_cached_user(user_id):
+    """
+    Retourne l'utilisateur depuis le cache (champs, codes des rôles, école),
+    ou le charge depuis la base et le met en cache pour `AUTH_USER_CACHE_TTL` secondes.
+    """
+    data = cache.get(user_cache_key(user_id)) or load_user_data(user_id)
+    return build_cached_user(data) if data is not None else None
+
+
+async def aload_cached_user(user_id):
+    """ Variante asynchrone de `load_cached_user` : la base n'est interrogée qu'en cas d'absence du cache """
+    data = await cache.aget(user_cache_key(user_id))
+    if data is None:
+        data = await sync_to_async(load_user_data)(user_id)
+    return build_cached_user(data) if data is not None else None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT sans requête sur les requêtes répétées : le token
+    validé est servi par un cache LRU du processus et l'utilisateur par le
+    cache Django, invalidé à chaque modification de l'utilisateur ou de ses rôles.
+    """
+
+    def authenticate(self, request):
+        # Principal déjà établi pour cette requête (middleware des rôles) : pas de second décodage
+        http_request = getattr(request, '_request', request)
+        principal = getattr(http_request, PRINCIPAL_ATTR, None)
+        if principal is None:
+            principal = super().authenticate(request)
+            if principal is not None:
+                setattr(http_request, PRINCIPAL_ATTR, principal)
+        return principal
+
+    async def aauthenticate(self, request):
+        """
+        Variante asynchrone pour les middlewares en mode ASGI : le token est
+        validé en mémoire et l'utilisateur lu via l'API asynchrone du cache.
+        """
+        http_request = getattr(request, '_request', request)
+        principal = getattr(http_request, PRINCIPAL_ATTR, None)
+        if principal is None:
+            header = self.get_header(request)
+            raw_token = self.get_raw_token(header) if header is not None else None
+            if raw_token is None:
+                return None
+            validated_token = self.get_validated_token(raw_token)
+            principal = (await self.aget_user(validated_token), validated_token)
+            setattr(http_request, PRINCIPAL_ATTR, principal)
+        return principal
+
+    def get_validated_token(self, raw_token):
+        token_hash = hashlib.sha256(raw_token).hexdigest()
+        validated_token = validated_token_cache.get(token_hash)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            validated_token_cache.set(token_hash, validated_token)
+        return validated_token
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # La vérification compare le hash du mot de passe, absent du cache
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return self.check_user(load_cached_user(user_id))
+
+    async def aget_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        return self.check_user(await aload_cached_user(user_id))
+
+    def check_user(self, user):
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """ Invalide l'utilisateur modifié (champs, `is_active`) ou supprimé """
+    cache.delete(user_cache_key(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.roles.through)
+def invalidate_cached_user_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """ Invalide les utilisateurs dont les rôles changent, dans les deux sens de la relation """
+    if not reverse:
+        if action.startswith('post_'):
+            cache.delete(user_cache_key(instance.pk))
+            # Rôles déjà chargés sur l'instance modifiée
+            instance.__dict__.pop('role_codes', None)
+            instance.__dict__.pop('role_mask', None)
+    elif action == 'pre_clear':
+        # Les utilisateurs du rôle ne sont plus connus après la suppression des liens
+        invalidate_role_users(instance)
+    elif action.startswith('post_') and pk_set:
+        cache.delete_many([user_cache_key(pk) for pk in pk_set])
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(pre_delete, sender=UserRole)
+def invalidate_role_users(instance, **kwargs):
+    """ Invalide les utilisateurs portant un rôle dont le code change ou qui disparaît """
+    user_ids = User.roles.through.objects.filter(userrole_id=instance.pk).values_list('user_id', flat=True)
+    cache.delete_many([user_cache_key(pk) for pk in user_ids])
@@ -0,0 +1,70 @@
+from django.contrib.auth.signals import user_logged_in, user_login_failed
+from django.db.models import Exists, OuterRef, Q
+from rest_framework import status
+
+from backend.models.account import User
+from backend.models.school_manager import UserRegistration
+from backend.tenant import get_current_school_year, get_school_by_code
+
+
+class LoginFailed(Exception):
+    """ Échec de connexion, avec le message et le statut HTTP à renvoyer au client """
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def resolve_login_user(username, code):
+    """
+    Retourne l'école et l'utilisateur candidat à la connexion.
+
+    L'école est servie par le cache des codes d'établissement et l'année en
+    cours par celui des années scolaires ; l'utilisateur, rattaché
+    directement à l'école ou inscrit sur l'année en cours, est chargé en une
+    seule requête.
+    """
+    school = get_school_by_code(code)
+    if school is None:
+        raise LoginFailed("Aucun établissement ne correspond à ce code", status.HTTP_404_NOT_FOUND)
+
+    belongs_to_school = Q(school=school)
+    current_school_year = get_current_school_year(school)
+    if current_school_year is not None:
+        belongs_to_school |= Q(Exists(
+            UserRegistration.objects.filter(user=OuterRef('pk'), school=school, school_year=current_school_year)
+        ))
+
+    user = User.objects.filter(belongs_to_school, username=username).first()
+    if user is None:
+        raise LoginFailed("Aucun utilisateur ne correspond à cet établissement", status.HTTP_404_NOT_FOUND)
+    return school, user
+
+
+def reject_login(request, user):
+    """ Signale l'échec de connexion et lève l'erreur renvoyée au client """
+    user_login_failed.send(sender=__name__, credentials={'username': user.username}, request=request)
+    raise LoginFailed("Nom d'utilisateur ou mot de passe incorrect !", status.HTTP_400_BAD_REQUEST)
+
+
+def accept_login(request, user):
+    """ Émet le signal de connexion de Django (mise à jour de `last_login`), sans créer de session """
+    user_logged_in.send(sender=user.__class__, request=request, user=user)
+    return user
+
+
+def verify_password(request, user, password):
+    """
+    Vérifie le mot de passe sur la ligne déjà chargée, sans repasser par
+    `authenticate()`.
+    """
+    if not (user.is_active and user.check_password(password)):
+        reject_login(request, user)
+    return accept_login(request, user)
+
+
+def authenticate_login(request, username, password, code):
+    """ Résout puis authentifie l'utilisateur ; retourne le couple (école, utilisateur) """
+    school, user = resolve_login_user(username, code)
+    return school, verify_password(request, user, password)
@@ -0,0 +1,140 @@
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SlidingWindowLimiter:
+    """
+    Limiteur à fenêtre glissante, partagé entre processus via le cache Django.
+
+    Chaque dimension (IP, nom d'utilisateur...) compte ses échecs
+    dans des fenêtres fixes de `window` secondes ; le nombre d'échecs sur la
+    fenêtre glissante est estimé en pondérant la fenêtre précédente par la
+    part encore couverte. La décision lit toutes les clés en un seul
+    `get_many` ; les échecs sont comptés par `incr`, atomique côté cache.
+    """
+
+    def __init__(self, name, limits, cache_alias='default'):
+        self.name = name
+        # {dimension: (nombre maximal d'échecs, fenêtre en secondes)}
+        self.limits = limits
+        self.cache_alias = cache_alias
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, dimension, value, window_index):
+        digest = hashlib.sha1(str(value).strip().lower().encode()).hexdigest()
+        return f"{self.name}:{dimension}:{digest}:{window_index}"
+
+    def _windows(self, identities, now):
+        for dimension, value in identities.items():
+            if not value or dimension not in self.limits:
+                continue
+            limit, window = self.limits[dimension]
+            index = int(now // window)
+            yield dimension, limit, window, index, now - index * window
+
+    def _keys(self, identities, windows):
+        keys = {}
+        for dimension, limit, window, index, elapsed in windows:
+            value = identities[dimension]
+            keys[dimension] = (self._key(dimension, value, index), self._key(dimension, value, index - 1))
+        return keys
+
+    def _wait(self, windows, keys, counts):
+        wait = 0
+        for dimension, limit, window, index, elapsed in windows:
+            current_key, previous_key = keys[dimension]
+            estimate = counts.get(previous_key, 0) * (window - elapsed) / window + counts.get(current_key, 0)
+            if estimate >= limit:
+                wait = max(wait, math.ceil(window - elapsed))
+        return wait
+
+    def retry_after(self, identities, now=None):
+        """ Retourne le délai d'attente en secondes si une dimension dépasse sa limite, sinon 0 """
+        windows = list(self._windows(identities, time.time() if now is None else now))
+        keys = self._keys(identities, windows)
+        counts = self.cache.get_many([key for pair in keys.values() for key in pair])
+        return self._wait(windows, keys, counts)
+
+    async def aretry_after(self, identities, now=None):
+        """ Variante asynchrone de `retry_after` """
+        windows = list(self._windows(identities, time.time() if now is None else now))
+        keys = self._keys(identities, windows)
+        counts = await self.cache.aget_many([key for pair in keys.values() for key in pair])
+        return self._wait(windows, keys, counts)
+
+    def hit(self, identities, now=None):
+        """ Compte un échec pour chaque dimension renseignée ; retourne les échecs de la fenêtre courante par dimension """
+        now = time.time() if now is None else now
+        counts = {}
+        for dimension, limit, window, index, elapsed in self._windows(identities, now):
+            key = self._key(dimension, identities[dimension], index)
+            try:
+                counts[dimension] = self.cache.incr(key)
+            except ValueError:
+                # Premier échec de la fenêtre ; la clé doit survivre à la fenêtre
+                # suivante, qui la pondère encore. Si un autre processus l'a créée
+                # entre-temps, add() échoue et on incrémente la sienne.
+                if self.cache.add(key, 1, timeout=2 * window):
+                    counts[dimension] = 1
+                else:
+                    counts[dimension] = self.cache.incr(key)
+        return counts
+
+    async def ahit(self, identities, now=None):
+        """ Variante asynchrone de `hit` """
+        now = time.time() if now is None else now
+        counts = {}
+        for dimension, limit, window, index, elapsed in self._windows(identities, now):
+            key = self._key(dimension, identities[dimension], index)
+            try:
+                counts[dimension] = await self.cache.aincr(key)
+            except ValueError:
+                if await self.cache.aadd(key, 1, timeout=2 * window):
+                    counts[dimension] = 1
+                else:
+                    counts[dimension] = await self.cache.aincr(key)
+        return counts
+
+    def alerts(self, counts):
+        """ Dimensions dont le nombre d'échecs vient d'atteindre la limite dans la fenêtre courante (une fois par fenêtre) """
+        return [dimension for dimension, count in counts.items() if count == self.limits[dimension][0]]
+
+
+def get_client_ip(request):
+    """
+    Adresse du client : avec `TRUSTED_PROXY_COUNT` proxys devant l'application,
+    l'entrée de X-Forwarded-For ajoutée par le plus proche d'entre eux (la
+    `TRUSTED_PROXY_COUNT`-ième en partant de la fin). Les entrées précédentes
+    sont fournies par le client et ne sont jamais lues ; sans proxy, REMOTE_ADDR.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    forwarded = [entry.strip() for entry in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if entry.strip()]
+    if proxies and len(forwarded) >= proxies:
+        return forwarded[-proxies]
+    return request.META.get('REMOTE_ADDR')
+
+
+login_limiter = SlidingWindowLimiter(
+    'login-attempts',
+    limits=getattr(settings, 'LOGIN_RATE_LIMITS', {
+        'ip': (20, 300),
+        'username': (5, 300),
+    }),
+    cache_alias=getattr(settings, 'LOGIN_RATE_LIMIT_CACHE', 'default'),
+)
+
+# Échecs par école : signalés (journal), jamais bloquants. Un code d'école est
+# public : bloquer sur cette dimension laisserait un seul client, ou les fautes
+# de frappe de l'heure de pointe, fermer la connexion à toute l'école.
+login_alerts = SlidingWindowLimiter(
+    'login-alerts',
+    limits=getattr(settings, 'LOGIN_FAILURE_ALERTS', {'school': (200, 300)}),
+    cache_alias=getattr(settings, 'LOGIN_RATE_LIMIT_CACHE', 'default'),
+)
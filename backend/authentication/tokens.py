@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from backend.authentication.blacklist import BlacklistRefreshToken
+from backend.models.school_manager import School
+from backend.tenant import school_cache
+
+# Claims compacts : identifiant et version des données de l'école, codes des rôles.
+# Une version plus récente que l'école en cache la fait relire (tenant.get_request_school)
+SCHOOL_ID_CLAIM = 'sid'
+SCHOOL_VERSION_CLAIM = 'sv'
+ROLES_CLAIM = 'roles'
+
+# Ancien claim : SchoolSerializer(school).data complet
+LEGACY_SCHOOL_CLAIM = 'school'
+
+
+def get_role_codes(user):
+    return sorted(code for code in user.roles.values_list('code', flat=True) if code)
+
+
+def set_compact_claims(token, user, school):
+    """ Écrit les claims compacts de l'utilisateur et de son école dans le token """
+    if LEGACY_SCHOOL_CLAIM in token:
+        del token[LEGACY_SCHOOL_CLAIM]
+    token[SCHOOL_ID_CLAIM] = school.pk
+    token[SCHOOL_VERSION_CLAIM] = school.data_version
+    token[ROLES_CLAIM] = get_role_codes(user)
+    return token
+
+
+def tokens_for_user(user, school):
+    refresh = set_compact_claims(BlacklistRefreshToken.for_user(user), user, school)
+    return {
+        'refresh_token': str(refresh),
+        'access_token': str(refresh.access_token),
+    }
+
+
+class CompactTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rafraîchissement des tokens avec mise à niveau des claims.
+
+    Les refresh tokens émis avant les claims compacts portent l'école
+    sérialisée sous `school` : elle est remplacée par `sid`/`sv`/`roles`
+    avant de dériver le nouvel access token, si bien que les anciens
+    tokens basculent au format compact à leur premier rafraîchissement.
+    Les rôles et la version de l'école sont relus à chaque rafraîchissement.
+    """
+    token_class = BlacklistRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM, None)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        legacy_school = refresh.payload.get(LEGACY_SCHOOL_CLAIM) or {}
+        school_id = refresh.payload.get(SCHOOL_ID_CLAIM) or legacy_school.get('id')
+        if school_id:
+            try:
+                school = school_cache.get(school_id)
+            except School.DoesNotExist:
+                raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+            set_compact_claims(refresh, user, school)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # Application token_blacklist non installée
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
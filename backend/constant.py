@@ -2,6 +2,7 @@ from rest_framework.exceptions import ValidationError
 
 from api.serializers.school_manager_serializer import SchoolSerializer
 from backend.models.school_manager import School
+from backend.tenant import get_request_school
 days_of_the_weeks = [
     ('lundi', 'Lundi'),
     ('mardi', 'Mardi'),
@@ -130,14 +131,6 @@ types_evaluations = [
 
 
 def get_user_school(request):
-    # Récupérer les informations de l'école à partir du token JWT
-    school_data = request.auth.get('school')
-    if not school_data:
-        raise ValidationError({"detail": "École non trouvée."})
-    
-    # Récupérer l'objet School existant à partir de la base de données
-    try:
-        school = School.objects.get(id=school_data['id'])
-    except School.DoesNotExist:
-        raise ValidationError({"detail": "École non trouvée dans la base de données."})
-    return school
\ No newline at end of file
+    # L'école est résolue une seule fois par requête à partir du token JWT,
+    # puis servie depuis le cache du processus (voir backend.tenant)
+    return get_request_school(request)
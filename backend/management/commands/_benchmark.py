@@ -0,0 +1,174 @@
+"""
+Outils partagés par les commandes de benchmark : jeu de données d'une école
+complète, exécution dans une transaction annulée et mesure des temps.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from backend.models import (
+    Classroom, Payment, School, SchoolAbsence, SchoolCycle, SchoolInvoice, SchoolLevel, SchoolYear,
+    StudentEvaluation, Subject, SubjectAttribution, SubjectGroup, User, UserRegistration, UserRole,
+)
+
+BATCH_SIZE = 1000
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """ Exécute le bloc dans une transaction systématiquement annulée """
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+def measure(fn, repeat=5):
+    """ Retourne la médiane du temps d'exécution (ms) et le nombre de requêtes SQL """
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        queries = len(ctx)
+    return statistics.median(timings) * 1000, queries
+
+
+class SeededSchool:
+    def __init__(self, school, school_year, classrooms, pupils, teachers, parents, subjects):
+        self.school = school
+        self.school_year = school_year
+        self.classrooms = classrooms
+        self.pupils = pupils
+        self.teachers = teachers
+        self.parents = parents
+        self.subjects = subjects
+
+
+def _role(name):
+    role, _ = UserRole.objects.get_or_create(name=name)
+    return role
+
+
+def _create_users(prefix, kind, count, school, role, password_hash):
+    users = User.objects.bulk_create(
+        [
+            User(
+                username=f"{prefix}-{kind}-{i}", password=password_hash, school=school,
+                lastname=f"Nom {i}", firstname=f"Prénom {i}", gender='Masculin' if i % 2 else 'Féminin',
+            )
+            for i in range(count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    User.roles.through.objects.bulk_create(
+        [User.roles.through(user_id=user.pk, userrole_id=role.pk) for user in users],
+        batch_size=BATCH_SIZE,
+    )
+    return users
+
+
+def seed_school(prefix, pupils=5000, classrooms=40, subjects=12, evaluations_per_pupil=4, password=None):
+    """
+    Crée une école complète : classes, élèves inscrits sur l'année en cours,
+    enseignants, parents, matières, évaluations, absences, factures et paiements.
+    Les lignes sont insérées en masse, sans passer par `save()`.
+    """
+    password_hash = make_password(password)
+    cycle = SchoolCycle.objects.create(name=f"Cycle {prefix}"[:25])
+    level = SchoolLevel.objects.create(name=f"Niveau {prefix}"[:25], cycle=cycle)
+    group = SubjectGroup.objects.create(name=f"Groupe {prefix}")
+
+    school = School.objects.create(name=f"École {prefix}", address="Centre-ville", city="Brazzaville", school_cycle=cycle)
+    today = date.today()
+    school_year = SchoolYear.objects.create(
+        school=school, year=f"{today.year}-{today.year + 1}", is_current_year=True,
+        start_date=today - timedelta(days=60), end_date=today + timedelta(days=240),
+    )
+
+    rooms = Classroom.objects.bulk_create(
+        [Classroom(school=school, name=f"Salle {i}", school_level=level) for i in range(classrooms)]
+    )
+    subject_rows = Subject.objects.bulk_create(
+        [Subject(school=school, name=f"{prefix} matière {i}", group=group) for i in range(subjects)]
+    )
+
+    pupil_users = _create_users(prefix, 'pupil', pupils, school, _role('Élève'), password_hash)
+    teacher_users = _create_users(prefix, 'teacher', max(1, classrooms // 2), school, _role('Enseignant'), password_hash)
+    parent_users = _create_users(prefix, 'parent', max(1, pupils // 2), school, _role('Parent'), password_hash)
+
+    registrations = UserRegistration.objects.bulk_create(
+        [
+            UserRegistration(user=user, school=school, school_year=school_year, classroom=rooms[i % classrooms])
+            for i, user in enumerate(pupil_users)
+        ]
+        + [UserRegistration(user=user, school=school, school_year=school_year) for user in teacher_users + parent_users],
+        batch_size=BATCH_SIZE,
+    )
+
+    StudentEvaluation.objects.bulk_create(
+        [
+            StudentEvaluation(
+                student=registration.user, inscription=registration, school=school, school_year=school_year,
+                subject=subject_rows[(i + n) % subjects], evaluation_date=today - timedelta(days=n),
+                score=(i * 7 + n) % 20,
+            )
+            for i, registration in enumerate(registrations[:pupils])
+            for n in range(evaluations_per_pupil)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    SchoolAbsence.objects.bulk_create(
+        [
+            SchoolAbsence(
+                student=registration.user, classroom=registration.classroom, school=school, school_year=school_year,
+                absence_date=today - timedelta(days=i % 30), absence_type="Maladie",
+            )
+            for i, registration in enumerate(registrations[:pupils])
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    SubjectAttribution.objects.bulk_create(
+        [
+            SubjectAttribution(
+                teacher=teacher_users[(r + s) % len(teacher_users)], subject=subject, classroom=room,
+                school=school, school_year=school_year,
+            )
+            for r, room in enumerate(rooms)
+            for s, subject in enumerate(subject_rows)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    invoices = SchoolInvoice.objects.bulk_create(
+        [
+            SchoolInvoice(
+                student=registration.user, school=school, classroom=registration.classroom,
+                date=today - timedelta(days=i % 90), due_date=today + timedelta(days=30),
+                amount=25000, schooling_of='Janvier', invoice_status='Non payé',
+            )
+            for i, registration in enumerate(registrations[:pupils])
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Payment.objects.bulk_create(
+        [
+            Payment(invoice=invoice, school=school, amount=10000, payment_method="Espèces", is_paid=True)
+            for invoice in invoices
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    return SeededSchool(school, school_year, rooms, pupil_users, teacher_users, parent_users, subject_rows)
@@ -0,0 +1,94 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from backend.management.commands.rollup_access_logs import merge_rollups, rollups_for
+from backend.models import AccessLog, AccessLogArchive
+
+ARCHIVE_FIELDS = ('id', 'user_id', 'ip_address', 'method', 'path', 'route', 'status_code', 'timestamp', 'response_time')
+
+
+class Command(BaseCommand):
+    help = (
+        "Archive les lignes du journal d'accès plus anciennes que la durée de rétention dans des "
+        "fichiers NDJSON compressés (un par jour), puis les supprime par tranches. Les minutes "
+        "concernées sont agrégées au préalable ; les lignes arrivées après l'archivage de leur minute "
+        "y sont ajoutées. À planifier quotidiennement (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'ACCESS_LOG_RETENTION_DAYS', 30),
+            help="Durée de rétention des lignes brutes, en jours",
+        )
+        parser.add_argument(
+            '--output-dir', default=getattr(settings, 'ACCESS_LOG_ARCHIVE_DIR', 'access_log_archive'),
+            help="Répertoire des archives access-log-AAAA-MM-JJ.ndjson.gz",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000, help="Nombre de lignes archivées par transaction")
+
+    def handle(self, *args, **options):
+        cutoff = (timezone.now() - timedelta(days=options['days'])).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        # Les agrégats doivent couvrir les lignes avant leur suppression, y compris celles réinsérées
+        # depuis le déversement sur disque après l'agrégation de leur minute : tout est recalculé
+        # depuis la plus ancienne ligne restante, hors minutes déjà archivées (leurs lignes n'existent
+        # plus, un recalcul écraserait l'agrégat). Les lignes écrites après l'agrégation sont
+        # reconnues à leur identifiant et fusionnées au moment de leur suppression.
+        previous = AccessLogArchive.objects.order_by('-cutoff', '-pk').first()
+        last_id = AccessLog.objects.aggregate(last=Max('pk'))['last'] or 0
+        oldest = AccessLog.objects.filter(timestamp__lt=cutoff).aggregate(oldest=Min('timestamp'))['oldest']
+        if oldest is not None:
+            call_command(
+                'rollup_access_logs', since=oldest.isoformat(), until=cutoff.isoformat(), max_id=last_id, stdout=self.stdout,
+            )
+        run = AccessLogArchive.objects.create(cutoff=cutoff, last_id=last_id)
+
+        os.makedirs(options['output_dir'], exist_ok=True)
+        expired = AccessLog.objects.filter(timestamp__lt=cutoff).order_by('pk')
+        archived = 0
+        last_pk = 0
+
+        while True:
+            rows = list(expired.filter(pk__gt=last_pk).values(*ARCHIVE_FIELDS)[:options['batch_size']])
+            if not rows:
+                break
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(row['timestamp'].date(), []).append(json.dumps(row, default=str))
+            # Un membre gzip ajouté par tranche : le fichier reste lisible par gzip/zcat.
+            # Écrit avant la suppression ; une reprise après incident peut dupliquer des lignes, jamais en perdre.
+            for day, lines in by_day.items():
+                path = os.path.join(options['output_dir'], f"access-log-{day.isoformat()}.ndjson.gz")
+                with gzip.open(path, 'at', encoding='utf-8') as archive:
+                    archive.write('\n'.join(lines) + '\n')
+            pks = [row['id'] for row in rows]
+            late = [
+                (row['timestamp'], row['route'], row['path'], row['method'], row['status_code'], row['response_time'])
+                for row in rows if self.is_late(row, run, previous)
+            ]
+            with transaction.atomic():
+                if late:
+                    merge_rollups(rollups_for(late))
+                AccessLog.objects.filter(pk__in=pks).delete()
+            archived += len(pks)
+            last_pk = pks[-1]
+
+        run.archived_count = archived
+        run.save(update_fields=['archived_count'])
+        self.stdout.write(f"{archived} ligne(s) du journal d'accès archivée(s) avant le {cutoff.date().isoformat()}.")
+
+    def is_late(self, row, run, previous):
+        """ Ligne écrite après l'agrégation de sa minute, absente de l'agrégat """
+        if row['id'] > run.last_id:
+            return True
+        # Minute archivée par un passage précédent (interrompu ou non) : rien n'a été recalculé
+        return previous is not None and row['timestamp'] < previous.cutoff and row['id'] > previous.last_id
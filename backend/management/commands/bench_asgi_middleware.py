@@ -0,0 +1,203 @@
+import asyncio
+import socket
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.module_loading import import_string
+
+from backend.authentication.tokens import tokens_for_user
+from backend.management.commands._benchmark import seed_school
+from backend.middlewares.base import HybridMiddlewareMixin
+from backend.models import SchoolCycle, SubjectGroup, UserRole
+from backend.monitoring.access_log_writer import access_log_writer
+
+# Middlewares du projet mesurés, dans l'ordre de la chaîne
+CUSTOM_MIDDLEWARE = [
+    'backend.middlewares.security_middelware.SecurityMiddleware',
+    'backend.middlewares.security_headers.SecurityHeadersMiddleware',
+    'backend.middlewares.role_middleware.RoleBasedAccessMiddleware',
+    'backend.middlewares.logging_middleware.AccessLoggingMiddleware',
+]
+
+PREFIX = 'asgi-bench'
+
+
+async def hop_request(self, request):
+    return await sync_to_async(self.process_request, thread_sensitive=True)(request)
+
+
+async def hop_response(self, request, response):
+    return await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+
+
+def legacy(path):
+    """
+    Version d'avant les middlewares hybrides, enregistrée dans ce module :
+    middlewares de Django d'origine, middlewares du projet à la manière de
+    MiddlewareMixin (chaque crochet passe par un thread en ASGI) et
+    middlewares écrits comme de simples fonctions synchrones.
+    """
+    middleware = import_string(path)
+    if issubclass(middleware, MiddlewareMixin) and issubclass(middleware, HybridMiddlewareMixin):
+        django_middleware = middleware.__mro__[2]
+        return f"{django_middleware.__module__}.{django_middleware.__name__}"
+    name = f"Legacy{middleware.__name__}"
+    if issubclass(middleware, HybridMiddlewareMixin):
+        attrs = {'aprocess_request': hop_request, 'aprocess_response': hop_response}
+    else:
+        attrs = {'async_capable': False}
+    globals()[name] = type(name, (middleware,), {**attrs, '__module__': __name__})
+    return f"{__name__}.{name}"
+
+
+def middleware_stack(old):
+    stack = list(settings.MIDDLEWARE)
+    for path in CUSTOM_MIDDLEWARE:
+        if path not in stack:
+            stack.append(path)
+    return [legacy(path) if old and path.startswith('backend.middlewares.') else path for path in stack]
+
+
+def http_scope(path, headers):
+    return {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+
+
+async def call_asgi(application, path, headers):
+    """ Une requête HTTP traitée directement par l'application ASGI, dans la boucle courante """
+    messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+    disconnected = asyncio.Event()
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+        elif message['type'] == 'http.response.body' and not message.get('more_body'):
+            disconnected.set()
+
+    await application(http_scope(path, headers), receive, send)
+    return status[0]
+
+
+async def call_http(reader, writer, path, headers):
+    """ Une requête HTTP/1.1 sur une connexion persistante (mode uvicorn) """
+    lines = [f"GET {path} HTTP/1.1", "Host: localhost", *(f"{name}: {value}" for name, value in headers.items()), "", ""]
+    writer.write('\r\n'.join(lines).encode())
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    status = int(head.split(b' ', 2)[1])
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':', 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def run_load(call, requests, concurrency):
+    """ `concurrency` clients enchaînent leurs requêtes ; retourne (requêtes/s, statuts) """
+    statuses = {}
+
+    async def client(count, connect):
+        connection = await connect() if connect else ()
+        for _ in range(count):
+            status = await call(*connection)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    per_client = max(1, requests // concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(per_client, getattr(call, 'connect', None)) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return per_client * concurrency / elapsed, statuses
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Débit ASGI de la chaîne de middlewares : version d'origine (un passage par un thread "
+        "par crochet de middleware) contre implémentations hybrides sync/async. Par défaut "
+        "l'application ASGI est appelée dans le processus ; --uvicorn la sert via uvicorn."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--path', default='/api/admin&manager/account/view/current-school-year/')
+        parser.add_argument('--uvicorn', action='store_true', help="Sert l'application avec uvicorn (HTTP réel)")
+
+    def handle(self, *args, **options):
+        if options['uvicorn']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError("uvicorn n'est pas installé (pip install uvicorn).")
+
+        # Les vues synchrones s'exécutent dans un autre thread : le jeu de données est validé puis supprimé
+        seeded = seed_school(PREFIX, pupils=10, classrooms=1, subjects=1)
+        try:
+            user = seeded.teachers[0]
+            user.roles.add(UserRole.objects.get_or_create(name='Directeur')[0])
+            headers = {
+                'Authorization': f"Bearer {tokens_for_user(user, seeded.school)['access_token']}",
+                'User-Agent': 'bench-asgi',
+            }
+            # Chauffe des caches (token, utilisateur, école, année en cours)
+            Client().get(options['path'], HTTP_AUTHORIZATION=headers['Authorization'], HTTP_USER_AGENT='bench-asgi')
+
+            self.stdout.write(f"{'Chaîne':<12}{'requêtes/s':>12}   statuts")
+            for label, old in (("origine", True), ("hybride", False)):
+                with override_settings(MIDDLEWARE=middleware_stack(old)):
+                    application = ASGIHandler()
+                    if options['uvicorn']:
+                        rate, statuses = self.run_uvicorn(application, options, headers)
+                    else:
+                        async def call():
+                            return await call_asgi(application, options['path'], headers)
+                        rate, statuses = asyncio.run(run_load(call, options['requests'], options['concurrency']))
+                self.stdout.write(f"{label:<12}{rate:>12.0f}   {statuses}")
+        finally:
+            # Entrées du journal d'accès en attente : écrites avant la suppression des utilisateurs
+            access_log_writer.shutdown()
+            seeded.school.delete()
+            SchoolCycle.objects.filter(name=f"Cycle {PREFIX}"[:25]).delete()
+            SubjectGroup.objects.filter(name=f"Groupe {PREFIX}").delete()
+
+    def run_uvicorn(self, application, options, headers):
+        import uvicorn
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(application, host='127.0.0.1', port=port, log_level='warning', lifespan='off'))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        try:
+            async def call(reader, writer):
+                return await call_http(reader, writer, options['path'], headers)
+            call.connect = lambda: asyncio.open_connection('127.0.0.1', port)
+            return asyncio.run(run_load(call, options['requests'], options['concurrency']))
+        finally:
+            server.should_exit = True
+            thread.join()
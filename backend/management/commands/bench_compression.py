@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers.school_manager_serializer import InscriptionSerializer, StudentEvaluationSerializer
+from backend.management.commands._benchmark import rolled_back, seed_school
+from backend.middlewares.compression import ENCODINGS, Compressor
+from backend.models import StudentEvaluation, UserRegistration
+
+BROTLI_QUALITIES = (1, 3, 4, 5, 6, 9, 11)
+GZIP_LEVELS = (1, 3, 6, 9)
+
+
+class Command(BaseCommand):
+    help = (
+        "Taille et coût CPU de la compression Brotli et gzip, par niveau, sur des pages JSON "
+        "réelles de l'API (inscriptions, évaluations), pour régler COMPRESSION_BROTLI_QUALITY "
+        "et COMPRESSION_GZIP_LEVEL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=200, help="Lignes par page JSON compressée")
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if 'br' not in ENCODINGS:
+            raise CommandError("Brotli n'est pas installé (pip install Brotli).")
+        size = options['page_size']
+        with rolled_back():
+            seeded = seed_school('compress', pupils=size, evaluations_per_pupil=1)
+            school = seeded.school
+            pages = [
+                ("Inscriptions", InscriptionSerializer(
+                    UserRegistration.objects.for_school(school).filter(classroom__isnull=False).prefetch_related('children')[:size],
+                    many=True,
+                ).data),
+                ("Évaluations", StudentEvaluationSerializer(StudentEvaluation.objects.for_school(school)[:size], many=True).data),
+            ]
+
+        self.stdout.write(f"{'Page':<14}{'encodage':<10}{'niveau':>7}{'octets':>10}{'taux':>8}{'ms':>8}{'Mo/s':>8}")
+        for label, data in pages:
+            body = JSONRenderer().render(data)
+            self.stdout.write(f"{label:<14}{'identité':<10}{'':>7}{len(body):>10}")
+            for encoding, levels in (('br', BROTLI_QUALITIES), ('gzip', GZIP_LEVELS)):
+                for level in levels:
+                    start = time.perf_counter()
+                    for _ in range(options['repeat']):
+                        compressor = Compressor(encoding, brotli_quality=level, gzip_level=level)
+                        compressed = compressor.compress(body, flush=False) + compressor.finish()
+                    elapsed = (time.perf_counter() - start) / options['repeat']
+                    self.stdout.write(
+                        f"{label:<14}{encoding:<10}{level:>7}{len(compressed):>10}{len(body) / len(compressed):>7.1f}x"
+                        f"{elapsed * 1000:>8.2f}{len(body) / elapsed / 1e6:>8.1f}"
+                    )
@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.contrib.auth import authenticate, login
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from api.views.auth.authentication_api import get_tokens_for_user
+from backend.authentication.login import authenticate_login
+from backend.management.commands._benchmark import rolled_back, seed_school
+from backend.models import School, SchoolYear, User, UserRegistration
+from backend.tenant import current_school_year_cache, school_cache, school_code_cache
+
+PASSWORD = 'motdepasse-bench'
+
+
+def legacy_login(request, username, password, code):
+    """ Ancien chemin de `LoginViewSet.login_user` : jusqu'à cinq requêtes, authenticate() et session """
+    school = School.objects.filter(code=code).first()
+    user = User.objects.filter(username=username, school=school).first()
+    if not user:
+        current_academic_year = SchoolYear.objects.filter(is_current_year=True, school=school).first()
+        user_request = User.objects.filter(username=username).first()
+        user = UserRegistration.objects.filter(school=school, school_year=current_academic_year, user=user_request).first()
+    user = authenticate(request, username=user.username, password=password)
+    login(request, user)
+    return get_tokens_for_user(user, school)
+
+
+def fast_path_login(request, username, password, code):
+    school, user = authenticate_login(request, username, password, code)
+    return get_tokens_for_user(user, school)
+
+
+class Command(BaseCommand):
+    help = (
+        "Reproduit une rafale de connexions (arrivée des élèves le matin) et compare "
+        "l'ancien chemin de connexion au nouveau : temps par connexion et requêtes SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=50, help="Nombre de connexions de la rafale")
+        parser.add_argument(
+            '--real-hasher', action='store_true',
+            help="Utilise le hacheur PBKDF2 configuré (par défaut un hacheur rapide isole le coût base de données)",
+        )
+
+    def handle(self, *args, **options):
+        if options['real_hasher']:
+            self._run(options)
+        else:
+            with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+                self._run(options)
+
+    def _run(self, options):
+        factory = RequestFactory()
+        with rolled_back():
+            seeded = seed_school('login', pupils=options['logins'], password=PASSWORD)
+            code = seeded.school.code
+            usernames = [user.username for user in seeded.pupils]
+
+            def make_request():
+                request = factory.post('/api/admin&manager/account/view/auth/login/')
+                SessionMiddleware(lambda r: None).process_request(request)
+                return request
+
+            self.stdout.write(f"{'Chemin':<10}{'conn.':>7}{'médiane (ms)':>14}{'p95 (ms)':>11}{'req./conn.':>12}{'conn./s':>10}")
+            for label, login_fn in (("ancien", legacy_login), ("nouveau", fast_path_login)):
+                # Rafale à froid : les caches d'établissement sont vides au premier login
+                for cache in (school_cache, school_code_cache, current_school_year_cache):
+                    cache.clear()
+                timings = []
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    for username in usernames:
+                        request = make_request()
+                        start = time.perf_counter()
+                        login_fn(request, username, PASSWORD, code)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    elapsed = time.perf_counter() - started
+                p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+                self.stdout.write(
+                    f"{label:<10}{len(timings):>7}{statistics.median(timings):>14.2f}{p95:>11.2f}"
+                    f"{len(ctx) / len(timings):>12.1f}{len(timings) / elapsed:>10.0f}"
+                )
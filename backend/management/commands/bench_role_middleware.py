@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from backend.authentication.jwt import CachedJWTAuthentication
+from backend.authentication.tokens import tokens_for_user
+from backend.management.commands._benchmark import rolled_back, seed_school
+from backend.middlewares.role_middleware import RoleBasedAccessMiddleware, route_table
+from backend.models import UserRole
+
+# Table de l'ancien middleware : sous-chaînes testées une à une sur le chemin
+LEGACY_PROTECTED_ROUTES = [
+    'school-years', 'active-schoolyear', 'classrooms', 'inscriptions', 'student-evaluations',
+    'school-statistics', 'students', 'pupils', 'subject-attributions', 'school-report-cards',
+    'school-invoices', 'ebooks', 'announcements',
+]
+
+PATHS = {
+    "protégée": '/api/admin&manager/account/view/school-invoices/',
+    "libre": '/api/admin&manager/account/view/subjet-of-school/',
+}
+
+
+def legacy_request(request):
+    """ Ancien chemin : resolve(), boucle de sous-chaînes, JWT décodé par le middleware puis par DRF """
+    resolve(request.path)
+    for route in LEGACY_PROTECTED_ROUTES:
+        if route in request.path:
+            JWTAuthentication().authenticate(request)
+            break
+    return JWTAuthentication().authenticate(request)
+
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark du middleware de contrôle des rôles : coût par requête de l'ancien "
+        "routage (resolve + sous-chaînes, double décodage JWT) et de la table compilée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        factory = RequestFactory()
+        with rolled_back():
+            seeded = seed_school('roles', pupils=1, classrooms=1, subjects=1)
+            user = seeded.teachers[0]
+            user.roles.add(UserRole.objects.get_or_create(name='Directeur')[0])
+            header = f"Bearer {tokens_for_user(user, seeded.school)['access_token']}"
+            route_table.compile()
+
+            # Le « DRF » de la chaîne compilée réutilise le principal du middleware
+            drf = CachedJWTAuthentication()
+            middleware = RoleBasedAccessMiddleware(lambda request: drf.authenticate(request) and HttpResponse())
+
+            self.stdout.write(f"{'Route':<10}{'Chemin':<10}{'µs/requête':>12}{'requêtes SQL':>14}")
+            for route_label, path in PATHS.items():
+                for label, handle in (("ancien", legacy_request), ("compilé", middleware)):
+                    requests = [factory.get(path, HTTP_AUTHORIZATION=header) for _ in range(iterations)]
+                    handle(factory.get(path, HTTP_AUTHORIZATION=header))  # chauffe des caches
+                    with CaptureQueriesContext(connection) as ctx:
+                        start = time.perf_counter()
+                        for request in requests:
+                            handle(request)
+                        elapsed = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{route_label:<10}{label:<10}{elapsed / iterations * 1_000_000:>12.1f}{len(ctx) / iterations:>14.1f}"
+                    )
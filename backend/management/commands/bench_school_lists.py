@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from backend.management.commands._benchmark import measure, rolled_back, seed_school
+from backend.models import Payment, SchoolAbsence, StudentEvaluation, SubjectAttribution, UserRegistration
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare les requêtes des listes par école avant (jointures) et après "
+        "(colonne school dénormalisée) sur un jeu de données annulé en fin d'exécution."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pupils', type=int, default=5000, help="Nombre d'élèves de l'école mesurée")
+        parser.add_argument('--other-schools', type=int, default=1, help="Écoles supplémentaires de même taille")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Création de l'école de test ({options['pupils']} élèves)...")
+            seeded = seed_school('bench', pupils=options['pupils'])
+            for n in range(options['other_schools']):
+                seed_school(f'other{n}', pupils=options['pupils'])
+            school = seeded.school
+
+            shapes = [
+                (
+                    "Évaluations",
+                    StudentEvaluation.objects.filter(inscription__classroom__school=school),
+                    StudentEvaluation.objects.for_school(school),
+                ),
+                (
+                    "Absences",
+                    SchoolAbsence.objects.filter(classroom__school=school),
+                    SchoolAbsence.objects.for_school(school),
+                ),
+                (
+                    "Attributions",
+                    SubjectAttribution.objects.filter(subject__school=school),
+                    SubjectAttribution.objects.for_school(school),
+                ),
+                (
+                    "Paiements",
+                    Payment.objects.filter(invoice__school=school),
+                    Payment.objects.for_school(school),
+                ),
+                (
+                    "Inscriptions",
+                    UserRegistration.objects.filter(classroom__school=school),
+                    UserRegistration.objects.for_school(school).filter(classroom__isnull=False),
+                ),
+            ]
+
+            self.stdout.write(f"{'Liste':<14}{'lignes':>8}{'avant (ms)':>14}{'après (ms)':>14}{'gain':>8}")
+            for label, before, after in shapes:
+                before_ms, _ = measure(lambda: list(before.all()), options['repeat'])
+                after_ms, _ = measure(lambda: list(after.all()), options['repeat'])
+                rows = after.count()
+                self.stdout.write(
+                    f"{label:<14}{rows:>8}{before_ms:>14.1f}{after_ms:>14.1f}{before_ms / after_ms:>7.1f}x"
+                )
@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.serializers.account_serializer import UserSerializer
+from api.views.account_view import ParentsViewSet, PupilsViewSet, TeachersViewSet
+from backend.management.commands._benchmark import measure, rolled_back, seed_school
+from backend.models import UserRegistration
+from backend.tenant import set_request_school
+
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = (
+        "Listes des élèves, parents et enseignants d'une école : filtre par jointure sur le "
+        "libellé du rôle (iexact) et chargement ligne à ligne, contre les vues actuelles "
+        "(EXISTS sur le code du rôle, select_related, rôles préchargés), première et dernière page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--members', type=int, default=5000, help="Nombre de membres de l'école mesurée")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            pupils = options['members'] * 2 // 3
+            self.stdout.write(f"Création de l'école de test ({options['members']} membres)...")
+            seeded = seed_school('members', pupils=pupils, evaluations_per_pupil=0)
+            school = seeded.school
+            factory = APIRequestFactory()
+
+            def before(role_name, page):
+                registrations = UserRegistration.objects.filter(school=school, user__roles__name__iexact=role_name)
+                registrations.count()
+                offset = (page - 1) * PAGE_SIZE
+                return UserSerializer([r.user for r in registrations.order_by('pk')[offset:offset + PAGE_SIZE]], many=True).data
+
+            def after(viewset, page):
+                request = factory.get('/', {'page': page, 'page_size': PAGE_SIZE})
+                force_authenticate(request, user=seeded.teachers[0])
+                set_request_school(request, school)
+                response = viewset.as_view({'get': 'list'})(request)
+                assert response.status_code == 200, response.data
+                return response.data
+
+            self.stdout.write(
+                f"{'Liste':<12}{'membres':>9}{'page':>6}{'avant (ms)':>12}{'requêtes':>10}{'après (ms)':>12}{'requêtes':>10}"
+            )
+            for label, role_name, viewset in (
+                ("Élèves", "Élève", PupilsViewSet),
+                ("Parents", "Parent", ParentsViewSet),
+                ("Enseignants", "Enseignant", TeachersViewSet),
+            ):
+                members = after(viewset, 1)['count']
+                for page in sorted({1, max(1, -(-members // PAGE_SIZE))}):
+                    before_ms, before_queries = measure(lambda: before(role_name, page), options['repeat'])
+                    after_ms, after_queries = measure(lambda: after(viewset, page), options['repeat'])
+                    self.stdout.write(
+                        f"{label:<12}{members:>9}{page:>6}{before_ms:>12.1f}{before_queries:>10}{after_ms:>12.1f}{after_queries:>10}"
+                    )
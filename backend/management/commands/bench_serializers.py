@@ -0,0 +1,62 @@
+import json
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from api.compiled_serializer import compiled_serializer
+from api.serializers.facturation_serializer import SchoolInvoiceSerializer
+from api.serializers.school_manager_serializer import InscriptionSerializer, StudentEvaluationSerializer
+from backend.management.commands._benchmark import measure, rolled_back, seed_school
+from backend.models import SchoolInvoice, StudentEvaluation, UserRegistration
+
+
+def rendered(data):
+    """ JSON final, tel qu'envoyé au client """
+    return json.loads(JSONRenderer().render(data))
+
+
+class Command(BaseCommand):
+    help = (
+        "Débit (lignes/s) des sérialiseurs DRF contre leur version compilée (lignes values()), "
+        "requêtes SQL comprises, sur un jeu de données annulé en fin d'exécution."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pupils', type=int, default=2000, help="Nombre d'élèves de l'école mesurée")
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            self.stdout.write(f"Création de l'école de test ({options['pupils']} élèves)...")
+            seeded = seed_school('serial', pupils=options['pupils'])
+            school = seeded.school
+
+            shapes = [
+                (
+                    InscriptionSerializer,
+                    UserRegistration.objects.for_school(school).filter(classroom__isnull=False).order_by('pk'),
+                ),
+                (StudentEvaluationSerializer, StudentEvaluation.objects.for_school(school).order_by('pk')),
+                (SchoolInvoiceSerializer, SchoolInvoice.objects.for_school(school).order_by('-date', '-pk')),
+            ]
+
+            self.stdout.write(
+                f"{'Sérialiseur':<30}{'lignes':>8}{'DRF (l/s)':>12}{'compilé (l/s)':>15}{'gain':>8}{'requêtes':>12}  identique"
+            )
+            for serializer_class, queryset in shapes:
+                compiled = compiled_serializer(serializer_class)
+                rows = queryset.count()
+
+                def drf():
+                    return serializer_class(queryset.all(), many=True).data
+
+                def fast():
+                    return compiled.serialize(compiled.values(queryset.all()))
+
+                same = rendered(drf()) == rendered(fast())
+                drf_ms, drf_queries = measure(drf, options['repeat'])
+                fast_ms, fast_queries = measure(fast, options['repeat'])
+                self.stdout.write(
+                    f"{serializer_class.__name__:<30}{rows:>8}{rows / drf_ms * 1000:>12.0f}{rows / fast_ms * 1000:>15.0f}"
+                    f"{drf_ms / fast_ms:>7.1f}x{f'{drf_queries} → {fast_queries}':>12}  {'oui' if same else 'NON'}"
+                )
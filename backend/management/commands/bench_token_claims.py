@@ -0,0 +1,60 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api.serializers.school_manager_serializer import SchoolSerializer
+from backend.authentication.tokens import tokens_for_user
+from backend.management.commands._benchmark import rolled_back, seed_school
+
+DESCRIPTION = (
+    "Établissement d'enseignement général accueillant les élèves du primaire au lycée, "
+    "avec cantine, bibliothèque, salle informatique et activités périscolaires. "
+) * 3
+
+
+def legacy_tokens_for_user(user, school):
+    """ Ancien format : l'école sérialisée complète dans le refresh et l'access token """
+    refresh = RefreshToken.for_user(user)
+    refresh['school'] = SchoolSerializer(school).data
+    return {
+        'refresh_token': str(refresh),
+        'access_token': str(refresh.access_token),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure la taille de l'en-tête Authorization et le temps de décodage de "
+        "l'access token, avec l'école sérialisée (ancien format) puis les claims compacts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--decodes', type=int, default=20000, help="Nombre de décodages mesurés par format")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            seeded = seed_school('token', pupils=1, classrooms=1, subjects=1)
+            school = seeded.school
+            school.description = DESCRIPTION
+            school.email = "contact@ecole-exemple.cg"
+            school.phone = "+242 06 000 00 00"
+            school.website = "https://ecole-exemple.cg"
+            school.logo = "logos/ecole-exemple.png"
+            school.save()
+            user = seeded.pupils[0]
+
+            self.stdout.write(f"{'Format':<10}{'en-tête (octets)':>18}{'décodage (µs)':>16}")
+            results = {}
+            for label, issue in (("ancien", legacy_tokens_for_user), ("compact", tokens_for_user)):
+                access = issue(user, school)['access_token']
+                header = f"Authorization: Bearer {access}"
+                start = time.perf_counter()
+                for _ in range(options['decodes']):
+                    AccessToken(access)
+                decode_us = (time.perf_counter() - start) / options['decodes'] * 1_000_000
+                results[label] = (len(header.encode()), decode_us)
+                self.stdout.write(f"{label:<10}{len(header.encode()):>18}{decode_us:>16.1f}")
+
+            (old_size, old_us), (new_size, new_us) = results['ancien'], results['compact']
+            self.stdout.write(f"\nEn-tête réduit de {100 * (1 - new_size / old_size):.0f} %, décodage {old_us / new_us:.1f}x plus rapide.")
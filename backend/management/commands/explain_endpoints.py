@@ -0,0 +1,109 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.generics import GenericAPIView
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.urls import router
+from backend.models import AccessLog, Message, School, User, UserRegistration
+from backend.models.account import role_exists
+from backend.tenant import get_current_school_year, set_request_school
+
+
+def _extra_queries(school, user):
+    """
+    Requêtes chaudes exécutées par des ViewSet sans `get_queryset()`
+    (statistiques, élèves de l'année en cours, messagerie, journal d'accès),
+    construites comme dans les vues. Les listes par rôle passent par le routeur.
+    """
+    current_school_year = get_current_school_year(school)
+    registrations = UserRegistration.objects.for_school(school)
+    return {
+        "active-students-of-school": registrations.filter(school_year=current_school_year, classroom__isnull=False),
+        "school-statistics (enseignants)": registrations.filter(role_exists('teacher', 'user_id')),
+        "school-statistics (élèves)": registrations.filter(
+            role_exists('pupil', 'user_id'), classroom__isnull=False, is_active=True, school_year=current_school_year,
+        ),
+        "school-statistics (parents)": registrations.filter(role_exists('parent', 'user_id')),
+        "message (non lus)": Message.objects.filter(recipient=user, is_read=False),
+        "access-log (récents)": AccessLog.objects.order_by('-timestamp')[:100],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute EXPLAIN sur le queryset de chaque endpoint enregistré dans le routeur "
+        "de l'API et signale les parcours complets de table."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--school', type=int, help="Identifiant de l'école utilisée (première école par défaut)")
+        parser.add_argument('--user', type=int, help="Identifiant de l'utilisateur connecté (premier de l'école par défaut)")
+        parser.add_argument('--verbose-plan', action='store_true', help="Affiche le plan complet de chaque requête")
+        parser.add_argument('--fail-on-scan', action='store_true', help="Code de sortie non nul si un parcours complet est détecté")
+
+    def handle(self, *args, **options):
+        school = School.objects.filter(pk=options['school']).first() if options['school'] else School.objects.order_by('pk').first()
+        if school is None:
+            raise CommandError("Aucune école trouvée : créez des données avant de lancer l'analyse.")
+        users = User.objects.filter(school=school)
+        user = users.filter(pk=options['user']).first() if options['user'] else users.order_by('pk').first()
+        if user is None:
+            raise CommandError("Aucun utilisateur trouvé pour cette école.")
+
+        self.stdout.write(f"Base : {connection.vendor} — école #{school.pk}, utilisateur #{user.pk}\n")
+
+        querysets = []
+        for prefix, viewset, basename in router.registry:
+            if not issubclass(viewset, GenericAPIView):
+                continue
+            try:
+                querysets.append((basename, self._viewset_queryset(viewset, school, user)))
+            except Exception as exc:
+                self.stdout.write(self.style.WARNING(f"{basename:<32} ignoré : {exc}"))
+        querysets.extend(_extra_queries(school, user).items())
+
+        flagged = []
+        for name, queryset in querysets:
+            if not hasattr(queryset, 'explain'):
+                self.stdout.write(self.style.WARNING(f"{name:<32} ignoré : get_queryset() ne retourne pas un QuerySet"))
+                continue
+            plan, scans = self._explain(queryset)
+            if scans:
+                flagged.append(name)
+                self.stdout.write(self.style.ERROR(f"{name:<32} parcours complet : {', '.join(scans)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name:<32} OK"))
+            if options['verbose_plan'] or scans:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        self.stdout.write(f"\n{len(flagged)} requête(s) avec parcours complet sur {len(querysets)}.")
+        if flagged and options['fail_on_scan']:
+            raise CommandError("Parcours complets détectés : " + ", ".join(flagged))
+
+    def _viewset_queryset(self, viewset, school, user):
+        request = Request(APIRequestFactory().get('/'))
+        request.user = user
+        set_request_school(request, school)
+        view = viewset(request=request, args=(), kwargs={}, format_kwarg=None, action='list')
+        return view.get_queryset()
+
+    def _explain(self, queryset):
+        """ Retourne le plan de la requête et les tables parcourues intégralement """
+        if connection.vendor == 'mysql':
+            plan = queryset.explain(format='json')
+            scans = re.findall(r'"table_name": "(\w+)",\s*"access_type": "ALL"', plan)
+            return plan, scans
+        plan = queryset.explain()
+        if connection.vendor == 'sqlite':
+            # "SCAN x USING INDEX ..." est un parcours d'index, seul "SCAN x" lit toute la table
+            return plan, [
+                line.split('SCAN ', 1)[1].split()[0]
+                for line in plan.splitlines() if 'SCAN ' in line and 'USING' not in line
+            ]
+        if connection.vendor == 'postgresql':
+            return plan, re.findall(r'Seq Scan on (\w+)', plan)
+        return plan, []
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from backend.authentication.blacklist import request_rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime par tranches les tokens expirés (OutstandingToken et BlacklistedToken associés). "
+        "À planifier quotidiennement (cron), à la place de flushexpiredtokens qui supprime tout d'un bloc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Nombre de tokens supprimés par transaction")
+        parser.add_argument('--pause', type=float, default=0.1, help="Pause en secondes entre deux tranches")
+        parser.add_argument('--grace-hours', type=int, default=0, help="Conserve les tokens expirés depuis moins de N heures")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timezone.timedelta(hours=options['grace_hours'])
+        expired = OutstandingToken.objects.filter(expires_at__lte=cutoff).order_by('pk')
+        deleted_tokens = deleted_blacklisted = 0
+        last_pk = 0
+
+        while True:
+            pks = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            with transaction.atomic():
+                # Entrées de liste noire d'abord : la cascade n'a plus rien à collecter
+                deleted_blacklisted += BlacklistedToken.objects.filter(token_id__in=pks).delete()[0]
+                deleted_tokens += OutstandingToken.objects.filter(pk__in=pks).delete()[0]
+            last_pk = pks[-1]
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        if deleted_blacklisted:
+            # Les filtres de Bloom des processus sont reconstruits sans les JTI purgés
+            request_rebuild()
+        self.stdout.write(f"{deleted_tokens} token(s) expiré(s) supprimé(s), dont {deleted_blacklisted} en liste noire.")
@@ -0,0 +1,160 @@
+import math
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from backend.models import AccessLog, AccessLogArchive, AccessLogRollup
+from backend.monitoring.routes import route_for_path
+
+ROLLUP_FIELDS = [
+    'request_count', 'client_error_count', 'error_count', 'total_response_time',
+    'p50_response_time', 'p95_response_time', 'p99_response_time', 'max_response_time',
+]
+
+
+def percentile(sorted_values, rank):
+    """ Percentile au rang le plus proche d'une liste triée """
+    return sorted_values[max(0, math.ceil(rank / 100 * len(sorted_values)) - 1)]
+
+
+def build_rollup(minute, route, method, statuses, times):
+    times.sort()
+    return AccessLogRollup(
+        minute=minute,
+        route=route,
+        method=method,
+        request_count=len(times),
+        client_error_count=sum(1 for status in statuses if 400 <= status < 500),
+        error_count=sum(1 for status in statuses if status >= 500),
+        total_response_time=sum(times),
+        p50_response_time=percentile(times, 50),
+        p95_response_time=percentile(times, 95),
+        p99_response_time=percentile(times, 99),
+        max_response_time=times[-1],
+    )
+
+
+def rollups_for(rows):
+    """ Agrégats de lignes quelconques (timestamp, route, path, method, status_code, response_time) """
+    buckets = {}
+    for timestamp, route, path, method, status_code, response_time in rows:
+        key = (timestamp.replace(second=0, microsecond=0), route or route_for_path(path), method)
+        statuses, times = buckets.setdefault(key, ([], []))
+        statuses.append(status_code)
+        times.append(response_time)
+    return [build_rollup(*key, *values) for key, values in buckets.items()]
+
+
+def merge_rollups(rollups):
+    """
+    Ajoute des agrégats aux minutes existantes au lieu de les remplacer : utilisé pour les
+    lignes arrivées après l'archivage de leur minute, dont les autres lignes n'existent plus.
+    Les compteurs et la somme des temps sont exacts ; les percentiles fusionnés sont majorés.
+    """
+    existing = {
+        (rollup.minute, rollup.route, rollup.method): rollup
+        for rollup in AccessLogRollup.objects.select_for_update().filter(minute__in={rollup.minute for rollup in rollups})
+    }
+    created, updated = [], []
+    for rollup in rollups:
+        current = existing.get((rollup.minute, rollup.route, rollup.method))
+        if current is None:
+            created.append(rollup)
+            continue
+        for field in ('request_count', 'client_error_count', 'error_count', 'total_response_time'):
+            setattr(current, field, getattr(current, field) + getattr(rollup, field))
+        for field in ('p50_response_time', 'p95_response_time', 'p99_response_time', 'max_response_time'):
+            setattr(current, field, max(getattr(current, field), getattr(rollup, field)))
+        updated.append(current)
+    AccessLogRollup.objects.bulk_create(created)
+    AccessLogRollup.objects.bulk_update(updated, ROLLUP_FIELDS)
+
+
+def parse_datetime(value):
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Date invalide : {value}")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class Command(BaseCommand):
+    help = (
+        "Agrège le journal d'accès par minute, route et méthode (nombre, erreurs, p50/p95/p99) "
+        "dans AccessLogRollup. Idempotent : les minutes déjà agrégées sont recalculées, sauf celles "
+        "déjà archivées (archive_access_logs), dont les lignes brutes ont été supprimées. "
+        "À planifier toutes les quelques minutes (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help="Début (ISO 8601) ; par défaut la dernière minute agrégée")
+        parser.add_argument('--until', help="Fin exclue (ISO 8601) ; par défaut maintenant moins le délai de stabilisation")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--max-id', type=int, help="Ignore les lignes d'identifiant supérieur (utilisé par archive_access_logs)")
+
+    def handle(self, *args, **options):
+        # Les écritures différées arrivent avec retard : les dernières minutes ne sont pas figées
+        settle = timedelta(seconds=getattr(settings, 'ACCESS_LOG_ROLLUP_DELAY', 300))
+        until = parse_datetime(options['until']) if options['until'] else timezone.now() - settle
+        until = until.replace(second=0, microsecond=0)
+
+        if options['since']:
+            since = parse_datetime(options['since'])
+        else:
+            since = (
+                AccessLogRollup.objects.aggregate(last=Max('minute'))['last']
+                or AccessLog.objects.aggregate(first=Min('timestamp'))['first']
+            )
+        # Minutes archivées : seules les lignes arrivées en retard subsistent, elles remplaceraient
+        # l'agrégat complet. archive_access_logs les y fusionne au moment de les supprimer
+        archived_until = AccessLogArchive.last_cutoff()
+        if since is not None and archived_until is not None:
+            since = max(since, archived_until)
+        if since is None or since >= until:
+            self.stdout.write("Aucune entrée à agréger.")
+            return
+        since = since.replace(second=0, microsecond=0)
+
+        rows = AccessLog.objects.filter(timestamp__gte=since, timestamp__lt=until)
+        if options['max_id'] is not None:
+            rows = rows.filter(pk__lte=options['max_id'])
+        rows = (
+            rows.order_by('timestamp')
+            .values_list('timestamp', 'route', 'path', 'method', 'status_code', 'response_time')
+            .iterator(chunk_size=options['chunk_size'])
+        )
+
+        pending = []
+        buckets = {}
+        current_minute = None
+        minutes = 0
+        for timestamp, route, path, method, status_code, response_time in rows:
+            minute = timestamp.replace(second=0, microsecond=0)
+            if minute != current_minute:
+                pending.extend(build_rollup(current_minute, *key, *values) for key, values in buckets.items())
+                buckets = {}
+                current_minute = minute
+                minutes += 1
+                if len(pending) >= options['chunk_size']:
+                    self.save(pending)
+                    pending = []
+            # Lignes antérieures au champ `route` : la route est retrouvée depuis le chemin
+            statuses, times = buckets.setdefault((route or route_for_path(path), method), ([], []))
+            statuses.append(status_code)
+            times.append(response_time)
+        pending.extend(build_rollup(current_minute, *key, *values) for key, values in buckets.items())
+        self.save(pending)
+
+        self.stdout.write(f"{minutes} minute(s) agrégée(s) entre {since.isoformat()} et {until.isoformat()}.")
+
+    def save(self, rollups):
+        if rollups:
+            AccessLogRollup.objects.bulk_create(
+                rollups,
+                update_conflicts=True,
+                unique_fields=['minute', 'route', 'method'],
+                update_fields=ROLLUP_FIELDS,
+            )
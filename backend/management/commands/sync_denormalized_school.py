@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from backend.school_sync import school_sources
+
+
+class Command(BaseCommand):
+    help = (
+        "Recopie l'école des salles de classe, inscriptions et factures sur les évaluations, absences, "
+        "attributions et paiements, par tranches. À lancer après une mise à jour en masse (update(), "
+        "bulk_create) de ces parents, que les signaux de backend.school_sync ne voient pas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help="Nombre de lignes mises à jour par requête")
+
+    def handle(self, *args, **options):
+        for model, expected_school in school_sources():
+            changed = 0
+            last_pk = 0
+            while True:
+                pks = list(model.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:options['batch_size']])
+                if not pks:
+                    break
+                rows = model.objects.filter(pk__in=pks).annotate(expected_school=expected_school)
+                # Seules les lignes désynchronisées sont réécrites
+                stale = [pk for pk, school_id, expected in rows.values_list('pk', 'school_id', 'expected_school') if school_id != expected]
+                if stale:
+                    changed += model.objects.filter(pk__in=stale).update(school=expected_school)
+                last_pk = pks[-1]
+            self.stdout.write(f"{model.__name__} : {changed} ligne(s) rattachée(s) à leur école.")
@@ -0,0 +1,59 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.deprecation import MiddlewareMixin
+
+
+class HybridMiddlewareMixin:
+    """
+    Équivalent de MiddlewareMixin utilisable en WSGI comme en ASGI sans
+    passage par un thread : en mode asynchrone, `process_request`,
+    `process_view` et `process_response` sont appelés directement depuis la
+    boucle d'événements. Ils ne doivent donc faire aucune E/S bloquante ; un
+    middleware qui en a besoin redéfinit `aprocess_request` / `aprocess_view`
+    / `aprocess_response` avec les API asynchrones (cache.a*, ORM a*).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if isinstance(self, MiddlewareMixin):
+            # Middleware de Django dérivé : son __init__ prépare aussi son état (SessionStore, réglages…)
+            super().__init__(get_response)
+        else:
+            self.get_response = get_response
+            self.async_mode = iscoroutinefunction(get_response)
+            if self.async_mode:
+                markcoroutinefunction(self)
+        if self.async_mode and hasattr(self, 'process_view'):
+            # Le gestionnaire appelle alors la coroutine au lieu de passer par un thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = None
+        if hasattr(self, 'process_request'):
+            response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
+
+    async def aprocess_request(self, request):
+        if hasattr(self, 'process_request'):
+            return self.process_request(request)
+        return None
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        return type(self).process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_response(self, request, response):
+        if hasattr(self, 'process_response'):
+            return self.process_response(request, response)
+        return response
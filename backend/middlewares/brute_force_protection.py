@@ -1,67 +1,113 @@
-import time
-from django.core.cache import cache
+import json
+import logging
+from urllib.parse import unquote
+
+from django.conf import settings
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
+from django.urls import NoReverseMatch, reverse
+
+from backend.authentication.rate_limit import get_client_ip, login_alerts, login_limiter
+from backend.middlewares.base import HybridMiddlewareMixin
+
+logger = logging.getLogger(__name__)
 
-class BruteForceProtectionMiddleware(MiddlewareMixin):
+
+class BruteForceProtectionMiddleware(HybridMiddlewareMixin):
     """
     Middleware pour protéger contre les attaques Brute-Force sur la connexion.
-    """
 
-    MAX_ATTEMPTS = 5  # Nombre maximal de tentatives avant blocage
-    BLOCK_TIME = 300  # Temps de blocage en secondes (5 minutes)
+    Les échecs sont comptés par IP et nom d'utilisateur dans un limiteur à
+    fenêtre glissante partagé entre processus (cache Django). Les échecs par
+    code d'école ne bloquent pas : un seuil anormal est signalé dans le journal.
+    """
 
-    def process_request(self, request):
-        """ Vérifie si l'IP ou l'utilisateur est bloqué avant d'autoriser la requête """
-        
-        # On cible uniquement l'endpoint de connexion
-        if request.path.startswith("/api/auth/login/") and request.method == "POST":
-            ip = self.get_client_ip(request)
-            username = request.POST.get("username", "")
+    # Statuts comptés comme des échecs : identifiants invalides ou inconnus
+    FAILURE_STATUSES = (400, 401, 404)
 
-            # Vérifier si l'IP est bloquée
-            if cache.get(f"blocked_ip:{ip}"):
-                return JsonResponse({"error": "Trop de tentatives. Réessayez plus tard."}, status=429)
+    # Routes de connexion protégées (noms d'URL)
+    LOGIN_URL_NAMES = getattr(settings, 'LOGIN_RATE_LIMIT_URL_NAMES', ('auth-login-user', 'auth_async_login'))
 
-            # Vérifier si l'utilisateur est bloqué
-            if cache.get(f"blocked_user:{username}"):
-                return JsonResponse({"error": "Trop de tentatives. Réessayez plus tard."}, status=429)
+    _login_paths = None
 
-    def process_response(self, request, response):
-        """ Gère l'enregistrement des tentatives de connexion échouées """
+    @classmethod
+    def login_paths(cls):
+        if cls._login_paths is None:
+            paths = set()
+            for name in cls.LOGIN_URL_NAMES:
+                try:
+                    # reverse() encode les caractères réservés (« & » de admin&manager)
+                    paths.add(unquote(reverse(name)))
+                except NoReverseMatch:
+                    pass
+            cls._login_paths = frozenset(paths)
+        return cls._login_paths
 
-        if request.path.startswith("/api/auth/login/") and request.method == "POST":
-            ip = self.get_client_ip(request)
-            username = request.POST.get("username", "")
+    def is_login_attempt(self, request):
+        return request.method == "POST" and request.path in self.login_paths()
 
-            # Si la connexion échoue, on enregistre l'échec
-            if response.status_code in [400, 401]:
-                self.increment_attempts(ip, username)
+    def process_request(self, request):
+        """ Vérifie si l'IP ou l'utilisateur est bloqué avant d'autoriser la requête """
+        if not self.is_login_attempt(request):
+            return None
 
-        return response
+        request._login_identities = self.get_identities(request)
+        return self.blocked_response(login_limiter.retry_after(request._login_identities))
 
-    def get_client_ip(self, request):
-        """ Récupère l'adresse IP du client """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            return x_forwarded_for.split(',')[0]
-        return request.META.get('REMOTE_ADDR')
+    async def aprocess_request(self, request):
+        if not self.is_login_attempt(request):
+            return None
 
-    def increment_attempts(self, ip, username):
-        """ Incrémente les tentatives de connexion et bloque en cas d'abus """
+        request._login_identities = self.get_identities(request)
+        return self.blocked_response(await login_limiter.aretry_after(request._login_identities))
 
-        ip_attempts = cache.get(f"attempts_ip:{ip}", 0)
-        user_attempts = cache.get(f"attempts_user:{username}", 0)
+    def blocked_response(self, retry_after):
+        if not retry_after:
+            return None
+        response = JsonResponse({"error": "Trop de tentatives. Réessayez plus tard."}, status=429)
+        response["Retry-After"] = str(retry_after)
+        return response
 
-        ip_attempts += 1
-        user_attempts += 1
+    def process_response(self, request, response):
+        """ Gère l'enregistrement des tentatives de connexion échouées """
+        identities = getattr(request, '_login_identities', None)
+        if identities and response.status_code in self.FAILURE_STATUSES:
+            login_limiter.hit(identities)
+            self.report(identities, login_alerts.hit(identities))
+        return response
 
-        # Met à jour le cache avec un TTL de 5 minutes
-        cache.set(f"attempts_ip:{ip}", ip_attempts, timeout=self.BLOCK_TIME)
-        cache.set(f"attempts_user:{username}", user_attempts, timeout=self.BLOCK_TIME)
+    async def aprocess_response(self, request, response):
+        identities = getattr(request, '_login_identities', None)
+        if identities and response.status_code in self.FAILURE_STATUSES:
+            await login_limiter.ahit(identities)
+            self.report(identities, await login_alerts.ahit(identities))
+        return response
 
-        if ip_attempts >= self.MAX_ATTEMPTS:
-            cache.set(f"blocked_ip:{ip}", True, timeout=self.BLOCK_TIME)
+    def report(self, identities, counts):
+        for dimension in login_alerts.alerts(counts):
+            limit, window = login_alerts.limits[dimension]
+            logger.warning(
+                "Échecs de connexion anormaux : %s échecs en %s s pour %s=%s",
+                limit, window, dimension, identities[dimension],
+            )
+
+    def get_identities(self, request):
+        data = self.get_credentials(request)
+        return {
+            'ip': self.get_client_ip(request),
+            'username': data.get("username") or "",
+            'school': data.get("school_code") or "",
+        }
+
+    def get_credentials(self, request):
+        """ Lit les identifiants du corps de la requête, JSON ou formulaire """
+        if request.content_type == "application/json":
+            try:
+                data = json.loads(request.body or b"{}")
+            except ValueError:
+                return {}
+            return data if isinstance(data, dict) else {}
+        return request.POST
 
-        if user_attempts >= self.MAX_ATTEMPTS:
-            cache.set(f"blocked_user:{username}", True, timeout=self.BLOCK_TIME)
+    def get_client_ip(self, request):
+        """ Récupère l'adresse IP du client (entrée X-Forwarded-For du proxy de confiance) """
+        return get_client_ip(request)
@@ -0,0 +1,58 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import clickjacking, common, csrf, security
+
+from backend.middlewares.base import HybridMiddlewareMixin
+
+# Middlewares de Django en version hybride : en ASGI, leurs traitements purement
+# en mémoire restent sur la boucle d'événements ; seules les E/S (sauvegarde de
+# la session, lecture d'un corps de formulaire) passent par un thread.
+
+
+class SecurityMiddleware(HybridMiddlewareMixin, security.SecurityMiddleware):
+    pass
+
+
+class SessionMiddleware(HybridMiddlewareMixin, sessions.SessionMiddleware):
+    """ La session n'est sauvegardée (en base) que si elle a été modifiée """
+
+    async def aprocess_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is not None and (session.modified or settings.SESSION_SAVE_EVERY_REQUEST):
+            return await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+        return self.process_response(request, response)
+
+
+class CommonMiddleware(HybridMiddlewareMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(HybridMiddlewareMixin, csrf.CsrfViewMiddleware):
+    """ Les méthodes non sûres lisent le corps de la requête (request.POST) """
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        method = csrf.CsrfViewMiddleware.process_view
+        if request.method in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            return method(self, request, view_func, view_args, view_kwargs)
+        return await sync_to_async(method, thread_sensitive=True)(self, request, view_func, view_args, view_kwargs)
+
+
+class AuthenticationMiddleware(HybridMiddlewareMixin, auth.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(HybridMiddlewareMixin, messages.MessageMiddleware):
+    """ Le stockage des messages (cookie puis session) n'est écrit que s'il a servi """
+
+    async def aprocess_response(self, request, response):
+        storage = getattr(request, '_messages', None)
+        if storage is not None and (storage.used or storage.added_new):
+            return await sync_to_async(self.process_response, thread_sensitive=True)(request, response)
+        return self.process_response(request, response)
+
+
+class XFrameOptionsMiddleware(HybridMiddlewareMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
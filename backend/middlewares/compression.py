@@ -0,0 +1,174 @@
+import zlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+from backend.middlewares.base import HybridMiddlewareMixin
+from backend.monitoring.metrics import registry
+from backend.monitoring.routes import route_for_request
+
+try:
+    import brotli
+except ImportError:  # Brotli absent : gzip seul
+    brotli = None
+
+# Encodages proposés, par ordre de préférence du serveur à qualité égale
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+@lru_cache(maxsize=256)
+def negotiate_encoding(accept_encoding):
+    """
+    Encodage à utiliser pour un en-tête Accept-Encoding (valeurs q comprises,
+    `*` pour les encodages non cités), ou None. Les en-têtes des navigateurs
+    et applications étant peu nombreux, le résultat est mis en cache.
+    """
+    qualities = {}
+    for item in accept_encoding.lower().split(','):
+        name, *params = (part.strip() for part in item.split(';'))
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            qualities[name] = quality
+    default = qualities.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """ Compression incrémentale : `compress` par morceau (vidé aussitôt), `finish` en fin de flux """
+
+    def __init__(self, encoding, brotli_quality, gzip_level):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=True):
+        if self.encoding == 'br':
+            return self._compressor.process(data) + (self._compressor.flush() if flush else b'')
+        return self._compressor.compress(data) + (self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else b'')
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware(HybridMiddlewareMixin):
+    """
+    Compression Brotli ou gzip des réponses JSON, selon l'en-tête
+    Accept-Encoding du client (Brotli préféré à qualité égale).
+
+    Les réponses sous `COMPRESSION_MIN_SIZE` octets sont envoyées telles
+    quelles ; les réponses en flux (`StreamingHttpResponse`, synchrones ou
+    asynchrones) sont compressées morceau par morceau si
+    `COMPRESSION_STREAMING` est actif. `COMPRESSION_BROTLI_QUALITY` (0-11) et
+    `COMPRESSION_GZIP_LEVEL` (1-9) arbitrent entre CPU et octets envoyés. Le
+    taux de compression de chaque réponse alimente l'histogramme
+    `elimu_http_compression_ratio` de /metrics.
+
+    À placer juste après PerformanceMiddleware : la taille mesurée des
+    réponses est alors celle envoyée sur le réseau.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 1024)
+        self.streaming = getattr(settings, 'COMPRESSION_STREAMING', True)
+        self.brotli_quality = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+        self.gzip_level = getattr(settings, 'COMPRESSION_GZIP_LEVEL', 6)
+        self.content_types = frozenset(getattr(settings, 'COMPRESSION_CONTENT_TYPES', ('application/json',)))
+
+    def compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code == 206:
+            return False
+        media_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        return media_type in self.content_types or media_type.endswith('+json')
+
+    def process_response(self, request, response):
+        if not self.compressible(response):
+            return response
+        if response.streaming:
+            if not self.streaming:
+                return response
+        elif len(response.content) < self.min_size:
+            return response
+
+        # La réponse dépend de l'en-tête, même quand elle n'est pas compressée
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        compressor = Compressor(encoding, self.brotli_quality, self.gzip_level)
+        if response.streaming:
+            self.compress_stream(request, response, compressor)
+        else:
+            original_size = len(response.content)
+            compressed = compressor.compress(response.content, flush=False) + compressor.finish()
+            if len(compressed) >= original_size:
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+            self.observe(request, original_size, len(compressed))
+
+        # Le corps n'est plus identique octet pour octet (RFC 9110, 8.8.3)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, request, response, compressor):
+        """ Remplace le flux de la réponse par sa version compressée, chaque morceau étant envoyé aussitôt """
+        sizes = [0, 0]
+
+        def compress(chunk):
+            data = compressor.compress(chunk)
+            sizes[0] += len(chunk)
+            sizes[1] += len(data)
+            return data
+
+        def finish():
+            data = compressor.finish()
+            sizes[1] += len(data)
+            self.observe(request, *sizes)
+            return data
+
+        if response.is_async:
+            async def content(stream=response.streaming_content):
+                async for chunk in stream:
+                    data = compress(chunk)
+                    if data:
+                        yield data
+                yield finish()
+        else:
+            def content(stream=response.streaming_content):
+                for chunk in stream:
+                    data = compress(chunk)
+                    if data:
+                        yield data
+                yield finish()
+
+        response.streaming_content = content()
+        del response.headers['Content-Length']
+
+    def observe(self, request, original_size, compressed_size):
+        if compressed_size:
+            registry.observe(
+                'elimu_http_compression_ratio', route_for_request(request), request.method,
+                original_size / compressed_size,
+            )
@@ -1,20 +1,21 @@
 import time
 import logging
-from django.utils.deprecation import MiddlewareMixin
+from django.conf import settings
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+from django.contrib.auth.middleware import auser
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
+from backend.authentication.rate_limit import get_client_ip
+from backend.middlewares.base import HybridMiddlewareMixin
 from backend.models import AccessLog  # Assurez-vous que le chemin est correct
+from backend.monitoring.access_log_writer import access_log_writer
+from backend.monitoring.routes import route_for_request
 
-# Configuration du logger
+# Configuré par settings.LOGGING : file non bloquante vers un fichier JSON lines
 logger = logging.getLogger("access_logger")
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 
-file_handler = logging.FileHandler("access_logs.log")  # Enregistrement dans un fichier
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
-logger.setLevel(logging.INFO)
-
-class AccessLoggingMiddleware(MiddlewareMixin):
+class AccessLoggingMiddleware(HybridMiddlewareMixin):
     """
     Middleware pour journaliser les requêtes entrantes et sortantes.
     """
@@ -25,34 +26,67 @@ class AccessLoggingMiddleware(MiddlewareMixin):
 
     def process_response(self, request, response):
         """ Journalise les informations sur chaque requête traitée """
+        user = request.user if hasattr(request, "user") and request.user.is_authenticated else None
+        entry = self.log(request, response, user)
+        if entry is not None:
+            AccessLog.objects.create(**entry)
+        return response
+
+    async def aprocess_response(self, request, response):
+        # En ASGI, l'utilisateur de session pas encore chargé l'est via l'API asynchrone
+        user = getattr(request, "user", None)
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            user = await auser(request)
+        entry = self.log(request, response, user if user is not None and user.is_authenticated else None)
+        if entry is not None:
+            await AccessLog.objects.acreate(**entry)
+        return response
+
+    def log(self, request, response, user):
+        """
+        Journalise la requête ; retourne l'entrée AccessLog à insérer de façon
+        synchrone, ou None si elle est confiée à l'écriture différée.
+        """
 
         # Calcul du temps de réponse
         duration = time.time() - getattr(request, "start_time", time.time())
 
-        # Récupération de l'utilisateur
-        user = request.user if hasattr(request, "user") and request.user.is_authenticated else None
-
         # Récupération de l'adresse IP
         ip = self.get_client_ip(request)
 
-        # Sauvegarde en base de données
-        AccessLog.objects.create(
-            user=user,
-            ip_address=ip,
-            method=request.method,
-            path=request.get_full_path(),
-            status_code=response.status_code,
-            response_time=round(duration, 3),
-        )
+        # Sauvegarde en base de données : déposée dans la file d'écriture différée,
+        # insérée par lots hors du cycle de la requête
+        entry = {
+            'user_id': user.pk if user else None,
+            'ip_address': ip,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': route_for_request(request),
+            'status_code': response.status_code,
+            'response_time': round(duration, 3),
+            'timestamp': timezone.now(),
+        }
+        write_behind = getattr(settings, 'ACCESS_LOG_WRITE_BEHIND', True)
+        if write_behind:
+            access_log_writer.submit(entry)
 
-        # Enregistrement dans le fichier log
-        logger.info(f"User: {user}, IP: {ip}, {request.method} {request.get_full_path()} -> {response.status_code} ({round(duration, 3)}s)")
+        # Enregistrement dans le fichier log : formaté plus tard, hors du thread de la requête
+        extra = {
+            'user_id': entry['user_id'],
+            'ip': ip,
+            'method': request.method,
+            'path': entry['path'],
+            'route': entry['route'],
+            'status_code': response.status_code,
+            'response_time': entry['response_time'],
+        }
+        perf = getattr(request, 'perf', None)  # Mesures de PerformanceMiddleware
+        if perf is not None:
+            extra.update(db_queries=perf.db_queries, db_time=round(perf.db_time, 4))
+        logger.info("%s %s -> %s (%.3fs)", request.method, entry['path'], response.status_code, duration, extra=extra)
 
-        return response
+        return None if write_behind else entry
 
     def get_client_ip(self, request):
-        """ Récupère l'adresse IP du client """
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            return x_forwarded_for.split(',')[0]
-        return request.META.get('REMOTE_ADDR')
+        """ Adresse IP du client, résolue comme pour la limitation des connexions """
+        return get_client_ip(request)
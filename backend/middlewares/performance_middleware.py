@@ -0,0 +1,69 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from backend.monitoring.metrics import RequestMetrics, current_request_metrics, registry
+from backend.monitoring.routes import route_for_request
+from backend.monitoring.sql import observe_queries
+
+
+class PerformanceMiddleware:
+    """
+    Instrumente chaque requête : nombre et durée des requêtes SQL (via
+    `execute_wrapper`), temps de sérialisation et de rendu DRF, taille de la
+    réponse. Les mesures sont renvoyées dans l'en-tête `Server-Timing` et
+    agrégées dans les histogrammes par route exportés sur /metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'SERVER_TIMING_HEADER', True)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = self.start(request)
+        token = current_request_metrics.set(metrics)
+        try:
+            with observe_queries(metrics):
+                response = self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        token = current_request_metrics.set(metrics)
+        try:
+            with observe_queries(metrics):
+                response = await self.get_response(request)
+        finally:
+            current_request_metrics.reset(token)
+        return self.finish(request, response, metrics)
+
+    def start(self, request):
+        request.perf = RequestMetrics()
+        return request.perf
+
+    def finish(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.start
+        size = None if response.streaming else len(response.content)
+        registry.observe_request(route_for_request(request), request.method, metrics, duration, size)
+        if self.server_timing:
+            response['Server-Timing'] = self.server_timing_header(metrics, duration)
+        return response
+
+    @staticmethod
+    def server_timing_header(metrics, duration):
+        return ', '.join((
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"',
+            f'serialize;dur={metrics.serializer_time * 1000:.1f}',
+            f'render;dur={metrics.render_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ))
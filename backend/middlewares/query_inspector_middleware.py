@@ -0,0 +1,80 @@
+import logging
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from backend.monitoring.query_inspector import QueryBudgetExceeded, QueryInspector, get_query_budget
+from backend.monitoring.sql import observe_queries
+
+logger = logging.getLogger('backend.query_inspector')
+
+
+class QueryInspectorMiddleware:
+    """
+    Détecteur de N+1 et contrôle des budgets de requêtes par viewset.
+
+    QUERY_INSPECTOR_MODE :
+      - 'raise' (développement, tests) : chaque requête est inspectée, un
+        budget dépassé lève QueryBudgetExceeded ;
+      - 'log' (production) : une fraction QUERY_INSPECTOR_SAMPLE_RATE des
+        requêtes est inspectée, les dépassements sont journalisés ;
+      - 'off' : middleware retiré de la chaîne.
+    Les N+1 détectés sont journalisés dans les deux modes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mode = getattr(settings, 'QUERY_INSPECTOR_MODE', 'off')
+        if self.mode not in ('raise', 'log'):
+            raise MiddlewareNotUsed
+        self.sample_rate = getattr(settings, 'QUERY_INSPECTOR_SAMPLE_RATE', 0.01) if self.mode == 'log' else 1.0
+        self.threshold = getattr(settings, 'QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD', 5)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        with observe_queries(QueryInspector(self.threshold)) as inspector:
+            response = self.get_response(request)
+        self.report(request, inspector)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        with observe_queries(QueryInspector(self.threshold)) as inspector:
+            response = await self.get_response(request)
+        self.report(request, inspector)
+        return response
+
+    def report(self, request, inspector):
+        view_class, budget = get_query_budget(request)
+        view_name = view_class.__name__ if view_class else request.path
+
+        for shape, count, origin in inspector.n_plus_one():
+            logger.warning(
+                "N+1 probable dans %s (%s %s) : %s exécutions de « %s » depuis %s",
+                view_name, request.method, request.path, count, shape[:300], origin or "?",
+            )
+
+        if budget is not None and inspector.total > budget:
+            message = (
+                f"{view_name} ({request.method} {request.path}) a exécuté {inspector.total} requêtes SQL "
+                f"pour un budget de {budget}"
+            )
+            if self.mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.error(message)
@@ -1,9 +1,9 @@
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
-from django.urls import resolve
-from django.contrib.auth.middleware import get_user
+from django.contrib.auth.middleware import auser, get_user
 
-class RoleRestrictionMiddleware(MiddlewareMixin):
+from backend.middlewares.base import HybridMiddlewareMixin
+
+class RoleRestrictionMiddleware(HybridMiddlewareMixin):
     """
     Middleware pour restreindre l'accès à certaines vues en fonction du rôle de l'utilisateur.
     """
@@ -21,84 +21,179 @@ class RoleRestrictionMiddleware(MiddlewareMixin):
         "/api/student-homework/": "student-only",
     }
 
-    def process_request(self, request):
-        """ Vérification des autorisations avant l'accès aux vues. """
-        
-        # Récupérer l'URL actuelle
+    def get_role_key(self, request):
+        """ Clé de restriction de l'URL actuelle, ou None si elle n'est pas protégée """
         path = request.path_info
-        
-        # Vérifier si l'URL est protégée
         for protected_path, role_key in self.PROTECTED_URLS.items():
             if path.startswith(protected_path):
-                
-                # Récupérer l'utilisateur connecté
-                user = get_user(request)
-                
-                if not user.is_authenticated:
-                    return JsonResponse({"error": "Authentification requise"}, status=401)
-
-                # Récupérer le rôle de l'utilisateur
-                user_role = getattr(user, "roles", None)  # Assure-toi que le modèle User a un champ `role`
-                
-                # Vérifier si l'utilisateur a l'autorisation d'accès
-                allowed_roles = self.ROLE_RESTRICTIONS.get(role_key, [])
-                if user_role not in allowed_roles:
-                    return JsonResponse({"error": "Accès interdit"}, status=403)
+                return role_key
+        return None
+
+    def process_request(self, request):
+        """ Vérification des autorisations avant l'accès aux vues. """
+        role_key = self.get_role_key(request)
+        if role_key is None:
+            return None  # Continuer normalement si l'URL n'est pas protégée
+        return self.check_user(get_user(request), role_key)
+
+    async def aprocess_request(self, request):
+        role_key = self.get_role_key(request)
+        if role_key is None:
+            return None
+        return self.check_user(await auser(request), role_key)
+
+    def check_user(self, user, role_key):
+        if not user.is_authenticated:
+            return JsonResponse({"error": "Authentification requise"}, status=401)
+
+        # Récupérer le rôle de l'utilisateur
+        user_role = getattr(user, "roles", None)  # Assure-toi que le modèle User a un champ `role`
+
+        # Vérifier si l'utilisateur a l'autorisation d'accès
+        allowed_roles = self.ROLE_RESTRICTIONS.get(role_key, [])
+        if user_role not in allowed_roles:
+            return JsonResponse({"error": "Accès interdit"}, status=403)
 
         return None  # Continuer normalement si tout est bon
 
 
-from django.http import JsonResponse
-from django.urls import resolve
-from rest_framework_simplejwt.authentication import JWTAuthentication
+import re
+import threading
+
+from django.urls import get_resolver
 from rest_framework.exceptions import AuthenticationFailed
 
-# Définition des routes protégées et des rôles requis
+from backend.authentication.jwt import CachedJWTAuthentication
+from backend.models.account import role_mask_for
+from backend.tenant import get_school_id_from_token
+
+# Rôles autorisés par route, indexés par nom d'URL : un nom de base de routeur
+# couvre toutes ses routes (`<base>-list`, `<base>-detail`, actions).
+# Les administrateurs (`is_admin`) ont accès à toutes les routes protégées.
 PROTECTED_ROUTES = {
-    'school-years': ['admin', 'school_manager'],
-    'active-schoolyear': ['admin', 'school_manager'],
-    'classrooms': ['admin', 'school_manager'],
-    'inscriptions': ['admin', 'school_manager'],
-    'student-evaluations': ['admin', 'teacher'],
-    'school-statistics': ['admin', 'school_manager'],
-    'students': ['admin', 'school_manager'],
-    'pupils': ['admin', 'school_manager'],
-    'subject-attributions': ['admin', 'school_manager'],
-    'school-report-cards': ['admin', 'teacher'],
-    'school-invoices': ['admin', 'accountant'],
-    'ebooks': ['admin', 'library_manager'],
-    'announcements': ['admin', 'communication_manager'],
+    'academic-year-of-school': ('director', 'manager'),
+    'current-school-year': ('director', 'manager'),
+    'classrooms-of-school': ('director', 'manager'),
+    'inscription-of-students': ('director', 'manager'),
+    'students-evaluation': ('director', 'manager', 'teacher'),
+    'school-statistics': ('director', 'manager'),
+    'students-of-school': ('director', 'manager'),
+    'subject-attribution': ('director', 'manager'),
+    'school-report-card': ('director', 'manager', 'teacher'),
+    'school-invoices': ('director', 'manager', 'accountant'),
+    'ebook-of-school': ('director', 'manager'),
+    'announcement': ('director', 'manager'),
 }
 
-class RoleBasedAccessMiddleware:
+_NAMED_GROUP = re.compile(r'\(\?P<\w+>')
+
+
+def iter_url_patterns(patterns, prefix=''):
+    """ Parcourt l'URLconf et produit (expression complète, nom d'URL) pour chaque route """
+    for pattern in patterns:
+        regex = pattern.pattern.regex.pattern.lstrip('^')
+        if hasattr(pattern, 'url_patterns'):
+            yield from iter_url_patterns(pattern.url_patterns, prefix + regex)
+        else:
+            if regex.endswith('\\Z'):
+                regex = regex[:-2] + '$'
+            yield prefix + regex, pattern.name
+
+
+class CompiledRouteTable:
     """
-    Middleware pour restreindre l'accès aux vues selon le rôle de l'utilisateur et vérifier la session.
+    Table des routes protégées compilée en une seule expression régulière :
+    chaque route est une alternative nommée `r<i>`, associée au masque des
+    rôles autorisés. Une requête coûte un seul `match`, quel que soit le
+    nombre de routes.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self._regex = None
+        self._masks = []
+        self._lock = threading.Lock()
+
+    def rule_for(self, url_name):
+        """ Rôles de la règle dont le nom de base est le plus long préfixe du nom d'URL """
+        if not url_name:
+            return None
+        best = None
+        for base, roles in self.rules.items():
+            if (url_name == base or url_name.startswith(base + '-')) and (best is None or len(base) > len(best)):
+                best = base
+        return self.rules[best] if best else None
+
+    def compile(self):
+        alternatives, masks = [], []
+        for regex, url_name in iter_url_patterns(get_resolver().url_patterns):
+            roles = self.rule_for(url_name)
+            if roles is None:
+                continue
+            # Les groupes nommés ne peuvent pas se répéter entre alternatives
+            alternatives.append(f"(?P<r{len(masks)}>{_NAMED_GROUP.sub('(?:', regex)})")
+            masks.append(role_mask_for(roles))
+        self._masks = masks
+        self._regex = re.compile('|'.join(alternatives)) if alternatives else re.compile(r'(?!)')
+
+    def match(self, path):
+        """ Retourne le masque des rôles autorisés pour le chemin, ou None s'il n'est pas protégé """
+        if self._regex is None:
+            with self._lock:
+                if self._regex is None:
+                    self.compile()
+        match = self._regex.match(path.lstrip('/'))
+        if match is None:
+            return None
+        return self._masks[int(match.lastgroup[1:])]
+
+
+route_table = CompiledRouteTable(PROTECTED_ROUTES)
+
+
+class RoleBasedAccessMiddleware(HybridMiddlewareMixin):
+    """
+    Middleware pour restreindre l'accès aux vues selon le rôle de l'utilisateur.
+
+    À placer après AuthenticationMiddleware. L'utilisateur authentifié ici est
+    partagé avec DRF (CachedJWTAuthentication) : le JWT n'est décodé qu'une
+    fois par requête. En ASGI, l'utilisateur est lu via l'API asynchrone du cache.
     """
     def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        # Récupération de la vue associée à l'URL
-        resolver_match = resolve(request.path)
-        view_name = resolver_match.url_name
-
-        # Vérifie si la route est protégée
-        for route, allowed_roles in PROTECTED_ROUTES.items():
-            if route in request.path:
-                # Vérifie si l'utilisateur est authentifié
-                try:
-                    user, _ = JWTAuthentication().authenticate(request)
-                    if not user:
-                        raise AuthenticationFailed("Authentification requise")
-                except AuthenticationFailed:
-                    return JsonResponse({'error': "Authentification requise"}, status=401)
-
-                # Vérifie si le school_code est en session
-                if "school_code" not in request.session:
-                    return JsonResponse({'error': "Code d'établissement requis"}, status=403)
-
-                # Vérifie si le rôle de l'utilisateur est autorisé
-                if user.role not in allowed_roles:
-                    return JsonResponse({'error': "Accès interdit"}, status=403)
-
-        return self.get_response(request)
+        super().__init__(get_response)
+        self.authenticator = CachedJWTAuthentication()
+
+    def process_request(self, request):
+        allowed_mask = route_table.match(request.path_info)
+        if allowed_mask is None:
+            return None
+        try:
+            principal = self.authenticator.authenticate(request)
+        except AuthenticationFailed:
+            principal = None
+        return self.check_principal(principal, allowed_mask)
+
+    async def aprocess_request(self, request):
+        allowed_mask = route_table.match(request.path_info)
+        if allowed_mask is None:
+            return None
+        try:
+            principal = await self.authenticator.aauthenticate(request)
+        except AuthenticationFailed:
+            principal = None
+        return self.check_principal(principal, allowed_mask)
+
+    def check_principal(self, principal, allowed_mask):
+        # Vérifie si l'utilisateur est authentifié
+        if principal is None:
+            return JsonResponse({'error': "Authentification requise"}, status=401)
+        user, token = principal
+
+        # Vérifie que le token désigne un établissement
+        if not get_school_id_from_token(token):
+            return JsonResponse({'error': "Code d'établissement requis"}, status=403)
+
+        # Vérifie si le rôle de l'utilisateur est autorisé
+        if not (user.is_admin or user.role_mask & allowed_mask):
+            return JsonResponse({'error': "Accès interdit"}, status=403)
+        return None
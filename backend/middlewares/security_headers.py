@@ -1,6 +1,6 @@
-from django.utils.deprecation import MiddlewareMixin
+from backend.middlewares.base import HybridMiddlewareMixin
 
-class SecurityHeadersMiddleware(MiddlewareMixin):
+class SecurityHeadersMiddleware(HybridMiddlewareMixin):
     """
     Middleware pour ajouter des en-têtes HTTP de sécurité.
     """
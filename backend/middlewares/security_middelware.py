@@ -1,7 +1,8 @@
 from django.http import JsonResponse
-from django.utils.deprecation import MiddlewareMixin
+from backend.authentication.rate_limit import get_client_ip
+from backend.middlewares.base import HybridMiddlewareMixin
 
-class SecurityMiddleware(MiddlewareMixin):
+class SecurityMiddleware(HybridMiddlewareMixin):
     """
     Middleware de sécurité pour protéger l'application contre certaines attaques.
     """
@@ -43,10 +44,5 @@ class SecurityMiddleware(MiddlewareMixin):
         return response
 
     def get_client_ip(self, request):
-        """ Récupère l'IP du client en prenant en compte les proxys """
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(",")[0]
-        else:
-            ip = request.META.get("REMOTE_ADDR")
-        return ip
+        """ Récupère l'IP du client en prenant en compte les proxys de confiance (TRUSTED_PROXY_COUNT) """
+        return get_client_ip(request)
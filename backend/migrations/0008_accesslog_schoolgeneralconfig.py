@@ -0,0 +1,62 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_user_school'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ip_address', models.GenericIPAddressField()),
+                ('method', models.CharField(max_length=10)),
+                ('path', models.TextField()),
+                ('status_code', models.IntegerField()),
+                ('timestamp', models.DateTimeField(auto_now_add=True)),
+                ('response_time', models.FloatField()),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SchoolGeneralConfig',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('start_date', models.DateField(verbose_name="Date de début de l'année scolaire")),
+                ('end_date', models.DateField(verbose_name="Date de fin de l'année scolaire")),
+                ('holidays', models.TextField(blank=True, null=True, verbose_name='Jours fériés')),
+                ('vacation_periods', models.TextField(blank=True, null=True, verbose_name='Périodes de vacances')),
+                ('registration_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name="Frais d'inscription")),
+                ('re_registration_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais de réinscription')),
+                ('badges_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais de macaron')),
+                ('tuition_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais de scolarité')),
+                ('transportation_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais de transport')),
+                ('food_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais de nourriture')),
+                ('uniform_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name="Frais d'uniforme")),
+                ('additional_fees', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Frais supplémentaires')),
+                ('opening_hours', models.CharField(blank=True, max_length=255, null=True, verbose_name="Heures d'ouverture")),
+                ('closing_hours', models.CharField(blank=True, max_length=255, null=True, verbose_name='Heures de fermeture')),
+                ('admission_requirements', models.TextField(blank=True, null=True, verbose_name="Conditions d'admission")),
+                ('application_deadline', models.DateField(blank=True, null=True, verbose_name="Date limite d'inscription")),
+                ('payment_methods', models.CharField(blank=True, max_length=255, null=True, verbose_name='Modes de paiement acceptés')),
+                ('grading_system', models.CharField(blank=True, max_length=255, null=True, verbose_name='Système de notation')),
+                ('contact_email', models.EmailField(blank=True, max_length=255, null=True, verbose_name='Email de contact')),
+                ('contact_phone', models.CharField(blank=True, max_length=20, null=True, verbose_name='Téléphone de contact')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Modifié le')),
+                ('academic_year', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='backend.schoolyear', verbose_name='Année scolaire')),
+                ('school', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='backend.school', verbose_name='École')),
+            ],
+            options={
+                'verbose_name': "Configuration générale de l'école",
+                'verbose_name_plural': 'Configurations générales des écoles',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_accesslog_schoolgeneralconfig'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='school',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='backend.school', verbose_name='École'),
+        ),
+        migrations.AddField(
+            model_name='schoolabsence',
+            name='school',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='backend.school', verbose_name='École'),
+        ),
+        migrations.AddField(
+            model_name='studentevaluation',
+            name='school',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='backend.school', verbose_name='École'),
+        ),
+        migrations.AddField(
+            model_name='subjectattribution',
+            name='school',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='backend.school', verbose_name='École'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 2000
+
+
+def backfill_in_chunks(model, school_expression):
+    """
+    Renseigne la colonne `school` par tranches de clés primaires, chaque tranche
+    étant validée séparément pour ne pas verrouiller les grosses tables.
+    """
+    last_pk = 0
+    while True:
+        pks = list(
+            model.objects.filter(pk__gt=last_pk, school__isnull=True)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:BATCH_SIZE]
+        )
+        if not pks:
+            break
+        model.objects.filter(pk__in=pks).update(school=school_expression)
+        last_pk = pks[-1]
+
+
+def backfill_school(apps, schema_editor):
+    UserRegistration = apps.get_model('backend', 'UserRegistration')
+    Classroom = apps.get_model('backend', 'Classroom')
+    SchoolInvoice = apps.get_model('backend', 'SchoolInvoice')
+
+    backfill_in_chunks(
+        apps.get_model('backend', 'StudentEvaluation'),
+        Coalesce(
+            Subquery(UserRegistration.objects.filter(pk=OuterRef('inscription_id')).values('school_id')[:1]),
+            Subquery(UserRegistration.objects.filter(pk=OuterRef('inscription_id')).values('classroom__school_id')[:1]),
+        ),
+    )
+    backfill_in_chunks(
+        apps.get_model('backend', 'SchoolAbsence'),
+        Subquery(Classroom.objects.filter(pk=OuterRef('classroom_id')).values('school_id')[:1]),
+    )
+    backfill_in_chunks(
+        apps.get_model('backend', 'SubjectAttribution'),
+        Subquery(Classroom.objects.filter(pk=OuterRef('classroom_id')).values('school_id')[:1]),
+    )
+    backfill_in_chunks(
+        apps.get_model('backend', 'Payment'),
+        Subquery(SchoolInvoice.objects.filter(pk=OuterRef('invoice_id')).values('school_id')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    # Chaque tranche est validée indépendamment
+    atomic = False
+
+    dependencies = [
+        ('backend', '0009_denormalized_school'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_school, migrations.RunPython.noop),
+    ]
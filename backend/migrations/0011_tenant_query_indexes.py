@@ -0,0 +1,101 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_backfill_denormalized_school'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['timestamp'], name='accesslog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['user', '-timestamp'], name='accesslog_user_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['school', '-date_created'], name='announcement_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ebook',
+            index=models.Index(fields=['school', '-created_at'], name='ebook_school_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['school', '-start_date'], name='event_school_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='information',
+            index=models.Index(fields=['school', '-date_created'], name='information_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', 'is_read', '-date_created'], name='message_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['recipient', '-date_created'], name='message_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['school', '-payment_date'], name='payment_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(condition=models.Q(('is_paid', True)), fields=['invoice'], name='payment_invoice_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolabsence',
+            index=models.Index(fields=['school', '-absence_date'], name='absence_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolcalendar',
+            index=models.Index(fields=['school', '-date'], name='calendar_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolexpense',
+            index=models.Index(fields=['school', '-date'], name='expense_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolholiday',
+            index=models.Index(fields=['school', '-date'], name='holiday_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolinvoice',
+            index=models.Index(fields=['school', '-date'], name='invoice_school_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolreportcard',
+            index=models.Index(fields=['school', 'student', 'subject'], name='reportcard_school_student_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolreportcard',
+            index=models.Index(fields=['school', 'subject'], name='reportcard_school_subject_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolyear',
+            index=models.Index(fields=['school', 'is_current_year'], name='schoolyear_school_current_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=models.Index(fields=['school', 'name'], name='subject_school_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userregistration',
+            index=models.Index(fields=['school', 'school_year', 'is_active'], name='ureg_school_year_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userregistration',
+            index=models.Index(fields=['school', 'user'], name='ureg_school_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userregistration',
+            index=models.Index(condition=models.Q(('classroom__isnull', False)), fields=['school', 'school_year'], name='ureg_school_pupils_idx'),
+        ),
+    ]
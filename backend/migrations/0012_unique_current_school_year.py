@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:08
+
+from django.db import migrations, models
+
+
+def keep_latest_current_year(apps, schema_editor):
+    """
+    Ne conserve qu'une année en cours par école avant la pose de la contrainte :
+    la plus récente (date de début, puis identifiant) reste active.
+    """
+    SchoolYear = apps.get_model('backend', 'SchoolYear')
+    kept_schools = set()
+    duplicates = []
+    current_years = (
+        SchoolYear.objects.filter(is_current_year=True, school__isnull=False)
+        .order_by('school_id', '-start_date', '-id')
+        .values_list('id', 'school_id')
+    )
+    for year_id, school_id in current_years.iterator():
+        if school_id in kept_schools:
+            duplicates.append(year_id)
+        else:
+            kept_schools.add(school_id)
+    SchoolYear.objects.filter(id__in=duplicates).update(is_current_year=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_tenant_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(keep_latest_current_year, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='schoolyear',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_current_year', True)), fields=('school',), name='unique_current_year_per_school'),
+        ),
+    ]
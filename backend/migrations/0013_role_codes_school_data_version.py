@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:11
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# Copie figée de backend.models.account.ROLE_CODES
+ROLE_CODES = {
+    'directeur': 'director',
+    'gestionnaire': 'manager',
+    'comptable': 'accountant',
+    'enseignant': 'teacher',
+    'élève': 'pupil',
+    'parent': 'parent',
+    "parent d'élève": 'parent',
+}
+
+
+def fill_role_codes(apps, schema_editor):
+    UserRole = apps.get_model('backend', 'UserRole')
+    used = set()
+    for role in UserRole.objects.order_by('pk'):
+        code = ROLE_CODES.get(role.name.strip().lower(), slugify(role.name)[:30])
+        if code in used:
+            # Deux libellés pour un même rôle : le second garde le slug de son libellé
+            code = f"{slugify(role.name)[:25]}-{role.pk}"
+        used.add(code)
+        role.code = code
+        role.save(update_fields=['code'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_unique_current_school_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='school',
+            name='data_version',
+            field=models.PositiveIntegerField(default=1, editable=False, verbose_name='Version des données'),
+        ),
+        migrations.AddField(
+            model_name='userrole',
+            name='code',
+            field=models.SlugField(blank=True, max_length=30, null=True, unique=True, verbose_name='Code du rôle'),
+        ),
+        migrations.RunPython(fill_role_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0014_access_log_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesslog',
+            name='route',
+            field=models.CharField(blank=True, default='', max_length=150),
+        ),
+        migrations.CreateModel(
+            name='AccessLogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('route', models.CharField(max_length=150)),
+                ('method', models.CharField(max_length=10)),
+                ('request_count', models.PositiveIntegerField()),
+                ('client_error_count', models.PositiveIntegerField(default=0)),
+                ('error_count', models.PositiveIntegerField(default=0)),
+                ('total_response_time', models.FloatField()),
+                ('p50_response_time', models.FloatField()),
+                ('p95_response_time', models.FloatField()),
+                ('p99_response_time', models.FloatField()),
+                ('max_response_time', models.FloatField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['route', 'minute'], name='accesslog_rollup_route_idx')],
+                'constraints': [models.UniqueConstraint(fields=('minute', 'route', 'method'), name='unique_accesslog_rollup')],
+            },
+        ),
+    ]
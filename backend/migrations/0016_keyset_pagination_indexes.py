@@ -0,0 +1,49 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0015_access_log_route_rollup'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='announcement',
+            name='announcement_school_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='event_school_start_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='information',
+            name='information_school_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='schoolinvoice',
+            name='invoice_school_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['school', '-date_created', '-id'], name='announce_school_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['school', '-start_date', '-id'], name='event_school_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='information',
+            index=models.Index(fields=['school', '-date_created', '-id'], name='information_school_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['recipient', '-date_created', '-id'], name='message_recipient_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='schoolinvoice',
+            index=models.Index(fields=['school', '-date', '-id'], name='invoice_school_date_id_idx'),
+        ),
+    ]
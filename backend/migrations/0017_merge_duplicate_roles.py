@@ -0,0 +1,46 @@
+from django.db import migrations
+
+# Copie figée de backend.models.account.ROLE_CODES
+ROLE_CODES = {
+    'directeur': 'director',
+    'gestionnaire': 'manager',
+    'comptable': 'accountant',
+    'enseignant': 'teacher',
+    'élève': 'pupil',
+    'parent': 'parent',
+    "parent d'élève": 'parent',
+}
+
+
+def merge_duplicate_roles(apps, schema_editor):
+    """
+    Fusionne les libellés d'un même rôle (« Parent » et « Parent d'élève ») :
+    la 0013 avait donné au second le slug de son libellé, si bien que ses
+    utilisateurs n'avaient ni le code `parent` ni le bit correspondant.
+    """
+    UserRole = apps.get_model('backend', 'UserRole')
+    UserRoles = apps.get_model('backend', 'User').roles.through
+    for role in UserRole.objects.order_by('pk'):
+        code = ROLE_CODES.get(role.name.strip().lower())
+        if code is None or role.code == code:
+            continue
+        canonical = UserRole.objects.filter(code=code).first()
+        if canonical is None:
+            role.code = code
+            role.save(update_fields=['code'])
+            continue
+        user_ids = set(UserRoles.objects.filter(userrole_id=role.pk).values_list('user_id', flat=True))
+        user_ids -= set(UserRoles.objects.filter(userrole_id=canonical.pk, user_id__in=user_ids).values_list('user_id', flat=True))
+        UserRoles.objects.bulk_create([UserRoles(user_id=user_id, userrole_id=canonical.pk) for user_id in user_ids])
+        role.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0016_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_roles, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0017_merge_duplicate_roles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLogArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cutoff', models.DateTimeField(db_index=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('archived_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
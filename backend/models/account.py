@@ -1,4 +1,9 @@
+from functools import cached_property
+
 from django.db import models
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.text import slugify
 from django.db.models.signals import m2m_changed
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
 from django.forms import ValidationError
@@ -41,12 +46,57 @@ class CommonProfile(models.Model):
         abstract = True
 
 
+# Codes stables des rôles, indépendants du libellé affiché (claims JWT, permissions)
+ROLE_CODES = {
+    'directeur': 'director',
+    'gestionnaire': 'manager',
+    'comptable': 'accountant',
+    'enseignant': 'teacher',
+    'élève': 'pupil',
+    'parent': 'parent',
+    "parent d'élève": 'parent',
+}
+
+
+# Bit de chaque rôle dans le masque des rôles d'un utilisateur : valeurs stables, ne jamais renuméroter
+ROLE_BITS = {
+    'director': 1 << 0,
+    'manager': 1 << 1,
+    'accountant': 1 << 2,
+    'teacher': 1 << 3,
+    'pupil': 1 << 4,
+    'parent': 1 << 5,
+}
+
+
+def role_mask_for(codes):
+    """ Masque de bits des rôles connus parmi les codes donnés """
+    mask = 0
+    for code in codes:
+        mask |= ROLE_BITS.get(code, 0)
+    return mask
+
+
+def role_code_for(name):
+    """ Code du rôle à partir de son libellé (slug du libellé pour les rôles inconnus) """
+    return ROLE_CODES.get(name.strip().lower(), slugify(name)[:30])
+
+
 class UserRole(models.Model):
     name = models.CharField(max_length=50, unique=True, verbose_name="Nom du rôle")
+    code = models.SlugField(max_length=30, unique=True, null=True, blank=True, verbose_name="Code du rôle")
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self.code:
+            self.code = role_code_for(self.name)
+            if UserRole.objects.filter(code=self.code).exclude(pk=self.pk).exists():
+                # Second libellé d'un même rôle : ses utilisateurs n'auraient pas le code du rôle
+                raise ValidationError(f"Le rôle « {self.name} » existe déjà sous un autre libellé.")
+        super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Rôle"
         verbose_name_plural = "Rôles"
@@ -92,9 +142,24 @@ class User(AbstractBaseUser, PermissionsMixin, CommonProfile):
         verbose_name = "Utilisateur"
         verbose_name_plural = "Utilisateurs"
     
-    def has_role(self, role_name):
-        """ Vérifie si l'utilisateur a un rôle spécifique """
-        return self.roles.filter(name=role_name).exists()
+    @cached_property
+    def role_codes(self):
+        """ Codes des rôles de l'utilisateur, chargés une seule fois par instance (sans requête si `roles` est préchargé) """
+        if 'roles' in getattr(self, '_prefetched_objects_cache', {}):
+            return frozenset(role.code for role in self.roles.all() if role.code)
+        return frozenset(code for code in self.roles.values_list('code', flat=True) if code)
+
+    @cached_property
+    def role_mask(self):
+        return role_mask_for(self.role_codes)
+
+    def has_role(self, role):
+        """ Vérifie si l'utilisateur a un rôle spécifique (code ou libellé), sans requête une fois les rôles chargés """
+        code = role if role in ROLE_BITS else role_code_for(role)
+        bit = ROLE_BITS.get(code)
+        if bit:
+            return bool(self.role_mask & bit)
+        return code in self.role_codes
 
     def has_perm(self, perm, obj=None):
         return self.is_admin
@@ -107,6 +172,14 @@ class User(AbstractBaseUser, PermissionsMixin, CommonProfile):
         return self.is_admin
 
 
+def role_exists(code, user_ref='pk'):
+    """
+    Condition `EXISTS` : l'utilisateur désigné par `user_ref` a le rôle de code
+    `code`. Filtre sur le code indexé, sans jointure qui dupliquerait les lignes.
+    """
+    return Exists(User.roles.through.objects.filter(user_id=OuterRef(user_ref), userrole__code=code))
+
+
 
 class AccessLog(models.Model):
     """
@@ -116,9 +189,69 @@ class AccessLog(models.Model):
     ip_address = models.GenericIPAddressField()
     method = models.CharField(max_length=10)
     path = models.TextField()
+    # Nom de la route résolue (ex. « school-invoices-detail ») : regroupe les chemins porteurs d'identifiants
+    route = models.CharField(max_length=150, blank=True, default='')
     status_code = models.IntegerField()
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Horodatage de la requête, fourni par l'écriture différée (auto_now_add l'écraserait au flush)
+    timestamp = models.DateTimeField(default=timezone.now)
     response_time = models.FloatField()  # Temps de réponse en secondes
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['timestamp'], name='accesslog_timestamp_idx'),
+            models.Index(fields=['user', '-timestamp'], name='accesslog_user_timestamp_idx'),
+        ]
+
     def __str__(self):
         return f"{self.timestamp} - {self.user} - {self.method} {self.path} ({self.status_code})"
+
+
+class AccessLogRollup(models.Model):
+    """
+    Agrégat par minute, route et méthode du journal d'accès, alimenté par la
+    commande `rollup_access_logs`. Les requêtes d'exploitation sur de longues
+    périodes portent sur cette table plutôt que sur les lignes brutes.
+    """
+    minute = models.DateTimeField()
+    route = models.CharField(max_length=150)
+    method = models.CharField(max_length=10)
+    request_count = models.PositiveIntegerField()
+    client_error_count = models.PositiveIntegerField(default=0)  # Statuts 4xx
+    error_count = models.PositiveIntegerField(default=0)  # Statuts 5xx
+    total_response_time = models.FloatField()  # Somme en secondes, pour les moyennes pondérées
+    p50_response_time = models.FloatField()
+    p95_response_time = models.FloatField()
+    p99_response_time = models.FloatField()
+    max_response_time = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['minute', 'route', 'method'], name='unique_accesslog_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['route', 'minute'], name='accesslog_rollup_route_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.minute} - {self.method} {self.route} ({self.request_count})"
+
+
+class AccessLogArchive(models.Model):
+    """
+    Passage de la commande `archive_access_logs` : les lignes brutes antérieures à
+    `cutoff` et d'identifiant au plus `last_id` sont comptées dans les agrégats. Les
+    minutes archivées ne sont plus recalculées ; les lignes arrivées après coup
+    (identifiant supérieur) y sont fusionnées lors de leur suppression.
+    """
+    cutoff = models.DateTimeField(db_index=True)
+    last_id = models.BigIntegerField(default=0)
+    archived_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive avant {self.cutoff} ({self.archived_count})"
+
+    @classmethod
+    def last_cutoff(cls):
+        """ Borne des minutes déjà archivées, ou `None` avant le premier archivage """
+        return cls.objects.aggregate(last=models.Max('cutoff'))['last']
@@ -3,6 +3,7 @@ from django.db import models
 from django.utils.text import slugify
 from django.core.files.storage import default_storage
 from django.utils.crypto import get_random_string
+from backend.models.managers import SchoolScopedManager
 
 
 class Information(models.Model):
@@ -18,6 +19,8 @@ class Information(models.Model):
     school = models.ForeignKey('backend.School', on_delete=models.CASCADE, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     def get_absolute_url(self):
         return f'/information/{self.slug}'
@@ -68,6 +71,10 @@ class Information(models.Model):
         verbose_name = 'Information'
         verbose_name_plural = 'Informations'
         ordering = ['-date_created']
+        indexes = [
+            # Pagination par curseur (champ d'ordre, id) : api.pagination.KeysetPagination
+            models.Index(fields=['school', '-date_created', '-id'], name='information_school_date_id_idx'),
+        ]
 
 
 
@@ -85,6 +92,8 @@ class Event(models.Model):
     school = models.ForeignKey('backend.School', on_delete=models.CASCADE, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     def get_absolute_url(self):
         return f'/evenement/{self.slug}'
@@ -134,6 +143,10 @@ class Event(models.Model):
         verbose_name = 'Événement'
         verbose_name_plural = 'Événements'
         ordering = ['-start_date']
+        indexes = [
+            # Pagination par curseur (champ d'ordre, id) : api.pagination.KeysetPagination
+            models.Index(fields=['school', '-start_date', '-id'], name='event_school_start_id_idx'),
+        ]
 
 class Announcement(models.Model):
     title = models.CharField(max_length=200)
@@ -147,6 +160,8 @@ class Announcement(models.Model):
     school = models.ForeignKey('backend.School', on_delete=models.CASCADE, null=True)
     date_created = models.DateTimeField(auto_now_add=True)
     date_updated = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     def get_absolute_url(self):
         return f'/annonce/{self.slug}'
@@ -196,6 +211,10 @@ class Announcement(models.Model):
         verbose_name = 'Annonce'
         verbose_name_plural = 'Annonces'
         ordering = ['-date_created']
+        indexes = [
+            # Pagination par curseur (champ d'ordre, id) : api.pagination.KeysetPagination
+            models.Index(fields=['school', '-date_created', '-id'], name='announce_school_date_id_idx'),
+        ]
 
 
 class Message(models.Model):
@@ -212,6 +231,13 @@ class Message(models.Model):
         verbose_name = 'Message'
         verbose_name_plural = 'Messages'
         ordering = ['-date_created']
+        indexes = [
+            models.Index(fields=['recipient', 'is_read', '-date_created'], name='message_inbox_idx'),
+            # Pagination par curseur (champ d'ordre, id) : api.pagination.KeysetPagination
+            models.Index(fields=['recipient', '-date_created', '-id'], name='message_recipient_date_id_idx'),
+            # Compteur et liste des messages non lus
+            models.Index(fields=['recipient', '-date_created'], condition=models.Q(is_read=False), name='message_unread_idx'),
+        ]
     
     def mark_as_read(self):
         self.is_read = True
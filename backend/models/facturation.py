@@ -1,11 +1,14 @@
 from django.db import models
 from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan, GreaterThanOrEqual
 import uuid
 from django.utils import timezone
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 from django.utils.html import strip_tags
 from backend.models.admin_manager import ExpenseCategory
+from backend.models.managers import SchoolScopedManager
 from elimu_app_backend import settings
 from backend.constant import months
 from django.core.files.base import ContentFile
@@ -32,6 +35,8 @@ class SchoolInvoice(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f'Facture {self.invoice_number} - {self.student.lastname}'
 
@@ -116,14 +121,36 @@ class SchoolInvoice(models.Model):
         verbose_name = 'Facture'
         verbose_name_plural = 'Factures'
         ordering = ['-date']
+        indexes = [
+            # Pagination par curseur (champ d'ordre, id) : api.pagination.KeysetPagination
+            models.Index(fields=['school', '-date', '-id'], name='invoice_school_date_id_idx'),
+        ]
     
     def get_payment_history(self):
         return [payment.get_payment_details() for payment in self.payments.all()]
 
 
+def payment_status_expression():
+    """ Équivalent SQL de SchoolInvoice.get_payment_status, calculé par facture dans la requête de la liste """
+    total_paid = Coalesce(
+        models.Subquery(
+            Payment.objects.filter(invoice=models.OuterRef('pk'), is_paid=True)
+            .values('invoice').annotate(total=Sum('amount')).values('total')
+        ),
+        models.Value(0, output_field=models.DecimalField(max_digits=10, decimal_places=2)),
+    )
+    return models.Case(
+        models.When(GreaterThanOrEqual(total_paid, models.F('amount')), then=models.Value('Entièrement payé')),
+        models.When(GreaterThan(total_paid, 0), then=models.Value('Partiellement payé')),
+        default=models.Value('Non payé'),
+        output_field=models.CharField(),
+    )
+
+
 
 class Payment(models.Model):
     invoice = models.ForeignKey(SchoolInvoice, on_delete=models.CASCADE, related_name='payments')
+    school = models.ForeignKey('backend.School', on_delete=models.CASCADE, null=True, blank=True, editable=False, verbose_name='École')  # Copie dénormalisée de l'école de la facture
     amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='Montant')
     payment_date = models.DateField(auto_now_add=True, verbose_name='Date de paiement')
     payment_method = models.CharField(max_length=50, verbose_name='Mode de paiement')
@@ -134,9 +161,15 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f'Paiement de {self.amount} pour {self.invoice}'
 
+    def save(self, *args, **kwargs):
+        self.school_id = self.invoice.school_id
+        super().save(*args, **kwargs)
+
     def get_payment_details(self):
         return {
             'invoice': str(self.invoice.invoice_number),
@@ -155,6 +188,11 @@ class Payment(models.Model):
         verbose_name = 'Paiement'
         verbose_name_plural = 'Paiements'
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['school', '-payment_date'], name='payment_school_date_idx'),
+            # Somme des paiements encaissés d'une facture
+            models.Index(fields=['invoice'], condition=models.Q(is_paid=True), name='payment_invoice_paid_idx'),
+        ]
     
 
 
@@ -208,6 +246,8 @@ class SchoolExpense(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     school = models.ForeignKey('backend.School', on_delete=models.CASCADE, related_name="expenses", null=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"{self.category.name} - {self.amount} €"
     
@@ -218,6 +258,9 @@ class SchoolExpense(models.Model):
         verbose_name = 'Dépense'
         verbose_name_plural = 'Dépenses'
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['school', '-date'], name='expense_school_date_idx'),
+        ]
     
     def get_expense_summary(self):
         return {
@@ -1,5 +1,6 @@
 from django.db import models
 from django.core.exceptions import ValidationError
+from backend.models.managers import SchoolScopedManager
 
 class Ebook(models.Model):
     title = models.CharField(max_length=100)
@@ -11,11 +12,16 @@ class Ebook(models.Model):
     school = models.ForeignKey('backend.School', on_delete=models.CASCADE, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     class Meta:
         verbose_name = 'Ebook'
         verbose_name_plural = 'Ebooks'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['school', '-created_at'], name='ebook_school_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -62,6 +68,8 @@ class SchoolMaterial(models.Model):
     school = models.ForeignKey('backend.School', on_delete=models.SET_NULL, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     def __str__(self):
         return self.name
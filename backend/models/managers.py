@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class SchoolScopedQuerySet(models.QuerySet):
+    """
+    QuerySet des modèles rattachés à une école par une clé `school` indexée.
+    Le filtre par établissement reste ainsi une simple égalité, sans jointure.
+    """
+
+    def for_school(self, school):
+        return self.filter(school=school)
+
+
+SchoolScopedManager = models.Manager.from_queryset(SchoolScopedQuerySet)
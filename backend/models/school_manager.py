@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.forms import ValidationError
 from backend.models.admin_manager import SchoolCycle, SchoolLevel
+from backend.models.managers import SchoolScopedManager
 import uuid
 import hashlib
 
@@ -44,12 +45,21 @@ class School(models.Model):
     website = models.URLField(verbose_name="Site web", max_length=200, blank=True, null=True)
     logo = models.ImageField(upload_to="logos/", verbose_name="Logo", blank=True, null=True)
     description = models.TextField(verbose_name="Description", blank=True, null=True)
+    # Incrémentée à chaque modification, transmise dans le token (claim `sv`)
+    data_version = models.PositiveIntegerField(default=1, editable=False, verbose_name="Version des données")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
     
     
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            self.data_version = (self.data_version or 0) + 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'data_version'}
+        super().save(*args, **kwargs)
     
     class Meta:
         verbose_name = "École"
@@ -65,6 +75,8 @@ class SchoolYear(models.Model):
     end_date = models.DateField(verbose_name="Date de fin")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+
+    objects = SchoolScopedManager()
     
     def __str__(self):
         return f"{self.year} - {self.school.name}"
@@ -72,16 +84,30 @@ class SchoolYear(models.Model):
     class Meta:
         verbose_name = "Année scolaire"
         verbose_name_plural = "Années scolaires"
-    
+        indexes = [
+            models.Index(fields=['school', 'is_current_year'], name='schoolyear_school_current_idx'),
+        ]
+        constraints = [
+            # Une seule année en cours par école
+            models.UniqueConstraint(
+                fields=['school'], condition=models.Q(is_current_year=True), name='unique_current_year_per_school'
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Une nouvelle année en cours remplace la précédente de la même école
+        with transaction.atomic():
+            if self.is_current_year and self.school_id:
+                SchoolYear.objects.filter(school_id=self.school_id, is_current_year=True).exclude(pk=self.pk).update(is_current_year=False)
+            super().save(*args, **kwargs)
+
     def get_current_year(self):
-        from.school_manager import SchoolYear
-        current_year = SchoolYear.objects.filter(school=self.school, is_current_year=True).first()
+        current_year = self.get_current_school_year()
         return current_year.year if current_year else None
     
     def get_current_school_year(self):
-        from .school_manager import SchoolYear
-        current_school_year = SchoolYear.objects.filter(school=self.school, is_current_year=True).first()
-        return current_school_year
+        from backend.tenant import get_current_school_year
+        return get_current_school_year(self.school)
 
 
 class Classroom(models.Model):
@@ -92,6 +118,8 @@ class Classroom(models.Model):
     school_level = models.ForeignKey(SchoolLevel, on_delete=models.CASCADE, verbose_name="Niveau scolaire")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+
+    objects = SchoolScopedManager()
     
     def __str__(self):
         return f"{self.name} - {self.school_level.name}"
@@ -123,10 +151,18 @@ class UserRegistration(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
 
+    objects = SchoolScopedManager()
+
     class Meta:
         verbose_name = "Inscription utilisateur"
         verbose_name_plural = "Inscriptions utilisateurs"
         unique_together = ('user', 'school_year', 'classroom')  # Un utilisateur ne peut pas s'inscrire plusieurs fois avec le même rôle pour une année et une classe
+        indexes = [
+            models.Index(fields=['school', 'school_year', 'is_active'], name='ureg_school_year_active_idx'),
+            models.Index(fields=['school', 'user'], name='ureg_school_user_idx'),
+            # Inscriptions d'élèves (avec salle de classe) : listes et élèves de l'année active
+            models.Index(fields=['school', 'school_year'], condition=models.Q(classroom__isnull=False), name='ureg_school_pupils_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.full_name if self.user.full_name else self.user.username} - {self.school_year.year if self.school_year else 'N/A'}"
@@ -140,7 +176,7 @@ class UserRegistration(models.Model):
         # Vérifier qu'un utilisateur ne s'inscrit pas deux fois avec le même rôle dans la même école/année/salle de classe
         existing_registration = UserRegistration.objects.filter(
             user=self.user, school_year=self.school_year, classroom=self.classroom
-        ).exists()
+        ).exclude(pk=self.pk).exists()
 
         if existing_registration:
             raise ValidationError("L'utilisateur est déjà inscrit avec ce rôle pour cette année scolaire et salle de classe.")
@@ -151,6 +187,13 @@ class UserRegistration(models.Model):
         self.full_clean()
         super().save(*args, **kwargs)
 
+    @property
+    def effective_school_id(self):
+        """ École de l'inscription ou, à défaut, de sa salle de classe (copiée sur les évaluations) """
+        if self.school_id:
+            return self.school_id
+        return self.classroom.school_id if self.classroom_id else None
+
 
 class StudentEvaluation(models.Model):
     id = models.AutoField(primary_key=True, auto_created=True)
@@ -158,12 +201,15 @@ class StudentEvaluation(models.Model):
     inscription = models.ForeignKey(UserRegistration, on_delete=models.CASCADE, verbose_name="Inscription")
     school_year = models.ForeignKey(SchoolYear, on_delete=models.CASCADE, verbose_name="Année scolaire")
     subject = models.ForeignKey('Subject', on_delete=models.CASCADE, verbose_name="Matière")  # Ajuste le chemin selon ton modèle
+    school = models.ForeignKey(School, on_delete=models.CASCADE, verbose_name="École", null=True, blank=True, editable=False)  # Copie dénormalisée de l'école de l'inscription
     evaluation_date = models.DateField(verbose_name="Date de l'évaluation")
     score = models.FloatField(verbose_name="Score", null=True, blank=True)
     remarks = models.TextField(verbose_name="Remarques", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
 
+    objects = SchoolScopedManager()
+
     class Meta:
         verbose_name = "Évaluation d'élève"
         verbose_name_plural = "Évaluations d'élèves"
@@ -178,7 +224,7 @@ class StudentEvaluation(models.Model):
             raise ValidationError("L'inscription doit être active pour enregistrer une évaluation.")
         
         # Vérifie que l'élève de l'inscription correspond à l'élève de l'évaluation
-        if self.inscription.student != self.student:
+        if self.inscription.user_id != self.student_id:
             raise ValidationError("L'élève de l'évaluation doit correspondre à l'élève de l'inscription.")
         
         # Vérifie que l'année scolaire de l'inscription correspond à l'année scolaire de l'évaluation
@@ -189,6 +235,7 @@ class StudentEvaluation(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
+        self.school_id = self.inscription.effective_school_id
         super().save(*args, **kwargs)
 
 
@@ -196,6 +243,7 @@ class SchoolAbsence(models.Model):
     id = models.AutoField(primary_key=True, auto_created=True)
     student = models.ForeignKey("backend.User", on_delete=models.CASCADE, verbose_name="Élève")
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, verbose_name="Salle de classe", null=True, blank=True)
+    school = models.ForeignKey(School, on_delete=models.CASCADE, verbose_name="École", null=True, blank=True, editable=False)  # Copie dénormalisée de l'école de la salle de classe
     school_year = models.ForeignKey("backend.SchoolYear", on_delete=models.CASCADE, verbose_name="Année scolaire")
     justified = models.BooleanField(default=False)
     absence_date = models.DateField(verbose_name="Date de l'absence")
@@ -203,10 +251,15 @@ class SchoolAbsence(models.Model):
     remarks = models.TextField(verbose_name="Remarques", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
+
+    objects = SchoolScopedManager()
     
     class Meta:
         verbose_name = "Absence d'élève"
         verbose_name_plural = "Absences d'élèves"
+        indexes = [
+            models.Index(fields=['school', '-absence_date'], name='absence_school_date_idx'),
+        ]
     
     def __str__(self):
         return f"Absence de {self.student.firstname} {self.student.lastname} - {self.absence_date}"
@@ -226,6 +279,12 @@ class SchoolAbsence(models.Model):
         
         return super().clean()
 
+    def save(self, *args, **kwargs):
+        if self.classroom_id:
+            self.school_id = self.classroom.school_id
+        super().save(*args, **kwargs)
+
+
 class SchoolGeneralConfig(models.Model):
     id = models.AutoField(primary_key=True, auto_created=True)
     school = models.OneToOneField(School, on_delete=models.CASCADE, verbose_name="École")
@@ -253,6 +312,8 @@ class SchoolGeneralConfig(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Créé le")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Modifié le")
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"Configuration générale de {self.school.name}"
 
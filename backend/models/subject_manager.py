@@ -3,6 +3,7 @@ from django.db import models
 from django.forms import ValidationError
 from backend.models.admin_manager import SubjectGroup
 from backend.models.school_manager import Classroom, School, SchoolYear
+from backend.models.managers import SchoolScopedManager
 
 
 class Subject(models.Model):
@@ -13,6 +14,8 @@ class Subject(models.Model):
     coefficient = models.IntegerField(default=1)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     
     def __str__(self):
@@ -23,6 +26,9 @@ class Subject(models.Model):
         verbose_name_plural = "Matières"
         ordering = ['name']
         unique_together = ('name', 'group')
+        indexes = [
+            models.Index(fields=['school', 'name'], name='subject_school_name_idx'),
+        ]
 
 
 class SchoolSchedule(models.Model):
@@ -38,6 +44,8 @@ class SchoolSchedule(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     class Meta:
         verbose_name = "Emplois du temps scolaire"
         verbose_name_plural = "Emplois du temps scolaires"
@@ -86,6 +94,8 @@ class SchoolCalendar(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"Événements du {self.date} pour {self.school}"
 
@@ -94,6 +104,9 @@ class SchoolCalendar(models.Model):
         verbose_name_plural = "Calendriers scolaires"
         ordering = ['-date']
         unique_together = ('date', 'school')
+        indexes = [
+            models.Index(fields=['school', '-date'], name='calendar_school_date_idx'),
+        ]
 
     def clean(self):
         # Remplace School.current_year_start par une logique appropriée pour obtenir la date de début
@@ -114,6 +127,8 @@ class SchoolHoliday(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"Congé du {self.date} pour {self.school}"
 
@@ -122,6 +137,9 @@ class SchoolHoliday(models.Model):
         verbose_name_plural = "Congés scolaires"
         ordering = ['-date']
         unique_together = ('date', 'school')
+        indexes = [
+            models.Index(fields=['school', '-date'], name='holiday_school_date_idx'),
+        ]
 
     def clean(self):
         if self.date < date.today():
@@ -141,6 +159,8 @@ class SchoolProgram(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"Programme de {self.subject.name} pour {self.school}"
 
@@ -169,6 +189,8 @@ class SchoolReportCard(models.Model):
     school = models.ForeignKey(School, on_delete=models.CASCADE, verbose_name="École",null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = SchoolScopedManager()
     
     def __str__(self):
         return f"Bulletin de {self.student.first_name} {self.student.last_name} pour {self.subject.name} ({self.grade})"
@@ -176,6 +198,10 @@ class SchoolReportCard(models.Model):
     class Meta:
         verbose_name = "Bulletin de notes"
         verbose_name_plural = "Bulletins de notes"
+        indexes = [
+            models.Index(fields=['school', 'student', 'subject'], name='reportcard_school_student_idx'),
+            models.Index(fields=['school', 'subject'], name='reportcard_school_subject_idx'),
+        ]
     
     def clean(self):
         # Vérification que le grade est un chiffre entre 0 et 20
@@ -309,10 +335,13 @@ class SubjectAttribution(models.Model):
     teacher = models.ForeignKey('backend.User', on_delete=models.CASCADE, verbose_name="Professeur")
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, verbose_name="Matière")
     classroom = models.ForeignKey('backend.Classroom', on_delete=models.CASCADE, verbose_name="Salle de classe")
+    school = models.ForeignKey(School, on_delete=models.CASCADE, verbose_name="École", null=True, blank=True, editable=False)  # Copie dénormalisée de l'école de la salle de classe
     school_year = models.ForeignKey('backend.SchoolYear', on_delete=models.CASCADE, verbose_name="Année scolaire")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = SchoolScopedManager()
+
     def __str__(self):
         return f"{self.subject.name} ({self.classroom.name})"
 
@@ -338,6 +367,7 @@ class SubjectAttribution(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()
+        self.school_id = self.classroom.school_id
         super().save(*args, **kwargs)
     
     @property
@@ -0,0 +1,217 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogWriter:
+    """
+    Écriture différée des AccessLog : les requêtes déposent leur entrée dans
+    une file bornée et un thread d'arrière-plan l'insère par lots
+    (`bulk_create`) toutes les `flush_interval` secondes ou tous les
+    `batch_size` éléments.
+
+    File pleine : l'entrée est abandonnée (`overflow='drop'`) ou ajoutée à un
+    fichier NDJSON (`overflow='spill'`) réinséré quand la file est vide.
+    La file est vidée à l'arrêt du processus.
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, flush_interval=0.5, overflow='drop', spill_dir=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_dir = spill_dir
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._counters = {
+            'enqueued': 0,
+            'flushed': 0,
+            'dropped': 0,
+            'spilled': 0,
+            'replayed': 0,
+            'skipped': 0,
+            'failed': 0,
+            'batches': 0,
+            'flush_seconds_total': 0.0,
+            'flush_seconds_max': 0.0,
+            'lag_seconds_max': 0.0,
+        }
+        self._counters_lock = threading.Lock()
+
+    def _count(self, name, value=1):
+        with self._counters_lock:
+            self._counters[name] += value
+
+    def submit(self, entry):
+        """ Dépose une entrée (valeurs des champs d'AccessLog) sans jamais bloquer la requête """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((time.monotonic(), entry))
+            self._count('enqueued')
+        except queue.Full:
+            if self.overflow == 'spill' and self.spill_dir:
+                self._spill(entry)
+            else:
+                self._count('dropped')
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.shutdown)
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._write(batch)
+            elif self.spill_dir:
+                self._replay_spill()
+
+    def _collect(self):
+        """ Attend le premier élément puis regroupe jusqu'à `batch_size` éléments ou `flush_interval` secondes """
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch, retried=False):
+        """
+        Insère un lot ; renvoie False en cas d'échec. Un lot `retried` reste
+        sur disque pour une nouvelle tentative et n'est pas compté comme perdu.
+        """
+        from backend.models.account import AccessLog
+
+        with self._flush_lock:
+            close_old_connections()
+            start = time.monotonic()
+            try:
+                AccessLog.objects.bulk_create([AccessLog(**entry) for _, entry in batch], batch_size=self.batch_size)
+            except Exception:
+                logger.exception("Échec de l'écriture de %s entrées du journal d'accès", len(batch))
+                if not retried:
+                    self._count('failed', len(batch))
+                connection.close()
+                return False
+            elapsed = time.monotonic() - start
+
+        with self._counters_lock:
+            self._counters['flushed'] += len(batch)
+            self._counters['batches'] += 1
+            self._counters['flush_seconds_total'] += elapsed
+            self._counters['flush_seconds_max'] = max(self._counters['flush_seconds_max'], elapsed)
+            self._counters['lag_seconds_max'] = max(self._counters['lag_seconds_max'], time.monotonic() - batch[0][0])
+        return True
+
+    def _spill_path(self):
+        return os.path.join(self.spill_dir, f"access-log-spill-{os.getpid()}.ndjson")
+
+    def _spill(self, entry):
+        line = json.dumps(entry, default=str)
+        with self._spill_lock:
+            try:
+                os.makedirs(self.spill_dir, exist_ok=True)
+                with open(self._spill_path(), 'a', encoding='utf-8') as spill:
+                    spill.write(line + '\n')
+            except OSError:
+                self._count('dropped')
+                return
+        self._count('spilled')
+
+    def _replay_spill(self):
+        """
+        Réinsère les fichiers de débordement : ceux du processus, ou abandonnés
+        depuis plus d'une minute. Un fichier n'est supprimé qu'une fois toutes
+        ses entrées écrites ; sinon le reste est remis en attente sous un
+        nouveau nom, repris une minute plus tard (base indisponible).
+        """
+        own_path = self._spill_path()
+        for path in glob.glob(os.path.join(self.spill_dir, 'access-log-spill-*.ndjson')):
+            if path != own_path and time.time() - os.path.getmtime(path) < 60:
+                continue
+            claimed = f"{path}.{os.getpid()}.replay"
+            with self._spill_lock:
+                try:
+                    os.rename(path, claimed)
+                except OSError:
+                    continue  # Réclamé par un autre processus
+            entries = []
+            with open(claimed, encoding='utf-8') as spill:
+                for line in spill:
+                    if not line.strip():
+                        continue
+                    try:
+                        entries.append((time.monotonic(), json.loads(line)))
+                    except ValueError:
+                        self._count('skipped')  # Ligne tronquée ou corrompue
+            for offset in range(0, len(entries), self.batch_size):
+                if not self._write(entries[offset:offset + self.batch_size], retried=True):
+                    self._requeue_spill(claimed, entries[offset:])
+                    return
+                self._count('replayed', len(entries[offset:offset + self.batch_size]))
+            os.remove(claimed)
+
+    def _requeue_spill(self, claimed, entries):
+        """ Réécrit les entrées non insérées d'un fichier réclamé et le remet en attente """
+        with open(claimed, 'w', encoding='utf-8') as spill:
+            spill.writelines(json.dumps(entry, default=str) + '\n' for _, entry in entries)
+        os.rename(claimed, os.path.join(self.spill_dir, f"access-log-spill-{os.getpid()}-{time.time_ns()}.ndjson"))
+
+    def flush(self):
+        """ Vide la file de façon synchrone """
+        batch = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+
+    def shutdown(self, timeout=5):
+        """ Arrête le thread d'écriture puis écrit les entrées restantes """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self._counters)
+        counters['queue_depth'] = self._queue.qsize()
+        return counters
+
+
+access_log_writer = AccessLogWriter(
+    max_queue=getattr(settings, 'ACCESS_LOG_QUEUE_SIZE', 10000),
+    batch_size=getattr(settings, 'ACCESS_LOG_BATCH_SIZE', 500),
+    flush_interval=getattr(settings, 'ACCESS_LOG_FLUSH_INTERVAL', 0.5),
+    overflow=getattr(settings, 'ACCESS_LOG_OVERFLOW', 'drop'),
+    spill_dir=getattr(settings, 'ACCESS_LOG_SPILL_DIR', None),
+)
@@ -0,0 +1,115 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Attributs propres à LogRecord : le reste provient de `extra` et est sérialisé tel quel
+RESERVED_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """ Une ligne JSON par enregistrement ; les champs passés via `extra` sont conservés """
+
+    def format(self, record):
+        payload = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """ Rotation dès que le fichier dépasse `max_bytes` ou que `interval` secondes se sont écoulées """
+
+    def __init__(self, filename, max_bytes=0, interval=86400, backup_count=7, encoding='utf-8'):
+        directory = os.path.dirname(os.path.abspath(filename))
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Dépose les enregistrements dans une file bornée sans les formater : le
+    message, les arguments et la sérialisation JSON sont traités par le
+    thread du QueueListener. File pleine : l'enregistrement est abandonné
+    et compté, la requête n'attend jamais.
+    """
+
+    def __init__(self, queue_obj):
+        super().__init__(queue_obj)
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Même processus : l'enregistrement n'a pas à être sérialisable, le formatage est différé
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._dropped_lock:
+                self.dropped += 1
+
+
+# Gestionnaires créés par queued_json_file_handler, pour les statistiques et l'arrêt
+_pipelines = []
+
+
+def queued_json_file_handler(filename, max_bytes=50 * 1024 * 1024, interval=86400, backup_count=7, queue_size=10000):
+    """
+    Fabrique utilisée par settings.LOGGING (clé « () ») : un QueueHandler non
+    bloquant alimentant, depuis un thread dédié, un fichier JSON lines à
+    rotation par taille et par durée.
+    """
+    file_handler = SizeAndTimeRotatingFileHandler(filename, max_bytes=max_bytes, interval=interval, backup_count=backup_count)
+    file_handler.setFormatter(JsonLinesFormatter())
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    listener = QueueListener(handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    handler.listener = listener
+    handler.filename = str(filename)
+    _pipelines.append(handler)
+    return handler
+
+
+def pipeline_stats():
+    """ Profondeur de file et abandons de chaque pipeline de journalisation """
+    return [
+        {'filename': handler.filename, 'queue_depth': handler.queue.qsize(), 'dropped': handler.dropped}
+        for handler in _pipelines
+    ]
+
+
+@atexit.register
+def stop_pipelines():
+    """ Écrit les enregistrements restants avant l'arrêt du processus """
+    while _pipelines:
+        handler = _pipelines.pop()
+        try:
+            handler.listener.stop()
+        except queue.Full:
+            pass  # File saturée : le thread (démon) s'arrête avec le processus
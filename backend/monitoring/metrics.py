@@ -0,0 +1,259 @@
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+# Bornes des histogrammes (Prometheus : « le », cumulatives)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+RATIO_BUCKETS = (1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+HISTOGRAMS = {
+    'elimu_http_request_duration_seconds': ("Durée totale des requêtes", DURATION_BUCKETS),
+    'elimu_http_db_queries': ("Nombre de requêtes SQL par requête HTTP", QUERY_COUNT_BUCKETS),
+    'elimu_http_db_duration_seconds': ("Temps passé en base par requête HTTP", DURATION_BUCKETS),
+    'elimu_http_serializer_duration_seconds': ("Temps de sérialisation DRF par requête HTTP", DURATION_BUCKETS),
+    'elimu_http_render_duration_seconds': ("Temps de rendu de la réponse", DURATION_BUCKETS),
+    'elimu_http_response_size_bytes': ("Taille du corps de la réponse", SIZE_BUCKETS),
+    'elimu_http_compression_ratio': ("Taux de compression des réponses (taille d'origine / taille envoyée)", RATIO_BUCKETS),
+}
+
+
+class RequestMetrics:
+    """ Mesures d'une requête, alimentées par le middleware, le wrapper SQL, les sérialiseurs et les renderers """
+
+    __slots__ = ('start', 'db_queries', 'db_time', 'serializer_time', 'render_time', 'serializer_depth', 'render_depth')
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.serializer_depth = 0
+        self.render_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """ Wrapper pour `connection.execute_wrapper` : compte et chronomètre les requêtes SQL """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+
+# Mesures de la requête en cours (threads et coroutines)
+current_request_metrics = contextvars.ContextVar('current_request_metrics', default=None)
+
+
+class MetricsRegistry:
+    """
+    Histogrammes par route et méthode, propres au processus. Avec un
+    répertoire partagé (`METRICS_DIR`), chaque processus y dépose
+    périodiquement son instantané ; l'export Prometheus additionne les
+    instantanés de tous les workers.
+    """
+
+    def __init__(self, directory=None, flush_interval=5, stale_after=3600):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        # {(nom, route, méthode): [compteurs par borne..., +Inf, somme]}
+        self._histograms = {}
+        self._flusher = None
+
+    def observe(self, name, route, method, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, route, method)
+        index = bisect_left(buckets, value)
+        with self._lock:
+            series = self._histograms.get(key)
+            if series is None:
+                series = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+        self._ensure_flusher()
+
+    def observe_request(self, route, method, metrics, duration, size):
+        self.observe('elimu_http_request_duration_seconds', route, method, duration)
+        self.observe('elimu_http_db_queries', route, method, metrics.db_queries)
+        self.observe('elimu_http_db_duration_seconds', route, method, metrics.db_time)
+        self.observe('elimu_http_serializer_duration_seconds', route, method, metrics.serializer_time)
+        self.observe('elimu_http_render_duration_seconds', route, method, metrics.render_time)
+        if size is not None:
+            self.observe('elimu_http_response_size_bytes', route, method, size)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [[*key, list(series)] for key, series in self._histograms.items()]
+        return {'histograms': histograms, 'gauges': process_gauges(), 'counters': process_counters()}
+
+    # Répertoire partagé entre workers
+
+    def _path(self):
+        return os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+    def _ensure_flusher(self):
+        if self.directory is None or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except OSError:
+                pass  # Répertoire indisponible : nouvel essai au prochain intervalle
+
+    def flush(self):
+        """ Écrit l'instantané du processus (remplacement atomique du fichier) """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = f"{self._path()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as handle:
+            json.dump(self.snapshot(), handle)
+        os.replace(tmp, self._path())
+
+    def collect(self):
+        """ Instantanés de tous les processus, celui-ci compris ; les fichiers abandonnés sont purgés """
+        snapshots = [self.snapshot()]
+        if self.directory is None:
+            return snapshots
+        own_path = self._path()
+        for path in glob.glob(os.path.join(self.directory, 'metrics-*.json')):
+            if path == own_path:
+                continue
+            try:
+                if time.time() - os.path.getmtime(path) > self.stale_after:
+                    os.remove(path)
+                    continue
+                with open(path, encoding='utf-8') as handle:
+                    snapshots.append(json.load(handle))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render_prometheus(self):
+        """ Format texte d'exposition Prometheus, agrégé sur tous les processus """
+        merged = {}
+        gauges = {}
+        counters = {}
+        for snapshot in self.collect():
+            for name, route, method, series in snapshot['histograms']:
+                total = merged.setdefault((name, route, method), [0] * len(series))
+                for index, value in enumerate(series):
+                    total[index] += value
+            for name, (help_text, value) in snapshot['gauges'].items():
+                gauges[name] = (help_text, gauges.get(name, (None, 0))[1] + value)
+            for name, (help_text, value) in snapshot.get('counters', {}).items():
+                counters[name] = (help_text, counters.get(name, (None, 0))[1] + value)
+
+        lines = []
+        for name, (help_text, buckets) in HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (series_name, route, method), series in sorted(merged.items()):
+                if series_name != name:
+                    continue
+                labels = f'route="{escape_label(route)}",method="{escape_label(method)}"'
+                cumulative = 0
+                for bound, count in zip((*buckets, '+Inf'), series[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {series[-1]}")
+                lines.append(f"{name}_count{{{labels}}} {cumulative}")
+        for name, (help_text, value) in sorted(gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        for name, (help_text, value) in sorted(counters.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def process_gauges():
+    """ Jauges des files internes du processus, additionnées entre workers à l'export """
+    from backend.authentication.hashing import hash_pool
+    from backend.monitoring.access_log_writer import access_log_writer
+    from backend.monitoring.log_pipeline import pipeline_stats
+
+    return {
+        'elimu_access_log_queue_depth': ("Entrées AccessLog en attente d'écriture", access_log_writer.stats()['queue_depth']),
+        'elimu_login_hash_queue_depth': ("Vérifications de mot de passe en attente", hash_pool.snapshot()['queue_depth']),
+        'elimu_log_queue_depth': ("Enregistrements de journalisation en attente", sum(item['queue_depth'] for item in pipeline_stats())),
+    }
+
+
+def process_counters():
+    """
+    Totaux croissants du processus depuis son démarrage (compteurs Prometheus,
+    suffixe `_total`) : `rate()` en déduit les débits et ignore les redémarrages.
+    """
+    from backend.authentication.hashing import hash_pool
+    from backend.monitoring.access_log_writer import access_log_writer
+    from backend.monitoring.log_pipeline import pipeline_stats
+
+    writer = access_log_writer.stats()
+    return {
+        'elimu_access_log_flushed_total': ("Entrées AccessLog écrites", writer['flushed']),
+        'elimu_access_log_dropped_total': ("Entrées AccessLog abandonnées (file pleine)", writer['dropped']),
+        'elimu_access_log_spilled_total': ("Entrées AccessLog déversées sur disque", writer['spilled']),
+        'elimu_access_log_replayed_total': ("Entrées AccessLog réinsérées depuis le disque", writer['replayed']),
+        'elimu_access_log_failed_total': ("Entrées AccessLog dont l'écriture a échoué", writer['failed']),
+        'elimu_access_log_skipped_total': ("Lignes illisibles des fichiers de débordement ignorées", writer['skipped']),
+        'elimu_login_hash_rejected_total': ("Connexions refusées (pool de hachage saturé)", hash_pool.snapshot()['rejected']),
+        'elimu_log_dropped_total': ("Enregistrements de journalisation abandonnés", sum(item['dropped'] for item in pipeline_stats())),
+    }
+
+
+def install_serializer_timing():
+    """
+    Chronomètre `serializer.data` des sérialiseurs DRF pour la requête en
+    cours. Seul l'appel le plus externe est compté : un `.data` imbriqué
+    (SerializerMethodField) est déjà inclus dans celui du parent.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'timed', False):
+        return
+
+    def data(self):
+        metrics = current_request_metrics.get()
+        if metrics is None:
+            return original.fget(self)
+        metrics.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            metrics.serializer_depth -= 1
+            if not metrics.serializer_depth:
+                metrics.serializer_time += time.perf_counter() - start
+
+    data.timed = True
+    BaseSerializer.data = property(data)
+
+
+registry = MetricsRegistry(
+    directory=getattr(settings, 'METRICS_DIR', None),
+    flush_interval=getattr(settings, 'METRICS_FLUSH_INTERVAL', 5),
+    stale_after=getattr(settings, 'METRICS_STALE_AFTER', 3600),
+)
@@ -0,0 +1,100 @@
+import os
+import re
+import sys
+from functools import lru_cache
+
+from django.conf import settings
+
+# Fichiers ignorés pour l'origine d'une requête : frameworks et instrumentation
+_IGNORED_PATH_PARTS = (
+    f"{os.sep}site-packages{os.sep}",
+    f"{os.sep}backend{os.sep}monitoring{os.sep}",
+    f"{os.sep}backend{os.sep}middlewares{os.sep}",
+)
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_SPACES = re.compile(r'\s+')
+
+
+class QueryBudgetExceeded(Exception):
+    """ Levée quand une vue dépasse son budget de requêtes SQL (mode 'raise') """
+
+
+class QueryBudgetMixin:
+    """
+    Budget de requêtes SQL par défaut des viewsets de lecture simple, contrôlé
+    par QueryInspectorMiddleware : authentification, école, comptage et page.
+    Une vue qui charge davantage (préchargements) surcharge `query_budget`.
+    """
+    query_budget = {'list': 5, 'retrieve': 5}
+
+
+@lru_cache(maxsize=2048)
+def sql_shape(sql):
+    """ Forme d'une requête : littéraux et listes IN de longueur variable neutralisés """
+    shape = _STRING.sub('?', sql)
+    shape = _NUMBER.sub('?', shape)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _SPACES.sub(' ', shape).strip()
+
+
+def origin_frame():
+    """ Première frame du code de l'application (hors frameworks) à l'origine de la requête """
+    base_dir = str(settings.BASE_DIR)
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(base_dir) and not any(part in filename for part in _IGNORED_PATH_PARTS):
+            return f"{os.path.relpath(filename, base_dir)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+class QueryInspector:
+    """
+    Wrapper pour `connection.execute_wrapper` : regroupe les requêtes d'une
+    requête HTTP par forme SQL. Une forme exécutée au moins `threshold` fois
+    est signalée comme N+1, avec la frame applicative de sa deuxième
+    exécution (capturée une seule fois par forme).
+    """
+
+    def __init__(self, threshold=5):
+        self.threshold = threshold
+        self.total = 0
+        # {forme: [nombre d'exécutions, origine]}
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.total += 1
+        shape = sql_shape(sql)
+        entry = self.shapes.get(shape)
+        if entry is None:
+            self.shapes[shape] = [1, None]
+        else:
+            entry[0] += 1
+            if entry[1] is None:
+                entry[1] = origin_frame()
+        return execute(sql, params, many, context)
+
+    def n_plus_one(self):
+        """ [(forme, nombre, origine)] des formes répétées, de la plus fréquente à la moins fréquente """
+        repeated = [(shape, count, origin) for shape, (count, origin) in self.shapes.items() if count >= self.threshold]
+        return sorted(repeated, key=lambda item: -item[1])
+
+
+def get_query_budget(request):
+    """
+    Budget de requêtes déclaré par la vue résolue : attribut `query_budget`
+    du viewset, entier ou dictionnaire par action ({'list': 5, 'retrieve': 3}).
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return None, None
+    view_class = getattr(match.func, 'cls', None) or getattr(match.func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if isinstance(budget, dict):
+        action = getattr(match.func, 'actions', {}).get(request.method.lower())
+        budget = budget.get(action)
+    return view_class, budget
@@ -0,0 +1,34 @@
+import time
+
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from backend.monitoring.metrics import current_request_metrics
+
+
+class TimedRendererMixin:
+    """
+    Ajoute le temps de rendu aux mesures de la requête en cours. L'API
+    navigable rend aussi le contenu via le renderer JSON : seul le rendu le
+    plus externe est compté.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        metrics = current_request_metrics.get()
+        if metrics is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        metrics.render_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.render_depth -= 1
+            if not metrics.render_depth:
+                metrics.render_time += time.perf_counter() - start
+
+
+class TimedJSONRenderer(TimedRendererMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRendererMixin, BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,25 @@
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from django.urls import Resolver404, resolve
+
+# Route des requêtes qui ne correspondent à aucun motif d'URL
+UNRESOLVED_ROUTE = '<unresolved>'
+
+
+def route_for_request(request):
+    """ Nom de la route résolue pour la requête, sans identifiants ni paramètres """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return route_for_path(request.path_info)
+    return match.view_name or match.route or UNRESOLVED_ROUTE
+
+
+@lru_cache(maxsize=4096)
+def route_for_path(path):
+    """ Nom de la route d'un chemin enregistré (lignes antérieures au champ `route`) """
+    try:
+        match = resolve(urlsplit(path).path)
+    except Resolver404:
+        return UNRESOLVED_ROUTE
+    return match.view_name or match.route or UNRESOLVED_ROUTE
@@ -0,0 +1,44 @@
+import contextvars
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# Observateurs SQL de la requête en cours. Les variables de contexte suivent
+# la requête jusque dans le thread où `sync_to_async` exécute l'ORM : un seul
+# wrapper, posé sur chaque connexion, sert les modes WSGI et ASGI.
+current_query_observers = contextvars.ContextVar('current_query_observers', default=())
+
+
+def dispatch_query(execute, sql, params, many, context):
+    """ Wrapper permanent des connexions : transmet la requête SQL aux observateurs actifs """
+    call = execute
+    for observer in current_query_observers.get():
+        call = partial(observer, call)
+    return call(sql, params, many, context)
+
+
+@contextmanager
+def observe_queries(observer):
+    """ Active un observateur (signature de `execute_wrapper`) pour la durée du bloc """
+    token = current_query_observers.set((*current_query_observers.get(), observer))
+    try:
+        yield observer
+    finally:
+        current_query_observers.reset(token)
+
+
+def install(connection):
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_query)
+
+
+@receiver(connection_created)
+def install_on_connection(sender, connection, **kwargs):
+    install(connection)
+
+
+for _connection in connections.all(initialized_only=True):
+    install(_connection)
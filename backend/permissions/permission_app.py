@@ -1,44 +1,62 @@
 from rest_framework.permissions import BasePermission
 
-class IsDirector(BasePermission):
+from backend.models.account import ROLE_BITS
+
+
+class RolePermission(BasePermission):
     """
-    Permission pour les utilisateurs ayant le rôle de Directeur.
+    Permission accordée aux utilisateurs ayant l'un des rôles `roles` (codes).
+    Le masque est calculé une fois à la définition de la classe ; la
+    vérification est un simple ET binaire sur le masque des rôles de l'utilisateur,
+    chargé au plus une fois par requête.
     """
+    roles = ()
+    mask = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.mask = 0
+        for code in cls.roles:
+            cls.mask |= ROLE_BITS[code]
+
     def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == 'Directeur'
+        user = request.user
+        return bool(user and user.is_authenticated and getattr(user, 'role_mask', 0) & self.mask)
+
+
+class IsDirector(RolePermission):
+    """
+    Permission pour les utilisateurs ayant le rôle de Directeur.
+    """
+    roles = ('director',)
 
-class IsManager(BasePermission):
+class IsManager(RolePermission):
     """
     Permission pour les utilisateurs ayant le rôle de gestionnaire.
     """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == 'Gestionnaire'
+    roles = ('manager',)
 
 
-class IsAccountant(BasePermission):
+class IsAccountant(RolePermission):
     """
     Permission pour les utilisateurs ayant le rôle de comptable.
     """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == 'Comptable'
-    
-class IsTeacher(BasePermission):
+    roles = ('accountant',)
+
+class IsTeacher(RolePermission):
     """
     Permission pour les utilisateurs ayant le rôle de enseignant.
     """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == 'Enseignant'
+    roles = ('teacher',)
 
-class IsPupil(BasePermission):
+class IsPupil(RolePermission):
     """
     Permission pour les utilisateurs ayant le rôle de élève.
     """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == 'Élève'
+    roles = ('pupil',)
 
-class IsParent(BasePermission):
+class IsParent(RolePermission):
     """
     Permission pour les utilisateurs ayant le rôle de parent.
     """
-    def has_permission(self, request, view):
-        return request.user.is_authenticated and request.user.role.name == "Parent d'élève"
\ No newline at end of file
+    roles = ('parent',)
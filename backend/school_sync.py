@@ -0,0 +1,62 @@
+"""
+Copies dénormalisées de l'école (StudentEvaluation, SchoolAbsence,
+SubjectAttribution, Payment) : renseignées par le save() de chaque ligne,
+reportées ici quand le parent (salle de classe, inscription, facture) change
+d'école. Les mises à jour en masse (update(), bulk_create) ne déclenchent pas
+ces signaux : commande `sync_denormalized_school` ensuite.
+"""
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from backend.models.facturation import Payment, SchoolInvoice
+from backend.models.school_manager import Classroom, SchoolAbsence, StudentEvaluation, UserRegistration
+from backend.models.subject_manager import SubjectAttribution
+
+
+def school_sources():
+    """ Modèles à école dénormalisée et expression SQL de l'école attendue pour chaque ligne """
+    registration = UserRegistration.objects.filter(pk=OuterRef('inscription_id'))
+    classroom_school = Subquery(Classroom.objects.filter(pk=OuterRef('classroom_id')).values('school_id')[:1])
+    return (
+        (StudentEvaluation, Coalesce(
+            Subquery(registration.values('school_id')[:1]),
+            Subquery(registration.values('classroom__school_id')[:1]),
+        )),
+        (SchoolAbsence, classroom_school),
+        (SubjectAttribution, classroom_school),
+        (Payment, Subquery(SchoolInvoice.objects.filter(pk=OuterRef('invoice_id')).values('school_id')[:1])),
+    )
+
+
+def move_to_school(queryset, school_id):
+    """ Rattache à `school_id` les lignes du queryset qui pointent ailleurs (une requête UPDATE) """
+    queryset.exclude(school_id=school_id).update(school_id=school_id)
+
+
+@receiver(post_save, sender=Classroom)
+def propagate_classroom_school(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    move_to_school(SchoolAbsence.objects.filter(classroom_id=instance.pk), instance.school_id)
+    move_to_school(SubjectAttribution.objects.filter(classroom_id=instance.pk), instance.school_id)
+    # Évaluations des inscriptions sans école, rattachées par leur salle de classe
+    move_to_school(
+        StudentEvaluation.objects.filter(inscription__classroom_id=instance.pk, inscription__school__isnull=True),
+        instance.school_id,
+    )
+
+
+@receiver(post_save, sender=UserRegistration)
+def propagate_registration_school(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    move_to_school(StudentEvaluation.objects.filter(inscription_id=instance.pk), instance.effective_school_id)
+
+
+@receiver(post_save, sender=SchoolInvoice)
+def propagate_invoice_school(sender, instance, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    move_to_school(Payment.objects.filter(invoice_id=instance.pk), instance.school_id)
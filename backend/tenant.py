@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import ValidationError
+
+from backend.models.school_manager import School, SchoolYear
+
+
+class SchoolCache:
+    """
+    Cache LRU des écoles, partagé par tous les threads du processus.
+
+    Les instances retournées sont partagées entre les requêtes : elles doivent
+    être traitées en lecture seule.
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, school_id):
+        """ Retourne l'école demandée, en la chargeant depuis la base si besoin """
+        school_id = self.normalize(school_id)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(school_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(school_id)
+                return entry[0]
+
+        # Chargement hors du verrou pour ne pas bloquer les autres threads
+        school = self.load(school_id)
+
+        with self._lock:
+            self._entries[school_id] = (school, now + self.ttl)
+            self._entries.move_to_end(school_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return school
+
+    def normalize(self, school_id):
+        return int(school_id)
+
+    def load(self, school_id):
+        return School.objects.get(id=school_id)
+
+    def invalidate(self, school_id):
+        with self._lock:
+            self._entries.pop(self.normalize(school_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class CurrentSchoolYearCache(SchoolCache):
+    """
+    Cache LRU de l'année scolaire en cours de chaque école.
+    L'absence d'année en cours (`None`) est elle aussi mise en cache.
+    """
+
+    def load(self, school_id):
+        return SchoolYear.objects.filter(school_id=school_id, is_current_year=True).first()
+
+
+class SchoolCodeCache(SchoolCache):
+    """ Cache LRU des écoles indexé par code d'établissement (formulaire de connexion) """
+
+    def normalize(self, code):
+        return str(code)
+
+    def load(self, code):
+        # Les codes inconnus ne sont pas mis en cache pour ne pas évincer les écoles réelles
+        school = School.objects.filter(code=code).first()
+        if school is None:
+            raise School.DoesNotExist
+        return school
+
+
+school_cache = SchoolCache(
+    maxsize=getattr(settings, 'TENANT_SCHOOL_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'TENANT_SCHOOL_CACHE_TTL', 300),
+)
+
+current_school_year_cache = CurrentSchoolYearCache(
+    maxsize=getattr(settings, 'TENANT_SCHOOL_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'TENANT_SCHOOL_CACHE_TTL', 300),
+)
+
+school_code_cache = SchoolCodeCache(
+    maxsize=getattr(settings, 'TENANT_SCHOOL_CACHE_SIZE', 256),
+    ttl=getattr(settings, 'TENANT_SCHOOL_CACHE_TTL', 300),
+)
+
+# Attribut posé sur la HttpRequest sous-jacente, visible depuis DRF comme depuis Django
+TENANT_ATTR = 'tenant_school'
+
+
+def get_school_id_from_token(token):
+    """
+    Extrait l'identifiant de l'école des claims du token JWT : claim compact
+    `sid`, ou école sérialisée `school` des tokens émis auparavant.
+    """
+    if not token:
+        return None
+    school_id = token.get('sid')
+    if school_id:
+        return school_id
+    school_data = token.get('school')
+    if not school_data:
+        return None
+    return school_data.get('id')
+
+
+def set_request_school(request, school):
+    """ Attache explicitement une école à la requête (tâches, commandes, tests) """
+    http_request = getattr(request, '_request', request)
+    setattr(http_request, TENANT_ATTR, school)
+
+
+def get_request_school(request):
+    """
+    Retourne l'école de l'utilisateur connecté.
+
+    L'école est résolue une seule fois par requête à partir des claims
+    du token JWT, puis servie depuis le cache LRU du processus, sauf si
+    la version du token (`sv`) est plus récente que celle en cache.
+    """
+    http_request = getattr(request, '_request', request)
+    school = getattr(http_request, TENANT_ATTR, None)
+    if school is not None:
+        return school
+
+    token = getattr(request, 'auth', None)
+    school_id = get_school_id_from_token(token)
+    if not school_id:
+        raise ValidationError({"detail": "École non trouvée."})
+
+    try:
+        school = school_cache.get(school_id)
+        # Token émis après une modification de l'école que ce processus n'a pas vue
+        # (invalidation faite par un autre worker) : l'école est relue
+        version = token.get('sv')
+        if version is not None and school.data_version < version:
+            school_cache.invalidate(school_id)
+            school = school_cache.get(school_id)
+    except School.DoesNotExist:
+        raise ValidationError({"detail": "École non trouvée dans la base de données."})
+
+    setattr(http_request, TENANT_ATTR, school)
+    return school
+
+
+def get_school_by_code(code):
+    """ Retourne l'école correspondant au code d'établissement, ou `None` """
+    if not code:
+        return None
+    try:
+        return school_code_cache.get(code)
+    except School.DoesNotExist:
+        return None
+
+
+def get_current_school_year(school):
+    """ Retourne l'année scolaire en cours de l'école, ou `None` s'il n'y en a pas """
+    if school is None:
+        return None
+    school_id = school if isinstance(school, int) else school.pk
+    return current_school_year_cache.get(school_id)
+
+
+@receiver([post_save, post_delete], sender=School)
+def invalidate_school_cache(sender, instance, **kwargs):
+    """ Invalide l'école modifiée ou supprimée dans le cache du processus """
+    school_cache.invalidate(instance.pk)
+    # Le code a pu changer : l'ancienne clé n'est plus connue, on vide le cache des codes
+    school_code_cache.clear()
+
+
+@receiver([post_save, post_delete], sender=SchoolYear)
+def invalidate_current_school_year_cache(sender, instance, **kwargs):
+    """ Invalide l'année en cours de l'école dès qu'une de ses années change """
+    if instance.school_id:
+        current_school_year_cache.invalidate(instance.school_id)
@@ -1,3 +1,718 @@
-from django.test import TestCase
+import glob
+import gzip
+import hashlib
+import importlib
+import json
+import os
+import tempfile
+import time
+import zlib
+from datetime import timedelta
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.apps import apps
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.forms import ValidationError
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from backend.authentication.blacklist import bump_generation, token_blacklist
+from backend.authentication.jwt import CachedJWTAuthentication, ValidatedTokenCache, user_cache_key, validated_token_cache
+from backend.authentication.login import LoginFailed, authenticate_login, resolve_login_user
+from backend.authentication.rate_limit import SlidingWindowLimiter, get_client_ip, login_alerts
+from backend.authentication.tokens import tokens_for_user
+from backend.management.commands._benchmark import seed_school
+from backend.middlewares.compression import ENCODINGS, CompressionMiddleware, brotli, negotiate_encoding
+from backend.middlewares.logging_middleware import AccessLoggingMiddleware
+from backend.middlewares.security_middelware import SecurityMiddleware
+from backend.models import (
+    AccessLog, AccessLogArchive, AccessLogRollup, Classroom, Payment, School, SchoolAbsence, SchoolInvoice, SchoolYear,
+    StudentEvaluation, SubjectAttribution, User, UserRegistration, UserRole,
+)
+from backend.monitoring.access_log_writer import AccessLogWriter
+from backend.tenant import (
+    SchoolCache, current_school_year_cache, get_current_school_year, get_request_school, school_cache, school_code_cache,
+)
+
+
+def create_school(name="École test"):
+    return School.objects.create(name=name, address="Centre-ville", city="Brazzaville")
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+        SchoolYear.objects.create(
+            school=cls.school, year="2026-2027", is_current_year=True, start_date="2026-09-01", end_date="2027-06-30",
+        )
+        cls.role = UserRole.objects.create(name="Directeur")
+        cls.user = User.objects.create_user(username="directeur", password="secret")
+        cls.user.roles.add(cls.role)
+
+    def setUp(self):
+        cache.clear()
+        validated_token_cache.clear()
+        self.access_token = tokens_for_user(self.user, self.school)['access_token']
+
+    def authenticate(self):
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
+        return CachedJWTAuthentication().authenticate(request)
+
+    def test_warm_authentication_runs_no_query(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.role_codes, {'director'})
+
+    def test_warm_authenticated_get_runs_no_query(self):
+        url = '/api/admin&manager/account/view/current-school-year/'
+        headers = {'HTTP_AUTHORIZATION': f"Bearer {self.access_token}"}
+        self.assertEqual(self.client.get(url, **headers).status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+
+    def test_user_save_invalidates_cached_user(self):
+        self.authenticate()
+        User.objects.filter(pk=self.user.pk).update(firstname="Ancien")
+        self.user.firstname = "Nouveau"
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.authenticate()[0].firstname, "Nouveau")
+
+    def test_deactivated_user_is_rejected(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_role_change_invalidates_cached_user(self):
+        self.assertEqual(self.authenticate()[0].role_codes, {'director'})
+        self.user.roles.remove(self.role)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.authenticate()[0].role_codes, frozenset())
+
+        self.authenticate()
+        self.role.user_set.add(self.user)
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        self.assertEqual(self.authenticate()[0].role_codes, {'director'})
+
+
+class ValidatedTokenCacheTests(TestCase):
+    def test_entry_is_never_served_past_expiration(self):
+        tokens = ValidatedTokenCache(maxsize=10)
+        token_hash = hashlib.sha256(b'token').hexdigest()
+        with mock.patch('backend.authentication.jwt.time.time', return_value=1000):
+            tokens.set(token_hash, {'exp': 1060})
+            self.assertEqual(tokens.get(token_hash), {'exp': 1060})
+        with mock.patch('backend.authentication.jwt.time.time', return_value=1060):
+            self.assertIsNone(tokens.get(token_hash))
+        # L'entrée expirée est retirée, pas seulement masquée
+        with mock.patch('backend.authentication.jwt.time.time', return_value=1000):
+            self.assertIsNone(tokens.get(token_hash))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        tokens = ValidatedTokenCache(maxsize=2)
+        with mock.patch('backend.authentication.jwt.time.time', return_value=1000):
+            tokens.set('a', {'exp': 2000})
+            tokens.set('b', {'exp': 2000})
+            tokens.get('a')
+            tokens.set('c', {'exp': 2000})
+            self.assertIsNone(tokens.get('b'))
+            self.assertIsNotNone(tokens.get('a'))
+
+
+class TokenBlacklistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+        cls.user = User.objects.create_user(username="parent", password="secret")
+
+    def setUp(self):
+        cache.clear()
+        token_blacklist.reset()
+
+    def refresh(self, refresh_token):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/auth/token/refresh/', {'refresh': refresh_token}, content_type='application/json')
+
+    def outstanding(self, jti, expires_at=None):
+        return OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, expires_at=expires_at or timezone.now() + timedelta(days=1),
+        )
+
+    def test_rotated_refresh_token_is_blacklisted(self):
+        refresh_token = tokens_for_user(self.user, self.school)['refresh_token']
+        token_blacklist.sync()
+        response = self.refresh(refresh_token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.json())
+        self.assertTrue(token_blacklist.contains(UntypedToken(refresh_token)['jti']))
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh_token = tokens_for_user(self.user, self.school)['refresh_token']
+        rotated = self.refresh(refresh_token).json()['refresh']
+        self.assertEqual(self.refresh(refresh_token).status_code, 401)
+        self.assertEqual(self.refresh(rotated).status_code, 200)
+
+    def test_entry_committed_out_of_id_order_is_loaded(self):
+        older, newer = self.outstanding('jti-older'), self.outstanding('jti-newer')
+        BlacklistedToken.objects.create(id=20, token=newer)
+        self.assertTrue(token_blacklist.contains('jti-newer'))
+        # Transaction validée après la précédente, avec un identifiant inférieur
+        BlacklistedToken.objects.create(id=10, token=older)
+        bump_generation()
+        self.assertTrue(token_blacklist.contains('jti-older'))
+
+    def test_rows_older_than_overlap_are_not_reread(self):
+        BlacklistedToken.objects.create(id=20, token=self.outstanding('jti-read'))
+        with mock.patch('backend.authentication.blacklist.time.monotonic', return_value=1000):
+            token_blacklist.sync()
+        self.assertEqual(token_blacklist._floor(1000 + token_blacklist.overlap - 1), 0)
+        self.assertEqual(token_blacklist._floor(1000 + token_blacklist.overlap), 20)
+
+    def test_prune_rebuilds_filters_without_pruned_tokens(self):
+        expired = self.outstanding('jti-expired', expires_at=timezone.now() - timedelta(days=1))
+        BlacklistedToken.objects.create(token=expired)
+        BlacklistedToken.objects.create(token=self.outstanding('jti-valid'))
+        self.assertTrue(token_blacklist.contains('jti-expired'))
+
+        call_command('prune_token_blacklist', pause=0, stdout=StringIO())
+
+        self.assertFalse(token_blacklist.contains('jti-expired'))
+        self.assertNotIn('jti-expired', token_blacklist._bloom)
+        self.assertTrue(token_blacklist.contains('jti-valid'))
+
+
+class SlidingWindowLimiterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.limiter = SlidingWindowLimiter('test-limiter', limits={'ip': (3, 100), 'username': (5, 100)})
+
+    def test_blocks_once_limit_is_reached(self):
+        identities = {'ip': '10.0.0.1', 'username': 'eleve'}
+        for _ in range(2):
+            self.limiter.hit(identities, now=1010)
+        self.assertEqual(self.limiter.retry_after(identities, now=1010), 0)
+        self.assertEqual(self.limiter.hit(identities, now=1010), {'ip': 3, 'username': 3})
+        self.assertEqual(self.limiter.retry_after(identities, now=1010), 90)
+        # Les autres valeurs de la dimension ne sont pas touchées
+        self.assertEqual(self.limiter.retry_after({'ip': '10.0.0.2', 'username': 'eleve'}, now=1010), 0)
+
+    def test_previous_window_is_weighted_by_remaining_overlap(self):
+        identities = {'ip': '10.0.0.1'}
+        for _ in range(4):
+            self.limiter.hit(identities, now=1050)
+        # Début de la fenêtre suivante : les 4 échecs comptent encore entièrement
+        self.assertEqual(self.limiter.retry_after(identities, now=1100), 100)
+        # 30 % de la fenêtre écoulée : 4 × 0,7 = 2,8 échecs estimés
+        self.assertEqual(self.limiter.retry_after(identities, now=1130), 0)
+        self.limiter.hit(identities, now=1130)
+        self.assertEqual(self.limiter.retry_after(identities, now=1130), 70)
+        # Deux fenêtres plus tard, plus rien
+        self.assertEqual(self.limiter.retry_after(identities, now=1200), 0)
+
+    def test_empty_and_unknown_dimensions_are_ignored(self):
+        self.assertEqual(self.limiter.hit({'ip': '', 'school': 'ABC'}, now=1000), {})
+
+    def test_alert_is_raised_once_per_window(self):
+        alerts = [self.limiter.alerts(self.limiter.hit({'ip': '10.0.0.1'}, now=1000)) for _ in range(5)]
+        self.assertEqual(alerts, [[], [], ['ip'], [], []])
+
+
+class ClientIpTests(TestCase):
+    def request(self, forwarded_for=None):
+        headers = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        return RequestFactory().get('/', REMOTE_ADDR='10.0.0.254', **headers)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_reads_address_appended_by_trusted_proxy(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6, 41.202.1.7')), '41.202.1.7')
+        self.assertEqual(get_client_ip(self.request('41.202.1.7')), '41.202.1.7')
+        self.assertEqual(get_client_ip(self.request()), '10.0.0.254')
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_ignores_forwarded_for_without_proxy(self):
+        self.assertEqual(get_client_ip(self.request('6.6.6.6')), '10.0.0.254')
+
+    def test_no_proxy_is_trusted_by_default(self):
+        self.assertEqual(settings.TRUSTED_PROXY_COUNT, 0)
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_middlewares_agree_with_the_limiter(self):
+        request = self.request('6.6.6.6, 41.202.1.7')
+        for middleware in (AccessLoggingMiddleware, SecurityMiddleware):
+            with self.subTest(middleware=middleware.__name__):
+                self.assertEqual(middleware(lambda request: None).get_client_ip(request), '41.202.1.7')
+
+
+@override_settings(TRUSTED_PROXY_COUNT=0)
+class BruteForceProtectionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username, ip, school_code='ECOLE-1'):
+        return self.client.post(
+            '/api/auth/login/', {'username': username, 'password': 'faux', 'school_code': school_code},
+            content_type='application/json', REMOTE_ADDR=ip,
+        )
+
+    def test_failures_on_a_school_code_are_reported_not_blocked(self):
+        with mock.patch.dict(login_alerts.limits, {'school': (3, 300)}), \
+                self.assertLogs('backend.middlewares.brute_force_protection', 'WARNING') as logs:
+            statuses = [self.login(f"eleve{i}", f"10.0.0.{i}").status_code for i in range(6)]
+        self.assertNotIn(429, statuses)
+        self.assertEqual(len(logs.records), 1)
+
+    def test_repeated_failures_from_one_ip_are_blocked(self):
+        statuses = [self.login(f"eleve{i}", '10.0.0.1').status_code for i in range(21)]
+        self.assertNotIn(429, statuses[:20])
+        self.assertEqual(statuses[20], 429)
+
+
+class ArchiveAccessLogsTests(TestCase):
+    def log(self, timestamp, response_time=0.1):
+        return AccessLog.objects.create(
+            ip_address='10.0.0.1', method='GET', path='/api/', route='api-root', status_code=200,
+            timestamp=timestamp, response_time=response_time,
+        )
+
+    def test_rows_reinserted_after_rollup_are_aggregated_before_deletion(self):
+        minute = (timezone.now() - timedelta(days=40)).replace(second=0, microsecond=0)
+        self.log(minute)
+        self.log(minute + timedelta(days=1))
+        call_command('rollup_access_logs', stdout=StringIO())
+        # Ligne réinsérée depuis le déversement sur disque, antérieure à la dernière minute agrégée
+        self.log(minute + timedelta(seconds=10), response_time=0.3)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command('archive_access_logs', days=30, output_dir=output_dir, stdout=StringIO())
+
+        self.assertFalse(AccessLog.objects.exists())
+        rollup = AccessLogRollup.objects.get(minute=minute)
+        self.assertEqual(rollup.request_count, 2)
+        self.assertAlmostEqual(rollup.max_response_time, 0.3)
+        self.assertEqual(AccessLogRollup.objects.get(minute=minute + timedelta(days=1)).request_count, 1)
+
+    def test_rows_replayed_after_archiving_are_merged_into_the_minute(self):
+        minute = (timezone.now() - timedelta(days=40)).replace(second=0, microsecond=0)
+        self.log(minute, response_time=0.1)
+        self.log(minute + timedelta(seconds=5), response_time=0.2)
+        with tempfile.TemporaryDirectory() as output_dir:
+            call_command('archive_access_logs', days=30, output_dir=output_dir, stdout=StringIO())
+            # Ligne de la minute archivée réinsérée depuis le déversement sur disque
+            self.log(minute + timedelta(seconds=30), response_time=0.5)
+            call_command('rollup_access_logs', since=minute.isoformat(), stdout=StringIO())
+            self.assertEqual(AccessLogRollup.objects.get(minute=minute).request_count, 2)
+            call_command('archive_access_logs', days=30, output_dir=output_dir, stdout=StringIO())
+
+        self.assertFalse(AccessLog.objects.exists())
+        rollup = AccessLogRollup.objects.get(minute=minute)
+        self.assertEqual(rollup.request_count, 3)
+        self.assertAlmostEqual(rollup.total_response_time, 0.8)
+        self.assertAlmostEqual(rollup.max_response_time, 0.5)
+        self.assertEqual(list(AccessLogArchive.objects.order_by('pk').values_list('archived_count', flat=True)), [2, 1])
+
+
+class AccessLogSpillReplayTests(TransactionTestCase):
+    def setUp(self):
+        spill_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(spill_dir.cleanup)
+        self.spill_dir = spill_dir.name
+        self.writer = AccessLogWriter(batch_size=2, spill_dir=self.spill_dir)
+        entry = {
+            'ip_address': '10.0.0.1', 'method': 'GET', 'path': '/api/', 'route': 'api-root',
+            'status_code': 200, 'timestamp': timezone.now().isoformat(), 'response_time': 0.1,
+        }
+        with open(self.writer._spill_path(), 'w', encoding='utf-8') as spill:
+            spill.write('\n'.join([json.dumps(entry)] * 3 + ['{"tronqué'] + [json.dumps(entry)]) + '\n')
+
+    def spill_files(self):
+        return glob.glob(os.path.join(self.spill_dir, '*'))
+
+    def test_entries_are_kept_while_the_database_fails(self):
+        with mock.patch.object(AccessLog.objects, 'bulk_create', side_effect=Exception("base indisponible")), \
+                self.assertLogs('backend.monitoring.access_log_writer', 'ERROR'):
+            self.writer._replay_spill()
+        self.assertEqual(AccessLog.objects.count(), 0)
+        self.assertEqual(self.writer.stats()['replayed'], 0)
+        self.assertEqual(self.writer.stats()['failed'], 0)
+        [path] = self.spill_files()
+        self.assertTrue(path.endswith('.ndjson'))
+
+        # Fichier remis en attente : repris une minute plus tard
+        self.writer._replay_spill()
+        self.assertEqual(AccessLog.objects.count(), 0)
+        os.utime(path, (time.time() - 120,) * 2)
+        self.writer._replay_spill()
+        self.assertEqual(AccessLog.objects.count(), 4)
+        self.assertEqual(self.spill_files(), [])
+
+    def test_partial_failure_requeues_only_unwritten_entries(self):
+        bulk_create = AccessLog.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(objs, **kwargs):
+            calls.append(len(objs))
+            if len(calls) == 2:
+                raise Exception("base indisponible")
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(AccessLog.objects, 'bulk_create', side_effect=fail_second_batch), \
+                self.assertLogs('backend.monitoring.access_log_writer', 'ERROR'):
+            self.writer._replay_spill()
+        self.assertEqual(AccessLog.objects.count(), 2)
+        self.assertEqual(self.writer.stats()['replayed'], 2)
+        self.assertEqual(self.writer.stats()['skipped'], 1)
+        [path] = self.spill_files()
+        with open(path, encoding='utf-8') as spill:
+            self.assertEqual(len(spill.readlines()), 2)
+
+
+class DenormalizedSchoolTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeded = seed_school('sync', pupils=2, classrooms=1, subjects=1, evaluations_per_pupil=1)
+        cls.school = cls.seeded.school
+        cls.other_school = create_school("Autre école")
+
+    def schools(self, model):
+        return set(model.objects.values_list('school_id', flat=True))
+
+    def test_evaluation_copies_the_school_of_the_registration_or_its_classroom(self):
+        registration = UserRegistration.objects.filter(classroom__isnull=False).first()
+        evaluation = StudentEvaluation.objects.get(inscription=registration)
+        evaluation.school = None
+        evaluation.save()
+        self.assertEqual(evaluation.school_id, self.school.pk)
+
+        UserRegistration.objects.filter(pk=registration.pk).update(school=None)
+        evaluation.inscription.refresh_from_db()
+        evaluation.save()
+        self.assertEqual(evaluation.school_id, self.school.pk)
+
+        # Ni école ni salle de classe : pas d'école, sans erreur
+        UserRegistration.objects.filter(pk=registration.pk).update(classroom=None)
+        evaluation.inscription.refresh_from_db()
+        evaluation.save()
+        self.assertIsNone(evaluation.school_id)
+
+    def test_moving_a_classroom_moves_its_absences_and_attributions(self):
+        classroom = self.seeded.classrooms[0]
+        classroom.school = self.other_school
+        classroom.save()
+        self.assertEqual(self.schools(SchoolAbsence), {self.other_school.pk})
+        self.assertEqual(self.schools(SubjectAttribution), {self.other_school.pk})
+        # Les inscriptions gardent leur école : leurs évaluations aussi
+        self.assertEqual(self.schools(StudentEvaluation), {self.school.pk})
+        self.assertFalse(SchoolAbsence.objects.for_school(self.school).exists())
+        self.assertEqual(SchoolAbsence.objects.for_school(self.other_school).count(), 2)
+
+    def test_moving_a_registration_moves_its_evaluations(self):
+        registration = UserRegistration.objects.filter(classroom__isnull=False).first()
+        registration.school = self.other_school
+        registration.save()
+        self.assertEqual(
+            set(StudentEvaluation.objects.for_school(self.other_school).values_list('inscription_id', flat=True)),
+            {registration.pk},
+        )
+        self.assertEqual(StudentEvaluation.objects.for_school(self.school).count(), 1)
+
+    def test_moving_an_invoice_moves_its_payments(self):
+        invoice = SchoolInvoice.objects.first()
+        invoice.school = self.other_school
+        invoice.save()
+        self.assertEqual(list(Payment.objects.for_school(self.other_school).values_list('invoice_id', flat=True)), [invoice.pk])
+
+    def test_bulk_moves_are_repaired_by_the_sync_command(self):
+        SchoolInvoice.objects.update(school=self.other_school)
+        Classroom.objects.update(school=self.other_school)
+        UserRegistration.objects.update(school=None)
+        call_command('sync_denormalized_school', batch_size=1, stdout=StringIO())
+        for model in (StudentEvaluation, SchoolAbsence, SubjectAttribution, Payment):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.schools(model), {self.other_school.pk})
+
+    def test_backfill_migration_fills_missing_schools(self):
+        backfill = importlib.import_module('backend.migrations.0010_backfill_denormalized_school')
+        for model in (StudentEvaluation, SchoolAbsence, SubjectAttribution, Payment):
+            model.objects.update(school=None)
+        backfill.backfill_school(apps, None)
+        for model in (StudentEvaluation, SchoolAbsence, SubjectAttribution, Payment):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.schools(model), {self.school.pk})
+
+
+class SchoolVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+
+    def setUp(self):
+        school_cache.clear()
+
+    def request(self, version):
+        request = RequestFactory().get('/')
+        request.auth = {'sid': self.school.pk, 'sv': version}
+        return request
+
+    def test_newer_token_version_reloads_the_cached_school(self):
+        school_cache.get(self.school.pk)
+        # Modification vue par un autre worker : le cache de ce processus n'est pas invalidé
+        School.objects.filter(pk=self.school.pk).update(name="École renommée", data_version=self.school.data_version + 1)
+        school = get_request_school(self.request(self.school.data_version + 1))
+        self.assertEqual(school.name, "École renommée")
+        self.assertEqual(school_cache.get(self.school.pk).name, "École renommée")
+
+    def test_older_token_version_keeps_the_cached_school(self):
+        school_cache.get(self.school.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_request_school(self.request(self.school.data_version - 1)).pk, self.school.pk)
+
+
+class DuplicateRoleTests(TestCase):
+    def test_migration_merges_parent_labels_onto_one_code(self):
+        parent = UserRole.objects.create(name="Parent")
+        duplicate = UserRole.objects.create(name="Parent d'élève", code="parent-d-eleve")
+        both, only_duplicate = User.objects.create(username="p1"), User.objects.create(username="p2")
+        both.roles.add(parent, duplicate)
+        only_duplicate.roles.add(duplicate)
+
+        importlib.import_module('backend.migrations.0017_merge_duplicate_roles').merge_duplicate_roles(apps, None)
+
+        self.assertFalse(UserRole.objects.filter(pk=duplicate.pk).exists())
+        for user in (both, only_duplicate):
+            user = User.objects.get(pk=user.pk)
+            self.assertEqual(user.role_codes, {'parent'})
+            self.assertTrue(user.has_role('parent'))
+
+    def test_second_label_of_a_role_is_refused(self):
+        UserRole.objects.create(name="Parent")
+        with self.assertRaises(ValidationError):
+            UserRole.objects.create(name="Parent d'élève")
+
+
+class SchoolCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.schools = [create_school(f"École {name}") for name in "ABC"]
+
+    def setUp(self):
+        school_cache.clear()
+
+    def test_least_recently_used_school_is_evicted(self):
+        first, second, third = self.schools
+        lru = SchoolCache(maxsize=2)
+        lru.get(first.pk)
+        lru.get(str(second.pk))
+        with self.assertNumQueries(0):
+            # Identifiant du token sous forme de texte ou d'entier : même entrée
+            self.assertEqual(lru.get(second.pk), second)
+            lru.get(first.pk)
+        lru.get(third.pk)
+        with self.assertNumQueries(0):
+            lru.get(first.pk)
+            lru.get(third.pk)
+        with self.assertNumQueries(1):
+            lru.get(second.pk)
+
+    def test_expired_entry_is_reloaded(self):
+        lru = SchoolCache(ttl=60)
+        with mock.patch('backend.tenant.time.monotonic', return_value=1000):
+            lru.get(self.schools[0].pk)
+        with mock.patch('backend.tenant.time.monotonic', return_value=1059), self.assertNumQueries(0):
+            lru.get(self.schools[0].pk)
+        with mock.patch('backend.tenant.time.monotonic', return_value=1061), self.assertNumQueries(1):
+            lru.get(self.schools[0].pk)
+
+    def test_saved_or_deleted_school_is_invalidated(self):
+        school = self.schools[0]
+        school_cache.get(school.pk)
+        school.name = "École renommée"
+        school.save()
+        self.assertEqual(school_cache.get(school.pk).name, "École renommée")
+        school_id = school.pk
+        school.delete()
+        with self.assertRaises(School.DoesNotExist):
+            school_cache.get(school_id)
+
+    def test_request_school_is_resolved_once_per_request(self):
+        request = RequestFactory().get('/')
+        request.auth = {'sid': self.schools[1].pk}
+        with self.assertNumQueries(1):
+            self.assertEqual(get_request_school(request), self.schools[1])
+        school_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(get_request_school(request), self.schools[1])
+
+
+class CurrentSchoolYearTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = create_school()
+
+    def setUp(self):
+        current_school_year_cache.clear()
+
+    def create_year(self, year, school=None, **fields):
+        return SchoolYear.objects.create(
+            school=school or self.school, year=f"{year}-{year + 1}", start_date=f"{year}-09-01", end_date=f"{year + 1}-06-30", **fields,
+        )
+
+    def test_new_current_year_demotes_the_previous_one(self):
+        other_school_year = self.create_year(2025, school=create_school("Autre école"), is_current_year=True)
+        previous = self.create_year(2025, is_current_year=True)
+        self.assertEqual(get_current_school_year(self.school), previous)
+
+        current = self.create_year(2026, is_current_year=True)
+        previous.refresh_from_db()
+        self.assertFalse(previous.is_current_year)
+        self.assertEqual(get_current_school_year(self.school), current)
+        # Les autres écoles gardent leur année en cours
+        self.assertEqual(get_current_school_year(other_school_year.school_id), other_school_year)
+
+    def test_second_current_year_is_refused_by_the_database(self):
+        self.create_year(2025, is_current_year=True)
+        year = self.create_year(2026)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SchoolYear.objects.filter(pk=year.pk).update(is_current_year=True)
+
+    def test_missing_current_year_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(get_current_school_year(self.school))
+            self.assertIsNone(get_current_school_year(self.school.pk))
+        # Création d'une année en cours : le cache de l'école est invalidé
+        year = self.create_year(2026, is_current_year=True)
+        self.assertEqual(get_current_school_year(self.school), year)
+
+
+class LoginResolutionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeded = seed_school("login", pupils=2, classrooms=1, subjects=1, evaluations_per_pupil=0, password="secret")
+        cls.school = cls.seeded.school
+        # Élève rattaché à l'école uniquement par son inscription de l'année en cours
+        cls.pupil = cls.seeded.pupils[0]
+        User.objects.filter(pk=cls.pupil.pk).update(school=None)
+        # Ancien élève inscrit sur une année passée seulement
+        cls.former = User.objects.create_user(username="ancien", password="secret")
+        past_year = SchoolYear.objects.create(school=cls.school, year="2010-2011", start_date="2010-09-01", end_date="2011-06-30")
+        UserRegistration.objects.create(user=cls.former, school=cls.school, school_year=past_year, classroom=cls.seeded.classrooms[0])
+
+    def setUp(self):
+        school_code_cache.clear()
+        current_school_year_cache.clear()
+
+    def test_user_is_loaded_in_one_query_once_the_school_is_cached(self):
+        resolve_login_user(self.pupil.username, self.school.code)
+        with self.assertNumQueries(1):
+            school, user = resolve_login_user(self.pupil.username, self.school.code)
+        self.assertEqual((school, user), (self.school, self.pupil))
+        with self.assertNumQueries(1):
+            self.assertEqual(resolve_login_user(self.seeded.teachers[0].username, self.school.code)[1], self.seeded.teachers[0])
+
+    def test_user_outside_the_current_year_is_not_found(self):
+        for username, code in ((self.former.username, self.school.code), (self.pupil.username, "inconnu")):
+            with self.subTest(username=username, code=code), self.assertRaises(LoginFailed) as failure:
+                resolve_login_user(username, code)
+            self.assertEqual(failure.exception.status_code, 404)
+
+    def test_password_is_checked_on_the_loaded_row(self):
+        request = RequestFactory().post('/')
+        with self.assertRaises(LoginFailed) as failure:
+            authenticate_login(request, self.pupil.username, "mauvais", self.school.code)
+        self.assertEqual(failure.exception.status_code, 400)
+        _, user = authenticate_login(request, self.pupil.username, "secret", self.school.code)
+        self.assertIsNotNone(User.objects.get(pk=user.pk).last_login)
+
+
+class CompressionMiddlewareTests(TestCase):
+    body = json.dumps([{'id': i, 'name': "Élève"} for i in range(200)]).encode()
+
+    def respond(self, response, accept_encoding='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/api/', HTTP_ACCEPT_ENCODING=accept_encoding))
+
+    def json_response(self, body=None, **headers):
+        return HttpResponse(self.body if body is None else body, content_type='application/json', headers=headers)
+
+    def test_accept_encoding_qualities(self):
+        for accept_encoding, expected in (
+            ('gzip', 'gzip'),
+            ('gzip;q=0, deflate', None),
+            ('identity', None),
+            ('*', ENCODINGS[0]),
+            ('*;q=0.5, gzip;q=0', 'br' if brotli else None),
+            ('GZIP;q=0.8, br;q=0.2', 'gzip'),
+            ('gzip;q=abc', None),
+            ('', None),
+        ):
+            with self.subTest(accept_encoding=accept_encoding):
+                self.assertEqual(negotiate_encoding(accept_encoding), expected)
+
+    @skipUnless(brotli, "brotli non installé")
+    def test_brotli_is_preferred_at_equal_quality(self):
+        response = self.respond(self.json_response(), 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), self.body)
+
+    def test_large_json_is_compressed_with_a_weak_etag(self):
+        response = self.respond(self.json_response(ETag='"abc"'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    def test_small_or_non_json_responses_are_left_alone(self):
+        small = self.respond(self.json_response(b'{"detail": "ok"}'))
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertFalse(small.has_header('Vary'))
+        html = self.respond(HttpResponse(self.body, content_type='text/html'))
+        self.assertFalse(html.has_header('Content-Encoding'))
+
+    def test_uncompressed_response_still_varies_on_accept_encoding(self):
+        response = self.respond(self.json_response(ETag='"abc"'), 'identity')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], '"abc"')
+
+    def test_streaming_response_is_compressed_chunk_by_chunk(self):
+        chunks = [self.body[i:i + 1000] for i in range(0, len(self.body), 1000)]
+        response = self.respond(StreamingHttpResponse(iter(chunks), content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        stream = response.streaming_content
+        # Chaque morceau est vidé aussitôt : le premier se décompresse sans attendre la fin du flux
+        first = next(stream)
+        self.assertEqual(zlib.decompressobj(31).decompress(first), chunks[0])
+        self.assertEqual(gzip.decompress(first + b''.join(stream)), self.body)
+
+    def test_async_streaming_response_is_compressed(self):
+        async def chunks():
+            for i in range(0, len(self.body), 1000):
+                yield self.body[i:i + 1000]
+
+        async def read(stream):
+            return b''.join([chunk async for chunk in stream])
+
+        response = self.respond(StreamingHttpResponse(chunks(), content_type='application/json'))
+        self.assertEqual(gzip.decompress(async_to_sync(read)(response.streaming_content)), self.body)
+
+    @override_settings(COMPRESSION_STREAMING=False)
+    def test_streaming_compression_can_be_disabled(self):
+        response = self.respond(StreamingHttpResponse(iter([self.body]), content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 
@@ -53,14 +55,18 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'backend.middlewares.performance_middleware.PerformanceMiddleware',
+    'backend.middlewares.compression.CompressionMiddleware',
+    'backend.middlewares.query_inspector_middleware.QueryInspectorMiddleware',
+    'backend.middlewares.builtin.SecurityMiddleware',
+    'backend.middlewares.builtin.SessionMiddleware',
+    'backend.middlewares.builtin.CommonMiddleware',
+    'backend.middlewares.builtin.CsrfViewMiddleware',
+    'backend.middlewares.builtin.AuthenticationMiddleware',
+    'backend.middlewares.builtin.MessageMiddleware',
+    'backend.middlewares.builtin.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'backend.middlewares.brute_force_protection.BruteForceProtectionMiddleware',
 ]
 
 CACHES = {
@@ -70,27 +76,100 @@ CACHES = {
     }
 }
 
+# Cache LRU des écoles (contexte d'établissement) propre à chaque processus
+TENANT_SCHOOL_CACHE_SIZE = 512
+TENANT_SCHOOL_CACHE_TTL = 300  # secondes, borne la durée de vie d'une école périmée entre workers
+
+# Pool de vérification des mots de passe de la connexion asynchrone (par processus)
+LOGIN_HASH_WORKERS = None  # None : un thread par cœur
+LOGIN_HASH_MAX_PENDING = 64  # au-delà, la connexion est refusée (503) plutôt que mise en attente
+
+# Authentification JWT : tokens validés (LRU du processus) et utilisateurs (cache Django)
+AUTH_TOKEN_CACHE_SIZE = 4096
+AUTH_USER_CACHE_TTL = 60  # secondes
+
+# Liste noire des refresh tokens : filtre de Bloom par processus, resynchronisé
+# immédiatement via le cache partagé, ou au plus tard après TOKEN_BLACKLIST_SYNC_INTERVAL
+TOKEN_BLACKLIST_BLOOM_CAPACITY = 200000
+TOKEN_BLACKLIST_BLOOM_ERROR_RATE = 0.001
+TOKEN_BLACKLIST_SYNC_INTERVAL = 5  # secondes
+TOKEN_BLACKLIST_SYNC_OVERLAP = 60  # secondes : délai maximal de validation d'une entrée après l'attribution de son identifiant
+
+# Limitation des tentatives de connexion : {dimension: (échecs maximum, fenêtre en secondes)}
+LOGIN_RATE_LIMITS = {
+    'ip': (20, 300),
+    'username': (5, 300),
+}
+# Échecs par code d'école : signalés dans le journal au-delà du seuil, sans blocage
+LOGIN_FAILURE_ALERTS = {
+    'school': (200, 300),
+}
+# Proxys (nginx, répartiteur) devant l'application : l'IP du client est l'entrée
+# de X-Forwarded-For ajoutée par le plus proche. 0 par défaut (REMOTE_ADDR) :
+# sans proxy, X-Forwarded-For est fourni par le client et ne doit pas être lu
+TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT', 0))
+# Alias de CACHES utilisé par le limiteur : en production, un cache partagé par
+# tous les workers (Redis, Memcached) afin que les compteurs soient communs
+LOGIN_RATE_LIMIT_CACHE = 'default'
+
+# Journal d'accès (AccessLog) : écriture différée par lots depuis un thread d'arrière-plan
+ACCESS_LOG_WRITE_BEHIND = True  # False : insertion synchrone à chaque requête
+ACCESS_LOG_QUEUE_SIZE = 10000
+ACCESS_LOG_BATCH_SIZE = 500
+ACCESS_LOG_FLUSH_INTERVAL = 0.5  # secondes
+# File pleine : 'drop' (abandon compté) ou 'spill' (NDJSON dans ACCESS_LOG_SPILL_DIR, réinséré plus tard)
+ACCESS_LOG_OVERFLOW = 'drop'
+ACCESS_LOG_SPILL_DIR = BASE_DIR / 'var' / 'access_log_spill'
+# Agrégats par minute (rollup_access_logs) et rétention des lignes brutes (archive_access_logs)
+ACCESS_LOG_ROLLUP_DELAY = 300  # secondes : minutes récentes pas encore figées
+ACCESS_LOG_RETENTION_DAYS = 30
+ACCESS_LOG_ARCHIVE_DIR = BASE_DIR / 'var' / 'access_log_archive'
+
+# Instrumentation des requêtes (PerformanceMiddleware) et export Prometheus sur /metrics
+SERVER_TIMING_HEADER = True
+# Répertoire partagé par les workers d'un même hôte : chaque processus y dépose ses histogrammes
+METRICS_DIR = BASE_DIR / 'var' / 'metrics'
+METRICS_FLUSH_INTERVAL = 5  # secondes
+METRICS_STALE_AFTER = 3600  # secondes : fichiers de processus arrêtés purgés ensuite
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # Jeton Bearer du collecteur, obligatoire hors DEBUG
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')  # Accès sans jeton, en DEBUG uniquement
+
+# Compression des réponses JSON (CompressionMiddleware), Brotli ou gzip selon Accept-Encoding
+COMPRESSION_MIN_SIZE = 1024  # octets : en dessous, le gain ne couvre pas le coût
+COMPRESSION_STREAMING = True  # Compresse aussi les réponses en flux, morceau par morceau
+COMPRESSION_BROTLI_QUALITY = 5  # 0-11 : au-delà de 6, bien plus de CPU pour quelques octets (bench_compression)
+COMPRESSION_GZIP_LEVEL = 6  # 1-9
+COMPRESSION_CONTENT_TYPES = ('application/json',)  # ainsi que les types « +json »
+
+# Détecteur de N+1 et budgets de requêtes des viewsets (attribut `query_budget`) :
+# 'raise' en développement et en tests, 'log' échantillonné en production, 'off' pour le désactiver
+QUERY_INSPECTOR_MODE = os.environ.get(
+    'QUERY_INSPECTOR_MODE', 'raise' if DEBUG or 'test' in sys.argv else 'log'
+)
+QUERY_INSPECTOR_SAMPLE_RATE = 0.01  # Part des requêtes inspectées en mode 'log'
+QUERY_INSPECTOR_N_PLUS_ONE_THRESHOLD = 5  # Exécutions d'une même forme SQL signalées comme N+1
+
+# Journalisation : les requêtes déposent les enregistrements dans une file ;
+# un thread dédié les formate en JSON lines et les écrit (rotation par taille et durée)
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
-        'file': {
+        'access_file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': 'access_logs.log',
-            'formatter': 'detailed',
-        },
-    },
-    'formatters': {
-        'detailed': {
-            'format': '%(asctime)s - %(levelname)s - %(message)s',
+            '()': 'backend.monitoring.log_pipeline.queued_json_file_handler',
+            'filename': BASE_DIR / 'var' / 'log' / 'access_logs.jsonl',
+            'max_bytes': 50 * 1024 * 1024,
+            'interval': 24 * 3600,  # secondes
+            'backup_count': 14,
+            'queue_size': 10000,
         },
     },
     'loggers': {
         'access_logger': {
-            'handlers': ['file'],
+            'handlers': ['access_file'],
             'level': 'INFO',
-            'propagate': True,
+            'propagate': False,
         },
     },
 }
@@ -150,11 +229,20 @@ DATABASES = {
 
 REST_FRAMEWORK = {
   'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'backend.authentication.jwt.CachedJWTAuthentication',
+    ),
+  'DEFAULT_RENDERER_CLASSES': (
+        'backend.monitoring.renderers.TimedJSONRenderer',
+        'backend.monitoring.renderers.TimedBrowsableAPIRenderer',
     ),
+  'DEFAULT_PAGINATION_CLASS': 'api.pagination.StandardPagination',
+  'PAGE_SIZE': 50,
   'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema'
 }
 
+# Taille maximale d'une page (?page_size= / ?limit=)
+API_MAX_PAGE_SIZE = 200
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -189,7 +277,6 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
 
-import os
 STATIC_URL = 'static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 
@@ -239,8 +326,8 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 
     "TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainPairSerializer",
-    "TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSerializer",
-    "TOKEN_VERIFY_SERIALIZER": "rest_framework_simplejwt.serializers.TokenVerifySerializer",
+    "TOKEN_REFRESH_SERIALIZER": "backend.authentication.tokens.CompactTokenRefreshSerializer",
+    "TOKEN_VERIFY_SERIALIZER": "backend.authentication.blacklist.BlacklistTokenVerifySerializer",
     "TOKEN_BLACKLIST_SERIALIZER": "rest_framework_simplejwt.serializers.TokenBlacklistSerializer",
     "SLIDING_TOKEN_OBTAIN_SERIALIZER": "rest_framework_simplejwt.serializers.TokenObtainSlidingSerializer",
     "SLIDING_TOKEN_REFRESH_SERIALIZER": "rest_framework_simplejwt.serializers.TokenRefreshSlidingSerializer",